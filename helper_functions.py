@@ -1,11 +1,19 @@
-import plistlib
+import contextlib
+import copy
+import os
+import tempfile
 from pathlib import Path
 import json
 from dataclasses import dataclass
 import logging
-from typing import Any
+from typing import Any, Mapping, Sequence
 
 from services.settings import TAGS_JSON, BOOKMARKS_PLIST
+from services.bookmark_snapshot import BookmarkSnapshot, SnapshotCache
+from services.bookmark_store import BookmarkStore
+from services.plist_reader import iter_plist_bookmarks
+from services.tag_database import TagDatabase, migrate_json_to_sqlite, tag_database_path
+from services.tag_journal import COMPACT_AFTER_OPS, apply_ops, clear_journal, journal_path, read_ops
 
 # ----------
 # Constants
@@ -13,12 +21,28 @@ from services.settings import TAGS_JSON, BOOKMARKS_PLIST
 CONFIG_PATH = Path(__file__).with_name("config.json")
 LOG_FILE = Path("bookmarks_tagger.log")
 
-DEFAULT_CONFIG = {
+DEFAULT_CONFIG: dict[str, dict[str, Any]] = {
     "colors": {
         "col_name": "#cfffed",
         "col_url": "#00ccff", 
         "col_tags": "#008000",
-    }
+    },
+    "search": {
+        # quiet time after the last keystroke before the table is filtered
+        "debounce_ms": 30,
+    },
+    "watcher": {
+        # quiet time after the last Bookmarks.plist change before it is parsed
+        "quiet_ms": 300,
+    },
+    "tags": {
+        # "json": rewrite tags.json after edits; "journal": append each edit
+        # to tags.journal.jsonl and compact it into tags.json now and then;
+        # "sqlite": keep the tags in tags.sqlite (migrated from tags.json);
+        # on a switch the tags are carried over, see switch_tags_backend()
+        "backend": "json",
+        "journal_compact_ops": COMPACT_AFTER_OPS,
+    },
 }
 
 # ----------
@@ -36,16 +60,68 @@ logger = logging.getLogger(__name__)
 # ----------
 # Code
 # ----------
-@dataclass
+@dataclass(frozen=True)
 class SafariBookmarks:
     name: str
     url: str
+    # Safari's WebBookmarkUUID; stable across renames and moves
+    uuid: str = ""
+    # titles of the enclosing folders joined by "/", e.g. "BookmarksBar/News"
+    folder: str = ""
 
 
 def load_safari_bookmarks(plist_path: str | Path) -> list[SafariBookmarks]:
     """
     Load Safari bookmarks from plist file.
 
+    The plist is parsed at most once per file version (see
+    get_bookmark_snapshot); callers get their own list of the shared,
+    immutable SafariBookmarks instances.
+
+    Returns:
+        list[SafariBookmarks]: 
+            A list of SafariBookmarks dataclass instances, e.g.:
+            [
+                SafariBookmarks(name="Example", url="https://example.com"), ...
+            ]
+    """
+    return list(get_bookmark_snapshot(plist_path).bookmarks)
+
+
+def get_bookmark_snapshot(plist_path: str | Path) -> BookmarkSnapshot:
+    """
+    Return the shared snapshot of the given plist.
+
+    All readers (table, watcher, status light) go through this function so
+    a changed Bookmarks.plist is parsed exactly once, no matter how many
+    consumers ask for it.
+    """
+    return _bookmark_snapshots.get(plist_path)
+
+
+def peek_bookmark_snapshot(plist_path: str | Path) -> BookmarkSnapshot | None:
+    """Return the shared snapshot only if it is up to date (no parsing)."""
+    return _bookmark_snapshots.peek(plist_path)
+
+
+def seed_bookmark_snapshot(
+    plist_path: str | Path,
+    bookmarks: Sequence[SafariBookmarks],
+    derived: dict[str, Any] | None = None,
+) -> BookmarkSnapshot:
+    """Share already known bookmarks of the current plist (see bookmark_cache)."""
+    return _bookmark_snapshots.seed(plist_path, bookmarks, derived)
+
+
+def forget_bookmark_snapshots() -> None:
+    """Drop the shared snapshots; the next reader parses the plist again."""
+    _bookmark_snapshots.clear()
+
+
+def parse_safari_bookmarks(plist_path: str | Path) -> list[SafariBookmarks]:
+    """
+    Parse Safari bookmarks from plist file (uncached).
+
     Returns:
         list[SafariBookmarks]: 
             A list of SafariBookmarks dataclass instances, e.g.:
@@ -59,62 +135,25 @@ def load_safari_bookmarks(plist_path: str | Path) -> list[SafariBookmarks]:
         return []
 
     try:
-        # load Safari's bookmarks.plist
-        with plist_path.open("rb") as f:
-            root = plistlib.load(f)
+        # stream only the bookmark leaves out of Safari's bookmarks.plist
+        return [
+            SafariBookmarks(name=title, url=url, uuid=uuid, folder=folder)
+            for url, title, uuid, folder in iter_plist_bookmarks(plist_path)
+        ]
     except Exception:
         # Corrupt or unreadable plist: fail softly
         return []
 
-    bookmarks: list[SafariBookmarks] = []
-
-    def walk(node: dict):
-        """
-        Recursively traverse Safari bookmark containers and collect all leaf bookmark entries.
-
-        Each bookmark item may appear either as:
-            - modern structure:
-                {"WebBookmarkType": "WebBookmarkTypeLeaf",
-                "URLString": "...",
-                "URIDictionary": {"title": "..."} }
-            - older structure:
-                {"WebBookmarkType": "WebBookmarkTypeLeaf",
-                "URLString": "...",
-                "Title": "..." }
-
-        Folder/Container entries have:
-            {"WebBookmarkType": "WebBookmarkTypeList",
-            "Title":"MySubfolderName",
-            "Children": [
-                {"WebBookmarkType":  "...", "URLString": "...", "URIDictionary": {"title":"..."},
-                {...}]
-            }
-        """
-        # folders/containers 
-        for child in node.get("Children",[]):
-            if child.get("WebBookmarkType") == "WebBookmarkTypeLeaf" and "URLString" in child:
-                
-                title = (
-                    # modern SafariBookmarks structure 
-                    child.get("URIDictionary", {}).get("title") 
-                    # older plist structure
-                    or child.get("Title") or ""
-                )
-                url=child["URLString"]
-                # append to list[SafariBookmarks]
-                bookmarks.append(SafariBookmarks(name=title, url=url))
-
-            # recursively call function walk() to catch subfolders
-            if "Children" in child:
-                walk(child)
-
-    # recursive function call for nested Children
-    walk(root)
-    return bookmarks
-
-def load_tags(bookmarks: list[SafariBookmarks] | None = None) -> dict[str, list[str]]:
-    """
-    Load bookmark tags from tags.json.
+
+# process-wide plist cache shared by every bookmark reader
+_bookmark_snapshots = SnapshotCache(parse_safari_bookmarks)
+
+def load_tags(
+    bookmarks: Sequence[SafariBookmarks] | None = None,
+    backend: str | None = None,
+) -> dict[str, list[str]]:
+    """
+    Load bookmark tags from tags.json (or tags.sqlite, see tags_backend()).
 
     The JSON file is expected to have the structure:
         {
@@ -123,35 +162,97 @@ def load_tags(bookmarks: list[SafariBookmarks] | None = None) -> dict[str, list[
             ...
         }
 
+    Edits appended to the tag journal (tags.journal.jsonl) since tags.json
+    was last written are replayed on top of it.
+
     Returns:
         dict[str, list[str]]: Mapping from URL to a cleaned list of tags.
     """
-    if not TAGS_JSON.exists():
-        return {}
-
-    with TAGS_JSON.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    journal = journal_path(TAGS_JSON)
+    if (backend or tags_backend()) == "sqlite":
+        all_tags = load_tag_database()
+    else:
+        if not TAGS_JSON.exists() and not journal.exists():
+            return {}
+        all_tags = read_tags_json() if TAGS_JSON.exists() else {}
+    apply_ops(all_tags, read_ops(journal))
 
     # set of bookmark urls stored in Safari Bookmarks  
     bookmark_urls = {bm.url for bm in bookmarks} if bookmarks is not None else None
     bm_tags: dict[str, list[str]] = {}
     removed_stale: bool = False
-    for url, tags in data.items():
+    for url, tags in all_tags.items():
         # if the url is no longer in the bookmarks ...
         if bookmark_urls is not None and url not in bookmark_urls:
             # ... do NOT consider it any more 
             removed_stale = True
             continue
-        # create dictionary entry with url as key and list[tags] as value
-        bm_tags[url] = normalize_tags(tags, url)
+        bm_tags[url] = tags
 
     # Only call save_tags() if there were deletions in the Safari bookmarks 
     # not yet updated in the tags.json
     if removed_stale and bookmarks is not None:
-        save_tags(bm_tags) # overwrite tags.json 
+        save_tags(bm_tags, backend) # overwrite tags.json 
 
     return bm_tags
 
+def tags_backend() -> str:
+    """Configured tag storage: "json" | "journal" | "sqlite"."""
+    return load_config()["tags"]["backend"]
+
+def read_tags_json() -> dict[str, list[str]]:
+    """The url -> tags map of tags.json, tags cleaned up by normalize_tags()."""
+    with TAGS_JSON.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    # create dictionary entries with url as key and list[tags] as value
+    return {url: normalize_tags(tags, url) for url, tags in data.items()}
+
+def load_tag_database() -> dict[str, list[str]]:
+    """
+    Read the url -> tags map from tags.sqlite.
+
+    The database is created from tags.json the first time; later switches
+    between the backends are handled by switch_tags_backend(). tags.json
+    is left in place either way.
+    """
+    db_path = tag_database_path(TAGS_JSON)
+    if not db_path.exists() and TAGS_JSON.exists():
+        migrate_json_to_sqlite(read_tags_json(), db_path)
+    with TagDatabase(db_path) as database:
+        return database.load()
+
+def tags_backend_path() -> Path:
+    """tags.backend next to tags.json: the backend the tags were kept with last."""
+    return TAGS_JSON.with_name("tags.backend")
+
+def switch_tags_backend(backend: str) -> None:
+    """
+    Carry the tags over if backend is not the one used last: tags.json is
+    imported into an existing tags.sqlite when switching to "sqlite", and
+    tags.sqlite is exported to tags.json when switching away from it.
+
+    Nothing is read or written while the backend stays the same. Without a
+    record of the last backend (first run) nothing is overwritten; a
+    missing database is still migrated by load_tag_database().
+    """
+    record = tags_backend_path()
+    try:
+        previous: str | None = record.read_text(encoding="utf-8").strip()
+    except OSError:
+        previous = None
+    if previous == backend:
+        return
+
+    db_path = tag_database_path(TAGS_JSON)
+    if previous is not None and db_path.exists():
+        if backend == "sqlite" and TAGS_JSON.exists():
+            with TagDatabase(db_path) as database:
+                database.save(read_tags_json())
+        elif previous == "sqlite":
+            with TagDatabase(db_path) as database:
+                write_json_atomic(TAGS_JSON, database.load())
+    write_bytes_atomic(record, backend.encode("utf-8"))
+
 def normalize_tags(tags: Any, url: str) -> list[str]:
     """Checks if tags are list elements.
     If they are strings, converts them to list elements.
@@ -169,57 +270,80 @@ def normalize_tags(tags: Any, url: str) -> list[str]:
 
     return [tag.strip() for tag in iterable if tag.strip()]
 
-def save_tags(tag_map: dict[str, list[str]]) -> None: 
-    """Save and write tags to tags.json"""
-    with TAGS_JSON.open("w", encoding="utf-8") as file:
-        json.dump(tag_map, file, ensure_ascii=False, indent=2)
+def save_tags(tag_map: dict[str, list[str]], backend: str | None = None) -> None: 
+    """
+    Save and write tags to tags.json (atomically, compact JSON), or only
+    the changed URLs to tags.sqlite with the "sqlite" backend.
 
-def build_table_dict() -> dict[str, dict[str, str]]:
+    tag_map is the complete map, so the tag journal is obsolete afterwards.
     """
-    Build a mapping for the table view: 
-        1. load SafariBookmarks (name,url) from bookmarks.plist. 
-        2. load tags from tags.json (URL -> List of Tags).
-        3. Combine both to {display_name: {"url":url, "tags":"t1,t2"}}.
+    if (backend or tags_backend()) == "sqlite":
+        with TagDatabase(tag_database_path(TAGS_JSON)) as database:
+            database.save(tag_map)
+    else:
+        write_json_atomic(TAGS_JSON, tag_map)
+    clear_journal(journal_path(TAGS_JSON))
 
-    Returns:
-        dict[str,dict[str,str]]: display_name -> {"url": ..., "tags": comma-sep. tags}
-    """
-    bookmarks = load_safari_bookmarks(BOOKMARKS_PLIST)
-    tag_map = load_tags(bookmarks)
-
-    table_dict: dict[str, dict[str, str]] = {}
-    name_counter: dict[str, int] = {}
-    for bm in bookmarks:
-        tags = tag_map.get(bm.url, [])
-        tags_str = ",".join(tags)
-        base_name = bm.name or bm.url
-        count = name_counter.get(base_name, 0) + 1
-        name_counter[base_name] = count
-        unique_name = base_name if count == 1 else f"{base_name} ({count})"
-
-        table_dict[unique_name] = {
-            "url": bm.url,
-            "tags": tags_str,
-        }
-    
-    return table_dict
+def write_json_atomic(path: Path, data: Any) -> None:
+    """
+    Write data as compact JSON to a temp file next to path, then rename it
+    over path: readers (and a crash mid-write) never see a truncated file.
+    """
+    text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    write_bytes_atomic(path, text.encode("utf-8"))
+
+def write_bytes_atomic(path: Path, data: bytes) -> None:
+    """Replace path with data atomically (temp file + rename, see write_json_atomic)."""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        with contextlib.suppress(OSError):
+            # mkstemp creates 0600 files; keep the mode of the replaced file
+            os.chmod(tmp_name, os.stat(path).st_mode & 0o777)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+def build_bookmark_store(tag_map: Mapping[str, Sequence[str]] | None = None) -> BookmarkStore:
+    """
+    Load SafariBookmarks from bookmarks.plist and merge them with their
+    tags into one BookmarkStore (the data behind the table).
+
+    tag_map (url -> tags) defaults to the content of tags.json.
+    """
+    bookmarks = get_bookmark_snapshot(BOOKMARKS_PLIST).bookmarks
+    if tag_map is None:
+        tag_map = load_tags(bookmarks)
+    return BookmarkStore.from_bookmarks(bookmarks, tag_map)
 
 def load_config() -> dict:
     """Load config file or return defaults if missing/invalid."""
     if not CONFIG_PATH.exists():
-        return DEFAULT_CONFIG.copy()
+        return copy.deepcopy(DEFAULT_CONFIG)
 
     try:
         with CONFIG_PATH.open("r", encoding="utf8") as f:
             data = json.load(f)
     except Exception:
         # If file is broken, fall back to defaults
-        return DEFAULT_CONFIG.copy()
+        return copy.deepcopy(DEFAULT_CONFIG)
 
     # Basic safety: ensure top-level keys exist
-    # Else load default color scheme
-    cfg = DEFAULT_CONFIG.copy()
-    cfg["colors"].update(data.get("colors", {}))
+    # Else load default color scheme / search settings
+    cfg = copy.deepcopy(DEFAULT_CONFIG)
+    if not isinstance(data, dict):
+        return cfg
+    for section, defaults in cfg.items():
+        # a section of the wrong type keeps its defaults
+        value = data.get(section)
+        if isinstance(value, dict):
+            defaults.update(value)
     return cfg
 
 def save_config(config: dict) -> None:
@@ -7,7 +7,7 @@ from PySide6.QtGui import QKeySequence, QShortcut, QIcon
 from PySide6.QtCore import Qt, QTimer, QSize, QItemSelectionModel, QEvent
 from PySide6.QtWidgets import (
     QApplication, QBoxLayout, QWidget, QMainWindow, QPushButton,
-    QHBoxLayout, QVBoxLayout, QLineEdit, QLabel, QListWidget, QSystemTrayIcon,
+    QHBoxLayout, QVBoxLayout, QLineEdit, QLabel, QSystemTrayIcon,
     QMessageBox
 )
 # Local application modules
@@ -16,8 +16,13 @@ from ui.colors import ColorSettingsDialog
 from ui.table import Table
 from ui.tags_window import TagsWindow 
 from ui.line_edit import LineEdit
+from ui.tag_dropdown import TagDropdown
+from services.bookmark_cache import BookmarkCache
 from services.bookmark_status import BookmarkStatus, LightIcons
 from services.bookmark_watcher import BookmarkWatcher
+from services.background_loader import BackgroundLoader
+from services.bookmark_store import BookmarkStore
+from services.tag_repository import TagRepository
 from services.settings import *
 
 
@@ -38,14 +43,44 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("BookmarksTagger")
 
         self._plist_missing_warned = False
-        if not BOOKMARKS_PLIST.exists():
-            self.warn_no_bookmarks_plist()
-            self.mydict = {}
-        else:
-            self.mydict = build_table_dict()
+        # filled asynchronously by table_loader (see on_store_loaded)
+        self.store = BookmarkStore()
+        # URL of a freshly added bookmark to select once the table is reloaded
+        self.pending_new_bookmark_url: str | None = None
+        # in-memory url -> tags map; tags.json is only read once / on external changes
+        self.tag_repository = TagRepository(parent=self)
+        self.tag_repository.tags_changed.connect(self.on_tags_changed)
+        # copy of the tag map handed to the table loader's worker thread
+        self.loader_tag_map: dict[str, list[str]] = {}
+        self.table_loader = BackgroundLoader(
+            lambda: build_bookmark_store(self.loader_tag_map), self
+        )
+        self.table_loader.loaded.connect(self.on_store_loaded)
+        self.table_loader.failed.connect(
+            lambda exc: logger.warning("Loading Safari bookmarks failed: %s", exc)
+        )
+
+        # warm start: last session's bookmarks, if the plist did not change;
+        # must run before the watcher / status light read the plist
+        self.bookmark_cache = BookmarkCache(plist_path=BOOKMARKS_PLIST)
+        cached_store = self.bookmark_cache.load(
+            self.tag_repository.tag_map, self.tag_repository.saved_digest()
+        )
+        if cached_store is not None:
+            self.store = cached_store
+        # the cache is written off the GUI thread, see save_bookmark_cache
+        self.cache_save_args: tuple = ()
+        self.cache_saver = BackgroundLoader(
+            lambda: self.bookmark_cache.save(*self.cache_save_args), self
+        )
+        self.cache_saver.failed.connect(
+            lambda exc: logger.warning("Saving the bookmark cache failed: %s", exc)
+        )
 
         self.bookmark_watcher = BookmarkWatcher(str(BOOKMARKS_PLIST))
-        self.bookmark_watcher.bookmark_added.connect(self.on_new_bookmark)
+        self.bookmark_watcher.bookmarks_changed.connect(self.on_bookmarks_changed)
+        # the plist fingerprint of its baseline validates the cache
+        self.bookmark_watcher.baseline_loaded.connect(self.on_plist_baseline)
 
         self.button_update_safari_bookmarks = QPushButton()
         self.button_update_safari_bookmarks.setIcon(self.icon_reload)
@@ -98,7 +133,7 @@ class MainWindow(QMainWindow):
         # enable menubar mode on launch
         self.apply_lights_mode()
             
-        self.dropdown = QListWidget()
+        self.dropdown = TagDropdown()
         self.dropdown.hide()
 
         self.line_delete_button = QPushButton()
@@ -118,7 +153,16 @@ class MainWindow(QMainWindow):
         self.extended_search_line_name.setPlaceholderText("substring of name")
         self.extended_search_line_name.hide()
 
-        self.table = Table(self.mydict, self.extended_search_line_url, self.extended_search_line_name)
+        self.extended_search_line_folder = QLineEdit()
+        self.extended_search_line_folder.setPlaceholderText("substring of folder path, e.g. BookmarksBar/News")
+        self.extended_search_line_folder.hide()
+
+        self.table = Table(
+            self.store,
+            self.extended_search_line_url,
+            self.extended_search_line_name,
+            self.extended_search_line_folder,
+        )
         self.table.table.installEventFilter(self)
 
         self.help_message_table = QLabel("Open selected Bookmark(s) with Ctrl+X")
@@ -127,10 +171,13 @@ class MainWindow(QMainWindow):
         self.line = LineEdit(self.table, self.dropdown)
         self.line.setPlaceholderText("[s]")
         self.extended_search_line_url.textChanged.connect(
-            lambda _: self.table.filter_table(self.line.text())
+            lambda _: self.line.schedule_search()
         )
         self.extended_search_line_name.textChanged.connect(
-            lambda _: self.table.filter_table(self.line.text())
+            lambda _: self.line.schedule_search()
+        )
+        self.extended_search_line_folder.textChanged.connect(
+            lambda _: self.line.schedule_search()
         )
 
         self.info = QLabel("Hotkeys: use ctrl+[key]")
@@ -183,6 +230,7 @@ class MainWindow(QMainWindow):
         bottom_layout.addWidget(self.dropdown)
         bottom_layout.addWidget(self.extended_search_line_url)
         bottom_layout.addWidget(self.extended_search_line_name)
+        bottom_layout.addWidget(self.extended_search_line_folder)
 
         main_layout.addLayout(upper_layout)
         main_layout.addLayout(upper_layout2)
@@ -194,12 +242,18 @@ class MainWindow(QMainWindow):
         container.setLayout(main_layout)
         self.setCentralWidget(container)
 
+        # parse Bookmarks.plist off the GUI thread; the window shows up right away
+        if not BOOKMARKS_PLIST.exists():
+            self.warn_no_bookmarks_plist()
+        elif cached_store is None:
+            self.request_table_load()
+
     def on_tags_button_clicked(self):
         """
         Toggle visibility of tags_window. 
         """
         if not hasattr(self, "tags_window"):
-            self.tags_window = TagsWindow(self.table, self.height())
+            self.tags_window = TagsWindow(self.table, self.height(), self.tag_repository)
 
         if self.tags_window.isVisible():
             self.tags_window.close()
@@ -210,16 +264,15 @@ class MainWindow(QMainWindow):
             self.tags_window.activateWindow()
 
     def on_line_delete_button_clicked(self):
-        """Clear  SearchBar, URL and Name Search filters.
+        """Clear  SearchBar, URL, Name and Folder Search filters.
         Reloads the tags and fills table and dropdown menu."""
         self.line.clear()
         self.extended_search_line_name.clear()
         self.extended_search_line_url.clear()
-        # force refresh 
-        self.table.filter_table("", set())
-        self.dropdown.clear()
-        for tag in self.table.get_all_tags():
-            self.dropdown.addItem(tag)
+        self.extended_search_line_folder.clear()
+        # force refresh of table and dropdown instead of waiting for the debounce
+        self.line.schedule_search()
+        self.line.flush_search()
 
     def go_to_search_bar(self):
         """
@@ -228,8 +281,9 @@ class MainWindow(QMainWindow):
           selected bookmarks in table."""
         if self.line.hasFocus():
             table_widget = self.table.table
-            if table_widget.rowCount() and table_widget.columnCount():
-                table_widget.setCurrentCell(0, 0)
+            model = self.table.model
+            if model.rowCount() and model.columnCount():
+                table_widget.setCurrentIndex(model.index(0, 0))
             table_widget.setFocus()
             self.help_message_table.show()
         else:
@@ -237,14 +291,16 @@ class MainWindow(QMainWindow):
             self.help_message_table.hide()
 
     def on_button_details_clicked(self):
-        """Toggle visibility of extended_search_lines for name/url substrings."""
+        """Toggle visibility of extended_search_lines for name/url/folder substrings."""
         if self.extended_search_line_url.isVisible():
             self.extended_search_line_url.hide()
             self.extended_search_line_name.hide()
+            self.extended_search_line_folder.hide()
             self.extended_search_button.setText("▶Details")
         else:
             self.extended_search_line_url.show()
             self.extended_search_line_name.show()
+            self.extended_search_line_folder.show()
             self.extended_search_button.setText("▼Details")
 
     def open_selected_bookmarks(self):
@@ -253,17 +309,13 @@ class MainWindow(QMainWindow):
 
    
     def on_button_load_safari_bookmarks_updated(self):
-        """Get data from bookmarks plist and save them as dict"""
+        """Get data from bookmarks plist (in the background) and save them as dict"""
         btn = self.button_update_safari_bookmarks
         if not BOOKMARKS_PLIST.exists():
             self.warn_no_bookmarks_plist()
             return
-        self.mydict = build_table_dict()
-        # fill existing table with the new data 
-        self.table.reload(self.mydict)
-        # refresh lights so the indicator reacts to the new bookmark set
-        if self.lights_mode != "off":
-            self.bookmark_status.check_frontmost_url_changed(force=True)
+        # result arrives in on_store_loaded
+        self.request_table_load()
         # short visual feedback on reload button
         old_style = btn.styleSheet()
         btn.setIcon(self.icon_reload_green) # now-time 
@@ -271,6 +323,79 @@ class MainWindow(QMainWindow):
         QTimer.singleShot(550, lambda: btn.setIcon(self.icon_reload_green)) # now-time +t2 
         QTimer.singleShot(1050, lambda: btn.setIcon(self.icon_reload)) # now-time +t3 
 
+    def on_tags_changed(self, urls) -> None:
+        """Show edited (or externally changed) tags in the table."""
+        self.table.update_tags(urls, self.tag_repository)
+        # the dropdown offers the tags of the visible rows
+        self.line.schedule_search()
+
+    def request_table_load(self) -> None:
+        """Rebuild the store in the background from the plist and the tag map."""
+        self.loader_tag_map = self.tag_repository.snapshot()
+        self.table_loader.request()
+
+    def on_store_loaded(self, store):
+        """Fill the table with the BookmarkStore built by table_loader."""
+        if self.table.model.rowCount():
+            # only patch the rows that differ from the current table
+            self.table.apply_store(store)
+        else:
+            # fill the (empty) table with the new data
+            self.table.reload(store)
+        self.store = self.table.store
+        # the store has the tags of request time; show edits made since
+        loaded, current = self.loader_tag_map, self.tag_repository.tag_map
+        edited = {
+            url for url in loaded.keys() | current.keys()
+            if loaded.get(url) != current.get(url)
+        }
+        if edited:
+            self.table.update_tags(edited, self.tag_repository)
+        # tags of bookmarks deleted in Safari are dropped (as load_tags did)
+        self.tag_repository.prune(record.url for record in self.store)
+        # refresh lights so the indicator reacts to the new bookmark set
+        if self.lights_mode != "off":
+            self.bookmark_status.check_frontmost_url_changed(force=True)
+
+        if self.pending_new_bookmark_url:
+            url = self.pending_new_bookmark_url
+            self.pending_new_bookmark_url = None
+            self.focus_new_bookmark(url)
+        self.save_bookmark_cache()
+
+    def on_plist_baseline(self, fingerprint) -> None:
+        """The plist changed without a new mtime/size -> parse it after all."""
+        # nothing cached is shown, or the cache holds this very plist
+        if self.bookmark_cache.entry is None or self.bookmark_cache.is_current(fingerprint):
+            return
+        self.bookmark_cache.invalidate()
+        forget_bookmark_snapshots()
+        # the watcher's baseline came from the cache as well; parsing it
+        # again also gives the table loader its snapshot
+        self.bookmark_watcher.load_baseline()
+        self.request_table_load()
+
+    def save_bookmark_cache(self) -> None:
+        """Remember bookmarks and tags for a warm start of the next session."""
+        # written on a worker thread, from a copy of the tags
+        self.cache_save_args = (
+            self.tag_repository.snapshot(),
+            self.tag_repository.saved_digest(),
+            self.store.tag_dictionary,
+            # the watcher's fingerprint spares reading the plist once more
+            self.bookmark_watcher.fingerprint,
+        )
+        self.cache_saver.request()
+
+    def save_bookmark_cache_on_quit(self) -> None:
+        """Like save_bookmark_cache(), but right away, with the tags flushed on quit."""
+        self.bookmark_cache.save(
+            self.tag_repository.tag_map,
+            self.tag_repository.saved_digest(),
+            self.store.tag_dictionary,
+            self.bookmark_watcher.fingerprint,
+        )
+
     def resizeEvent(self, event):
         """Contains and calls all resize functions"""
         self.auto_resize(event)
@@ -382,36 +507,62 @@ class MainWindow(QMainWindow):
     def select_bookmark_by_url(self, url: str) -> bool:
         """Select the row that matches the given URL, if present."""
         table = self.table.table
-        model = table.model()
+        model = self.table.model
         table.clearSelection()
-        for row in range(table.rowCount()):
-            item = table.item(row, 1)  # hidden URL column
-            if item and item.text() == url:
-                table.setRowHidden(row, False)
-                idx = model.index(row, 0)
-                table.selectionModel().select(
-                    idx,
-                    QItemSelectionModel.SelectionFlag.ClearAndSelect
-                    | QItemSelectionModel.SelectionFlag.Rows,
-                )
-                table.scrollTo(idx)
-                return True
-        return False
-
-    def on_new_bookmark(self, item_dict):
-        """Focus the new bookmark added to Safari Bookmarks in the Table."""
-        url = item_dict.get("URLString")
-        if not url:
+        row = self.table.row_of_url(url)
+        if row is None:
+            return False
+        self.table.show_row(row)
+        idx = model.index(row, 0)
+        table.selectionModel().select(
+            idx,
+            QItemSelectionModel.SelectionFlag.ClearAndSelect
+            | QItemSelectionModel.SelectionFlag.Rows,
+        )
+        table.scrollTo(idx)
+        return True
+
+    def on_bookmarks_changed(self, changes):
+        """Patch the rows affected by a change of Safari's bookmarks."""
+        if self.table_loader.running:
+            # the table is (re)built right now -> let the loader pick up the
+            # new plist too, then select the new bookmark
+            if changes.added:
+                self.pending_new_bookmark_url = changes.added[0].url
+            self.request_table_load()
             return
 
-        # refresh table so the new bookmark is visible/selectable
-        self.on_button_load_safari_bookmarks_updated()
+        # tags.json is only needed for bookmarks that are new in the table
+        added_rows = self.table.apply_bookmark_changes(changes, self.tag_repository)
+        if self.lights_mode != "off":
+            self.bookmark_status.check_frontmost_url_changed(force=True)
+
+        if added_rows:
+            self.focus_rows(added_rows)
 
-        # select the new bookmark row (if present) and open the tag window
+    def focus_new_bookmark(self, url: str) -> None:
+        """Select the new bookmark row (if present) and open the tag window."""
         self.select_bookmark_by_url(url)
+        self.open_tags_window_for_input()
 
+    def focus_rows(self, rows: list[int]) -> None:
+        """Select the given (new) rows and open the tag window to tag them."""
+        table = self.table.table
+        selection_model = table.selectionModel()
+        table.clearSelection()
+        for row in rows:
+            self.table.show_row(row)
+            selection_model.select(
+                self.table.model.index(row, 0),
+                QItemSelectionModel.SelectionFlag.Select
+                | QItemSelectionModel.SelectionFlag.Rows,
+            )
+        table.scrollTo(self.table.model.index(rows[0], 0))
+        self.open_tags_window_for_input()
+
+    def open_tags_window_for_input(self) -> None:
         if not hasattr(self, "tags_window"):
-            self.tags_window = TagsWindow(self.table, self.height())
+            self.tags_window = TagsWindow(self.table, self.height(), self.tag_repository)
 
         self.tags_window.populate_tag_checkboxes()
         self.tags_window.show()
@@ -432,6 +583,12 @@ class MainWindow(QMainWindow):
 def main():
     app = QApplication(sys.argv)
     window = MainWindow()
+    # stop polling and the osascript helper process on exit
+    app.aboutToQuit.connect(window.bookmark_status.stop)
+    # write tag edits still waiting for the write-behind timer
+    app.aboutToQuit.connect(window.tag_repository.flush)
+    # after the flush, so the cache can reuse the tag IDs next time
+    app.aboutToQuit.connect(window.save_bookmark_cache_on_quit)
     window.show()
     app.exec()
 
@@ -0,0 +1,177 @@
+import textwrap
+from typing import Sequence
+
+from PySide6.QtCore import Qt, QObject, QProcess, QTimer, Signal
+
+
+# Long-running JXA helper: compiled once, then answers one line per request
+# read from stdin with the URL of Safari's frontmost tab, "NO_WINDOW" or "ERROR".
+FRONTMOST_URL_SCRIPT = textwrap.dedent("""
+    ObjC.import("Foundation");
+    function run() {
+        const stdin = $.NSFileHandle.fileHandleWithStandardInput;
+        const stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+        const safari = Application("Safari");
+        let buffer = "";
+        while (true) {
+            const data = stdin.availableData;
+            // EOF: the app went away -> quit
+            if (data.length === 0) {
+                break;
+            }
+            buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+            let newline;
+            while ((newline = buffer.indexOf("\\n")) >= 0) {
+                buffer = buffer.slice(newline + 1);
+                let answer;
+                try {
+                    answer = safari.windows.length === 0
+                        ? "NO_WINDOW"
+                        : (safari.windows[0].currentTab.url() || "");
+                } catch (e) {
+                    answer = "ERROR";
+                }
+                stdout.writeData($(answer + "\\n").dataUsingEncoding($.NSUTF8StringEncoding));
+            }
+        }
+    }
+""")
+
+DEFAULT_COMMAND = ["/usr/bin/osascript", "-l", "JavaScript", "-e", FRONTMOST_URL_SCRIPT]
+
+
+class AppleScriptSession(QObject):
+    """
+    Persistent helper process answering "current URL?" requests.
+
+    Line protocol: every line written to the helper's stdin is answered by
+    exactly one line on its stdout. Starting osascript and compiling the
+    script happens once instead of on every poll.
+
+    Requests are asynchronous (QProcess): request() returns immediately and
+    the answer arrives via `answered` -- the frontmost URL, "NO_WINDOW"/""
+    if there is none, or None if the helper failed. If the helper dies,
+    hangs or cannot be started, it is restarted once for the running
+    request before the request is reported as failed.
+
+    `command` is pluggable so tests can use a local stand-in script.
+    """
+    answered = Signal(object)
+
+    def __init__(
+        self,
+        command: Sequence[str] | None = None,
+        timeout_ms: int = 2000,
+        parent=None,
+    ) -> None:
+        super().__init__(parent)
+        self.command = list(command or DEFAULT_COMMAND)
+        self.process: QProcess | None = None
+        self.buffer = b""
+        self.busy = False
+        self.retried = False
+        self.starts = 0
+
+        # a request without answer within timeout_ms counts as failure
+        self.timeout = QTimer(self)
+        self.timeout.setSingleShot(True)
+        self.timeout.setInterval(timeout_ms)
+        self.timeout.timeout.connect(self.on_failure)
+
+    def is_running(self) -> bool:
+        return (
+            self.process is not None
+            and self.process.state() != QProcess.ProcessState.NotRunning
+        )
+
+    def start(self) -> None:
+        self.close()
+        process = QProcess(self)
+        process.readyReadStandardOutput.connect(self.on_ready_read)
+        # queued: failures are handled from the event loop, never from inside
+        # start()/write(); answers of replaced processes are ignored
+        for signal in (process.errorOccurred, process.finished):
+            signal.connect(
+                lambda *_args, proc=process: self.on_process_failed(proc),
+                Qt.ConnectionType.QueuedConnection,
+            )
+        self.process = process
+        self.buffer = b""
+        self.starts += 1
+        # stdin writes issued before the process is up are buffered by QProcess
+        process.start(self.command[0], self.command[1:])
+
+    def close(self, graceful: bool = False) -> None:
+        process, self.process = self.process, None
+        if process is None:
+            return
+        for signal in (process.readyReadStandardOutput, process.errorOccurred, process.finished):
+            signal.disconnect()
+        if process.state() != QProcess.ProcessState.NotRunning:
+            if graceful:
+                # closing stdin makes the helper leave its read loop
+                process.closeWriteChannel()
+                if not process.waitForFinished(500):
+                    process.kill()
+            else:
+                # never wait on the GUI thread for a broken helper
+                process.kill()
+        process.deleteLater()
+
+    def shutdown(self) -> None:
+        """Stop the helper and forget an unanswered request."""
+        self.timeout.stop()
+        self.busy = False
+        self.close(graceful=True)
+
+    def request(self) -> bool:
+        """
+        Ask the helper for the current URL. Returns False (and does nothing)
+        while the previous request is still unanswered.
+        """
+        if self.busy:
+            return False
+        self.busy = True
+        self.retried = False
+        self._send()
+        return True
+
+    def _send(self) -> None:
+        if not self.is_running():
+            self.start()
+        assert self.process is not None
+        self.process.write(b"url\n")
+        self.timeout.start()
+
+    def on_ready_read(self) -> None:
+        if self.process is None:
+            return
+        self.buffer += self.process.readAllStandardOutput().data()
+        while b"\n" in self.buffer:
+            line, self.buffer = self.buffer.split(b"\n", 1)
+            if not self.busy:
+                # late answer of a request that already timed out
+                continue
+            answer = line.decode("utf-8", errors="replace").rstrip("\r")
+            self._finish(None if answer == "ERROR" else answer)
+
+    def on_process_failed(self, process: QProcess) -> None:
+        if process is self.process:
+            self.on_failure()
+
+    def on_failure(self) -> None:
+        """Helper crashed, exited, failed to start or timed out."""
+        self.close()
+        if not self.busy:
+            # helper went away between requests -> restarted on the next one
+            return
+        if not self.retried:
+            self.retried = True
+            self._send()
+            return
+        self._finish(None)
+
+    def _finish(self, answer: str | None) -> None:
+        self.timeout.stop()
+        self.busy = False
+        self.answered.emit(answer)
@@ -0,0 +1,62 @@
+from functools import partial
+from typing import Any, Callable
+
+from PySide6.QtCore import QObject, QThreadPool, Signal
+
+
+class BackgroundLoader(QObject):
+    """
+    Run a blocking job (e.g. parsing Bookmarks.plist) on a worker thread.
+
+    request() may be called any number of times: while a job is running,
+    further requests are coalesced into a single re-run, and a result that
+    was overtaken by a newer request is dropped instead of being emitted.
+    `loaded`/`failed` are always emitted on the thread owning the loader
+    (normally the GUI thread).
+    """
+    loaded = Signal(object)
+    failed = Signal(object)
+    # worker thread -> owner thread: (generation, result, error)
+    _done = Signal(int, object, object)
+
+    def __init__(self, job: Callable[[], Any], parent=None, pool: QThreadPool | None = None) -> None:
+        super().__init__(parent)
+        self.job = job
+        self.pool = pool or QThreadPool.globalInstance()
+        self.generation = 0
+        self.running = False
+        self.pending = False
+        self._done.connect(self._on_done)
+
+    def request(self) -> None:
+        """Schedule a (re)load; coalesces with a job that is still running."""
+        self.generation += 1
+        if self.running:
+            self.pending = True
+            return
+        self._start()
+
+    def _start(self) -> None:
+        self.running = True
+        self.pending = False
+        self.pool.start(partial(self._run, self.generation))
+
+    def _run(self, generation: int) -> None:
+        """Executed on the worker thread."""
+        try:
+            result = self.job()
+        except Exception as exc:
+            self._done.emit(generation, None, exc)
+            return
+        self._done.emit(generation, result, None)
+
+    def _on_done(self, generation: int, result: Any, error: Any) -> None:
+        self.running = False
+        # a newer file change arrived meanwhile -> this result is stale
+        if self.pending or generation != self.generation:
+            self._start()
+            return
+        if error is not None:
+            self.failed.emit(error)
+        else:
+            self.loaded.emit(result)
@@ -0,0 +1,181 @@
+import pickle
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping, Sequence
+
+import helper_functions
+from services.bookmark_snapshot import ContentFingerprint, content_fingerprint, file_signature
+from services.bookmark_status import STATUS_INDEX, BookmarkIndex
+from services.bookmark_store import BookmarkStore
+from services.tag_dictionary import TAGS, TagDictionary
+
+
+# bump whenever the layout of CacheEntry changes
+CACHE_VERSION = 1
+
+
+def cache_path(tags_path: str | Path) -> Path:
+    """The cache file next to tags.json."""
+    return Path(tags_path).with_name("bookmarks.cache")
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    version: int
+    # (mtime_ns, size, digest) of the plist the bookmarks were parsed from
+    plist: ContentFingerprint
+    # digest of the tags.json the tag IDs belong to
+    tags: bytes | None
+    # (name, url, uuid, folder) of every bookmark, in plist order
+    bookmarks: list[tuple[str, str, str, str]]
+    # tag IDs are process-local -> stored as indices into tag_names
+    tag_names: list[str]
+    tag_ids: list[tuple[int, ...]]
+    status_index: BookmarkIndex
+
+
+class BookmarkCache:
+    """
+    Parsed bookmarks, their tag IDs and the status-lookup index of the last
+    session, pickled next to tags.json.
+
+    A warm start (plist mtime and size unchanged) builds the table store
+    from the cache and seeds the shared bookmark snapshot, so neither the
+    table, the watcher nor the status light parse the plist. is_current()
+    then checks the plist's content fingerprint, which the watcher takes
+    for its baseline on a worker thread anyway.
+
+    save() is meant to run on a worker thread as well.
+    """
+
+    def __init__(self, path: str | Path | None = None, plist_path: str | Path | None = None) -> None:
+        self.path = Path(path) if path is not None else cache_path(helper_functions.TAGS_JSON)
+        self.plist_path = Path(plist_path) if plist_path is not None else helper_functions.BOOKMARKS_PLIST
+        # entry matching the shared snapshot, i.e. last loaded or saved
+        self.entry: CacheEntry | None = None
+        # a save on a worker thread may still run when the app quits
+        self.lock = threading.Lock()
+
+    def load(
+        self,
+        tag_map: Mapping[str, Sequence[str]],
+        tags_digest: bytes | None,
+        tag_dictionary: TagDictionary = TAGS,
+    ) -> BookmarkStore | None:
+        """
+        Return the store of the cached bookmarks, None if there is no cache
+        for the plist as it is on disk now.
+
+        The cached tag IDs are used if tags_digest (the digest of a tags.json
+        holding exactly tag_map) matches; otherwise the tags come from tag_map.
+        """
+        try:
+            with self.path.open("rb") as file:
+                entry = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            helper_functions.logger.warning("Ignoring unreadable bookmark cache: %s", exc)
+            return None
+        if not isinstance(entry, CacheEntry) or entry.version != CACHE_VERSION:
+            return None
+        signature = file_signature(self.plist_path)
+        if signature is None or signature[1:3] != entry.plist[:2]:
+            return None
+
+        bookmarks = [
+            helper_functions.SafariBookmarks(name=name, url=url, uuid=uuid, folder=folder)
+            for name, url, uuid, folder in entry.bookmarks
+        ]
+        helper_functions.seed_bookmark_snapshot(
+            self.plist_path, bookmarks, {STATUS_INDEX: entry.status_index}
+        )
+        if tags_digest is not None and tags_digest == entry.tags:
+            id_map = [tag_dictionary.id_of(name) for name in entry.tag_names]
+            tag_ids = (tuple(id_map[i] for i in ids) for ids in entry.tag_ids)
+        else:
+            tag_ids = (tag_dictionary.ids_of(tag_map.get(bm.url, ())) for bm in bookmarks)
+        self.entry = entry
+        return BookmarkStore.from_tag_ids(bookmarks, tag_ids, tag_dictionary)
+
+    def is_current(self, fingerprint: ContentFingerprint | None) -> bool:
+        """True if fingerprint (see content_fingerprint()) is the one of the cached plist."""
+        if self.entry is None:
+            return False
+        return fingerprint is not None and fingerprint[2] == self.entry.plist[2]
+
+    def invalidate(self) -> None:
+        self.entry = None
+
+    def save(
+        self,
+        tag_map: Mapping[str, Sequence[str]],
+        tags_digest: bytes | None,
+        tag_dictionary: TagDictionary = TAGS,
+        plist_fingerprint: ContentFingerprint | None = None,
+    ) -> bool:
+        """
+        Write the shared snapshot of the plist with the tags of tag_map.
+
+        Nothing is written if the plist was not parsed (or changed) since,
+        or if plist and tags.json are what the cache holds already.
+        plist_fingerprint, a fingerprint already taken of the plist (e.g. by
+        the watcher), spares reading it again while mtime and size match.
+        Returns True if the cache file was written.
+        """
+        with self.lock:
+            return self._save(tag_map, tags_digest, tag_dictionary, plist_fingerprint)
+
+    def _save(
+        self,
+        tag_map: Mapping[str, Sequence[str]],
+        tags_digest: bytes | None,
+        tag_dictionary: TagDictionary,
+        plist_fingerprint: ContentFingerprint | None,
+    ) -> bool:
+        snapshot = helper_functions.peek_bookmark_snapshot(self.plist_path)
+        if snapshot is None or snapshot.signature is None:
+            return False
+        previous = plist_fingerprint
+        if previous is None and self.entry is not None:
+            previous = self.entry.plist
+        plist = content_fingerprint(self.plist_path, previous)
+        # the plist was replaced after the snapshot was taken
+        if plist is None or plist[:2] != snapshot.signature[1:3]:
+            return False
+        if (
+            self.entry is not None
+            and self.entry.plist == plist
+            and tags_digest is not None
+            and self.entry.tags == tags_digest
+        ):
+            return False
+
+        # TagDictionary ID -> index into tag_names
+        local: dict[int, int] = {}
+        tag_ids = [
+            tuple(
+                local.setdefault(tag_id, len(local))
+                for tag_id in tag_dictionary.ids_of(tag_map.get(bm.url, ()))
+            )
+            for bm in snapshot.bookmarks
+        ]
+        entry = CacheEntry(
+            version=CACHE_VERSION,
+            plist=plist,
+            tags=tags_digest,
+            bookmarks=[(bm.name, bm.url, bm.uuid, bm.folder) for bm in snapshot.bookmarks],
+            tag_names=tag_dictionary.names_of(local),
+            tag_ids=tag_ids,
+            status_index=snapshot.derive(STATUS_INDEX, BookmarkIndex.from_snapshot),
+        )
+        try:
+            helper_functions.write_bytes_atomic(
+                self.path, pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+        except OSError as exc:
+            helper_functions.logger.warning("Writing the bookmark cache failed: %s", exc)
+            return False
+        self.entry = entry
+        return True
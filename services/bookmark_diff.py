@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from typing import Iterable, Protocol
+
+
+class BookmarkRecord(Protocol):
+    name: str
+    url: str
+    uuid: str
+    folder: str
+
+
+# (old, new) version of the same bookmark
+BookmarkPair = tuple[BookmarkRecord, BookmarkRecord]
+
+
+@dataclass(frozen=True)
+class BookmarkChangeSet:
+    """
+    Difference between two versions of Bookmarks.plist.
+
+    A bookmark that was renamed and moved at the same time shows up in
+    both `retitled` and `moved`.
+    """
+    added: tuple[BookmarkRecord, ...] = ()
+    removed: tuple[BookmarkRecord, ...] = ()
+    retitled: tuple[BookmarkPair, ...] = ()
+    url_changed: tuple[BookmarkPair, ...] = ()
+    moved: tuple[BookmarkPair, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.added or self.removed or self.retitled or self.url_changed or self.moved
+        )
+
+
+def keyed(bookmarks: Iterable[BookmarkRecord]) -> dict[str, BookmarkRecord]:
+    """
+    Map every bookmark to a stable key: its WebBookmarkUUID, or its URL for
+    (old) plists without UUIDs. Repeated keys get a running suffix.
+    """
+    by_key: dict[str, BookmarkRecord] = {}
+    for bookmark in bookmarks:
+        base = bookmark.uuid or f"url:{bookmark.url}"
+        key, count = base, 1
+        while key in by_key:
+            count += 1
+            key = f"{base}#{count}"
+        by_key[key] = bookmark
+    return by_key
+
+
+def diff_bookmarks(
+    old: Iterable[BookmarkRecord],
+    new: Iterable[BookmarkRecord],
+) -> BookmarkChangeSet:
+    """Compute all changes from `old` to `new` in one pass over both lists."""
+    remaining = keyed(old)
+    added: list[BookmarkRecord] = []
+    retitled: list[BookmarkPair] = []
+    url_changed: list[BookmarkPair] = []
+    moved: list[BookmarkPair] = []
+
+    for key, bookmark in keyed(new).items():
+        before = remaining.pop(key, None)
+        if before is None:
+            added.append(bookmark)
+            continue
+        if before == bookmark:
+            continue
+        if before.name != bookmark.name:
+            retitled.append((before, bookmark))
+        if before.url != bookmark.url:
+            url_changed.append((before, bookmark))
+        if before.folder != bookmark.folder:
+            moved.append((before, bookmark))
+
+    return BookmarkChangeSet(
+        added=tuple(added),
+        removed=tuple(remaining.values()),
+        retitled=tuple(retitled),
+        url_changed=tuple(url_changed),
+        moved=tuple(moved),
+    )
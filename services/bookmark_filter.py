@@ -0,0 +1,317 @@
+from dataclasses import dataclass
+from typing import Callable, Iterable, Protocol, Sequence
+from urllib.parse import unquote, quote
+from unicodedata import normalize as uni_normalize
+
+from services.tag_dictionary import TAGS, TagDictionary
+from services.trigram_index import TrigramIndex
+
+
+class BookmarkLike(Protocol):
+    # read-only, so records with e.g. tuple tags satisfy the protocol
+    @property
+    def name(self) -> str: ...
+    @property
+    def url(self) -> str: ...
+    @property
+    def tags(self) -> Sequence[int]: ...  # TagDictionary IDs
+    @property
+    def folder(self) -> str: ...  # e.g. "BookmarksBar/News"
+
+
+def split_tags(tags: str) -> frozenset[str]:
+    """Lowercase a comma-separated tag string into a set of tags."""
+    return frozenset(
+        tag.strip()
+        for tag in tags.lower().split(",")
+        if tag.strip()
+    )
+
+
+def url_variants(url_substring: str) -> tuple[str, str, str]:
+    """
+    Return (raw, decoded, encoded) forms of a lowercased URL substring.
+
+    e.g. "%C3%B6" and "ö" (in NFC form) both find the same bookmarks.
+    """
+    # normalize the String: e.g. "%C3%B6" becomes German "ö"
+    decoded = uni_normalize("NFC", unquote(url_substring))
+    encoded = quote(decoded, safe=":/?#[]@!$&'()*+,;=%")
+    return url_substring, decoded, encoded
+
+
+# ID no bookmark carries; stands in for unknown tags in a query
+UNKNOWN_TAG = -1
+
+# fewer candidate rows than this are scanned without the trigram index
+INDEX_MIN_ROWS = 256
+
+
+@dataclass(frozen=True)
+class FilterQuery:
+    tags: frozenset[int]
+    url: tuple[str, str, str] | None  # url_variants() of the URL substring
+    name: str
+    folder: str = ""
+
+    def narrows(self, previous: "FilterQuery") -> bool:
+        """
+        True if every row matching self also matched `previous`, i.e. the
+        previous result can be used as candidate set.
+        """
+        if not self.tags >= previous.tags:
+            return False
+        if previous.name not in self.name or previous.folder not in self.folder:
+            return False
+        if previous.url is None:
+            return True
+        if self.url is None:
+            return False
+        # each query variant is compared separately against the URL texts,
+        # so every variant must have grown from its old counterpart
+        return all(old in new for old, new in zip(previous.url, self.url))
+
+
+class BookmarkFilter:
+    """
+    Filter engine for the bookmark table working on row ids.
+
+    All per-bookmark normalization (lowercasing, URL decoding) happens once
+    in rebuild()/update_row(); a query then only intersects sets of row ids
+    from the inverted index of tag IDs and runs substring checks on the
+    precomputed strings.
+
+    The last query and its result are remembered: a query that can only
+    shrink the result (more tags, longer substrings) is evaluated on the
+    previous matches instead of on all rows.
+
+    Name and URL substrings are looked up in trigram indexes first, so
+    only the rows containing every trigram of the query are verified.
+    The indexes are built off the GUI thread (search_index_job()) and
+    then kept up to date row by row; until they are installed, queries
+    scan the rows.
+    """
+
+    def __init__(
+        self,
+        rows: Sequence[BookmarkLike] = (),
+        tag_dictionary: TagDictionary = TAGS,
+    ) -> None:
+        self.tag_dictionary = tag_dictionary
+        # bumped on every row change, see install_search_index()
+        self.version = 0
+        self.rebuild(rows)
+
+    def rebuild(self, rows: Sequence[BookmarkLike]) -> None:
+        self.version += 1
+        self.last_query: FilterQuery | None = None
+        self.last_result: set[int] = set()
+        self.names: list[str] = []
+        self.urls: list[str] = []
+        self.urls_dec: list[str] = []
+        self.folders: list[str] = []
+        self.row_tags: list[frozenset[int]] = []
+        # tag ID -> ids of all rows carrying the tag
+        self.tag_index: dict[int, set[int]] = {}
+        # trigrams of names / of both URL forms, None until installed
+        self.name_grams: TrigramIndex | None = None
+        self.url_grams: TrigramIndex | None = None
+        for bookmark in rows:
+            self.append_row(bookmark)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def update_row(self, row: int, bookmark: BookmarkLike) -> None:
+        """(Re)compute the normalized fields of one row."""
+        # the row may now (not) match the last query
+        self.last_query = None
+        self.version += 1
+        for tag in self.row_tags[row]:
+            ids = self.tag_index[tag]
+            ids.discard(row)
+            if not ids:
+                del self.tag_index[tag]
+
+        if self.name_grams is not None:
+            self.name_grams.discard(row, (self.names[row],))
+        if self.url_grams is not None:
+            self.url_grams.discard(row, (self.urls[row], self.urls_dec[row]))
+
+        url = bookmark.url.lower()
+        self.names[row] = bookmark.name.lower()
+        self.urls[row] = url
+        self.urls_dec[row] = uni_normalize("NFC", unquote(url))
+        if self.name_grams is not None:
+            self.name_grams.add(row, (self.names[row],))
+        if self.url_grams is not None:
+            self.url_grams.add(row, (self.urls[row], self.urls_dec[row]))
+        self.folders[row] = bookmark.folder.lower()
+        tags = frozenset(bookmark.tags)
+        self.row_tags[row] = tags
+        for tag in tags:
+            self.tag_index.setdefault(tag, set()).add(row)
+
+    def append_row(self, bookmark: BookmarkLike) -> None:
+        """Index a row added at the end of the table."""
+        self.names.append("")
+        self.urls.append("")
+        self.urls_dec.append("")
+        self.folders.append("")
+        self.row_tags.append(frozenset())
+        self.update_row(len(self.names) - 1, bookmark)
+
+    def remove_rows(self, rows: set[int]) -> None:
+        """
+        Drop the given rows; the ids of the following rows move up like the
+        rows of the table model do. Nothing is re-normalized.
+        """
+        if not rows:
+            return
+        self.last_query = None
+        self.version += 1
+        keep = [row for row in range(len(self.names)) if row not in rows]
+        # old id -> new id of every remaining row
+        new_ids = {old: new for new, old in enumerate(keep)}
+        self.names = [self.names[row] for row in keep]
+        self.urls = [self.urls[row] for row in keep]
+        self.urls_dec = [self.urls_dec[row] for row in keep]
+        self.folders = [self.folders[row] for row in keep]
+        self.row_tags = [self.row_tags[row] for row in keep]
+        tag_index: dict[int, set[int]] = {}
+        for tag, ids in self.tag_index.items():
+            remaining = {new_ids[row] for row in ids if row in new_ids}
+            if remaining:
+                tag_index[tag] = remaining
+        self.tag_index = tag_index
+        for grams in (self.name_grams, self.url_grams):
+            if grams is not None:
+                grams.remap(new_ids)
+
+    def search_index_job(self) -> Callable[[], tuple[int, TrigramIndex, TrigramIndex]]:
+        """
+        Return a job building the name and URL trigram indexes from a copy
+        of the current rows. The job touches no filter state, so it can run
+        on a worker thread; hand its result to install_search_index().
+        """
+        version = self.version
+        names = [(name,) for name in self.names]
+        # one index over raw and decoded URLs: candidates for either form
+        urls = [(url,) if url == dec else (url, dec) for url, dec in zip(self.urls, self.urls_dec)]
+        return lambda: (version, TrigramIndex.build(names), TrigramIndex.build(urls))
+
+    def install_search_index(self, built: tuple[int, TrigramIndex, TrigramIndex]) -> bool:
+        """
+        Use the indexes of a search_index_job(); False (and nothing
+        installed) if rows changed since the job was created.
+        """
+        version, name_grams, url_grams = built
+        if version != self.version:
+            return False
+        self.name_grams, self.url_grams = name_grams, url_grams
+        return True
+
+    def prefilter(self, candidates, index: TrigramIndex | None, substrings: Iterable[str]):
+        """
+        Narrow candidates to rows whose indexed texts may contain one of
+        the substrings. Small candidate sets, queries shorter than a
+        trigram and missing indexes return candidates as they are (the
+        caller verifies anyway).
+        """
+        if index is None or len(candidates) < INDEX_MIN_ROWS:
+            return candidates
+        found: set[int] = set()
+        for substring in substrings:
+            rows = index.candidates(substring)
+            if rows is None:
+                return candidates
+            found |= rows
+        if isinstance(candidates, range):
+            return found
+        return found.intersection(candidates)
+
+    def match(
+        self,
+        filter_tags: Iterable[str] = (),
+        url_substring: str = "",
+        name_substring: str = "",
+        folder_substring: str = "",
+    ) -> set[int]:
+        """
+        Return the ids of all rows matching every filter tag (AND), the URL
+        substring, the name substring and the folder path substring. Empty
+        filters match everything.
+        Tags are compared case-insensitively via their TagDictionary IDs.
+        """
+        lookup = self.tag_dictionary.lookup
+        query = FilterQuery(
+            tags=frozenset(
+                UNKNOWN_TAG if (tag_id := lookup(tag)) is None else tag_id
+                for tag in filter_tags
+            ),
+            url=url_variants(url_substring) if url_substring else None,
+            name=name_substring,
+            folder=folder_substring,
+        )
+        previous = self.last_query
+        # rows passing the tag filter, None for all rows
+        tagged: set[int] | None = None
+        new_tags = query.tags
+        if previous is not None and query.narrows(previous):
+            # adding a tag / typing on can only shrink the previous result
+            tagged = self.last_result
+            new_tags = query.tags - previous.tags
+            check_url = query.url != previous.url
+            check_name = query.name != previous.name
+            check_folder = query.folder != previous.folder
+        else:
+            check_url = check_name = check_folder = True
+
+        # start with the rarest tag so the intersections stay small
+        for tag in sorted(new_tags, key=lambda t: len(self.tag_index.get(t, ()))):
+            ids = self.tag_index.get(tag)
+            if not ids:
+                tagged = set()
+                break
+            tagged = set(ids) if tagged is None else tagged & ids
+        candidates: set[int] | range | list[int] = (
+            range(len(self.names)) if tagged is None else tagged
+        )
+
+        if query.url is not None and check_url:
+            raw, dec, enc = query.url
+            candidates = self.prefilter(candidates, self.url_grams, set(query.url))
+            urls, urls_dec = self.urls, self.urls_dec
+            candidates = [
+                row for row in candidates
+                # url match if any url_text variant in any url_substring variant
+                if raw in urls[row]
+                or dec in urls[row]
+                or raw in urls_dec[row]
+                or dec in urls_dec[row]
+                or enc in urls[row]
+            ]
+
+        if query.name and check_name:
+            candidates = self.prefilter(candidates, self.name_grams, (query.name,))
+            names = self.names
+            candidates = [row for row in candidates if query.name in names[row]]
+
+        if query.folder and check_folder:
+            folders = self.folders
+            candidates = [row for row in candidates if query.folder in folders[row]]
+
+        result = set(candidates)
+        self.last_query = query
+        self.last_result = result
+        # callers may modify their result (e.g. Table.show_row) -> keep ours apart
+        return set(result)
+
+    def tags_of(self, rows: set[int]) -> set[int]:
+        """Return the union of the tag IDs of the given rows."""
+        if len(rows) < len(self.tag_index):
+            visible: set[int] = set()
+            for row in rows:
+                visible.update(self.row_tags[row])
+            return visible
+        return {tag for tag, ids in self.tag_index.items() if not ids.isdisjoint(rows)}
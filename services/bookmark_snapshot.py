@@ -0,0 +1,139 @@
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+
+# (path, mtime_ns, size, inode) of a plist file, None if it does not exist
+FileSignature = tuple[str, int, int, int]
+
+
+def file_signature(path: str | Path) -> FileSignature | None:
+    """Return the identity of a file on disk or None if it cannot be stat()ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (str(path), st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+# (mtime_ns, size, blake2b digest) of a file's content
+ContentFingerprint = tuple[int, int, bytes]
+
+
+def content_fingerprint(
+    path: str | Path,
+    previous: ContentFingerprint | None = None,
+) -> ContentFingerprint | None:
+    """
+    Return (mtime_ns, size, digest) of a file, None if it cannot be read.
+
+    If mtime and size equal `previous`, the file is not read again and
+    `previous` is returned as is.
+    """
+    try:
+        st = os.stat(path)
+        if previous is not None and previous[:2] == (st.st_mtime_ns, st.st_size):
+            return previous
+        with open(path, "rb") as f:
+            digest = hashlib.blake2b(f.read()).digest()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, digest)
+
+
+@dataclass(frozen=True)
+class BookmarkSnapshot:
+    """
+    Immutable result of parsing one version of Bookmarks.plist.
+
+    Consumers must not mutate `bookmarks`; data derived from it (lookup
+    indexes, table dicts, ...) can be cached on the snapshot with derive()
+    so it is computed once per plist version as well.
+    """
+    signature: FileSignature | None
+    bookmarks: tuple[Any, ...]
+    _derived: dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    def peek_derived(self, key: str) -> Any | None:
+        """Return already derived data for key, None if not computed yet."""
+        return self._derived.get(key)
+
+    def derive(self, key: str, factory: Callable[["BookmarkSnapshot"], Any]) -> Any:
+        """Return factory(self), computing it only on the first call per key."""
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = factory(self)
+            self._derived[key] = value
+            return value
+
+
+class SnapshotCache:
+    """
+    Process-wide cache of parsed plists keyed by file signature.
+
+    `parse` is only called when the file's (mtime_ns, size, inode) changed
+    since the last call for the same path; every other caller gets the very
+    same BookmarkSnapshot instance.
+    """
+
+    def __init__(self, parse: Callable[[Path], Sequence[Any]]) -> None:
+        self.parse = parse
+        self.snapshots: dict[str, BookmarkSnapshot] = {}
+        self.parse_count = 0
+        # loaders may run on worker threads
+        self.lock = threading.Lock()
+
+    def get(self, path: str | Path) -> BookmarkSnapshot:
+        path = Path(path)
+        key = str(path)
+        with self.lock:
+            signature = file_signature(path)
+            snapshot = self.snapshots.get(key)
+            if snapshot is not None and snapshot.signature == signature:
+                return snapshot
+
+            bookmarks = tuple(self.parse(path)) if signature is not None else ()
+            self.parse_count += 1
+            snapshot = BookmarkSnapshot(signature=signature, bookmarks=bookmarks)
+            self.snapshots[key] = snapshot
+            return snapshot
+
+    def seed(
+        self,
+        path: str | Path,
+        bookmarks: Sequence[Any],
+        derived: dict[str, Any] | None = None,
+    ) -> BookmarkSnapshot:
+        """
+        Install bookmarks known to belong to the current file (e.g. from an
+        on-disk cache) as its snapshot, without parsing.
+        """
+        path = Path(path)
+        with self.lock:
+            snapshot = BookmarkSnapshot(
+                signature=file_signature(path),
+                bookmarks=tuple(bookmarks),
+                _derived=dict(derived or {}),
+            )
+            self.snapshots[str(path)] = snapshot
+            return snapshot
+
+    def peek(self, path: str | Path) -> BookmarkSnapshot | None:
+        """
+        Return the cached snapshot if it is still current, never parse.
+
+        Does not take the lock, so the GUI thread never waits for a parse
+        running on a worker thread.
+        """
+        snapshot = self.snapshots.get(str(path))
+        if snapshot is not None and snapshot.signature == file_signature(path):
+            return snapshot
+        return None
+
+    def clear(self) -> None:
+        with self.lock:
+            self.snapshots.clear()
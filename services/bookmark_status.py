@@ -1,15 +1,19 @@
 import os
-import subprocess
-import textwrap
-import plistlib
 from ipaddress import ip_address
 from pathlib import Path
+from typing import Iterable, Sequence
 from urllib.parse import urlparse, unquote, quote
 from unicodedata import normalize as uni_normalize
 
 from PySide6.QtGui import QIcon
 from PySide6.QtCore import QObject, QTimer, Signal
 
+from services.applescript_session import AppleScriptSession
+from services.background_loader import BackgroundLoader
+from services.bookmark_snapshot import BookmarkSnapshot
+from services.settings import BOOKMARKS_PLIST
+import helper_functions
+
 
 ICON_DIR = Path(__file__).resolve().parent.parent / "icons"
 IGNORED_DOMAIN_PARTS = {"co", "com", "org", "net", "gov", "ac"}
@@ -49,6 +53,73 @@ def base_domain(host: str) -> str:
     return filtered[0]
 
 
+def host_only(u: str) -> str:
+    """Return the lowercased host of a URL without credentials, port and "www."."""
+    parsed = urlparse(u if "://" in u else "https://" + u)
+    host = parsed.netloc.lower()
+    if "@" in host:
+        host = host.split("@", 1)[-1]
+    if ":" in host:
+        host = host.split(":", 1)[0]
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+def normalize_parts(u: str) -> tuple[str, str, str, str]:
+    """Return (host, base, path, query) with decoding and NFC."""
+    parsed = urlparse(u if "://" in u else "https://" + u)
+    host = host_only(u)
+    base = base_domain(host)
+    path = uni_normalize("NFC", unquote(parsed.path)).rstrip("/")
+    query = uni_normalize("NFC", unquote(parsed.query))
+    return host, base, path, query
+
+
+# key of the BookmarkIndex derived from (and cached on) a bookmark snapshot
+STATUS_INDEX = "status_index"
+
+
+class BookmarkIndex:
+    """
+    Lookup structure answering "is this URL bookmarked?" in constant time.
+
+    Built once per bookmark snapshot (i.e. per plist version), so the 2 s
+    status poll usually costs one stat() call and a few set probes.
+    """
+
+    def __init__(self, urls: Iterable[str] = ()) -> None:
+        # (host, path, query) of every bookmarked URL
+        self.full_keys: set[tuple[str, str, str]] = set()
+        self.hosts: set[str] = set()
+        self.bases: set[str] = set()
+        for url in urls:
+            self.add_url(url)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: BookmarkSnapshot) -> "BookmarkIndex":
+        return cls(bm.url for bm in snapshot.bookmarks)
+
+    def add_url(self, url: str) -> None:
+        """Register a single bookmark URL in all lookup sets."""
+        host, base, path, query = normalize_parts(url)
+        if host:
+            self.hosts.add(host)
+            self.full_keys.add((host, path, query))
+        if base:
+            self.bases.add(base)
+
+    def lookup(self, url: str) -> str:
+        """Return "full" | "domain" | "none" for the given URL."""
+        host, base, path, query = normalize_parts(url)
+        # full-match detection: same host and same path+query
+        if host and (host, path, query) in self.full_keys:
+            return "full"
+        if (host and host in self.hosts) or (base and base in self.bases):
+            return "domain"
+        return "none"
+
+
 class LightIcons:
     def __init__(self) -> None:
         # lights
@@ -60,19 +131,43 @@ class LightIcons:
 
 
 class BookmarkStatus(QObject):
-    """Periodically check if Safari's frontmost URL has changed"""
+    """
+    Periodically check if Safari's frontmost URL has changed.
+
+    Nothing here blocks the GUI thread: the URL comes from the asynchronous
+    helper session and a changed plist is indexed by a background loader.
+    The poll interval adapts: it is tightened right after the URL changed
+    and backs off while the URL stays the same or Safari has no window.
+    """
     # emits: "full" | "domain" | "none" | None (no Safari window)
     bookmark_checked = Signal(object)
 
-    def __init__(self, parent = None) -> None:
+    MIN_POLL_INTERVAL_MS = 1000
+    DEFAULT_POLL_INTERVAL_MS = 2000
+    MAX_POLL_INTERVAL_MS = 8000
+    BACKOFF_FACTOR = 1.5
+
+    def __init__(self, parent = None, command: Sequence[str] | None = None) -> None:
         super().__init__(parent)
 
+        # long-lived osascript helper; `command` swaps in a stand-in for tests
+        self.session = AppleScriptSession(command, parent=self)
+        self.session.answered.connect(self.on_frontmost_url)
+        # force flag of the probe currently running
+        self.probe_forced = False
+
         self.last_url_checked: str | None = None 
         self.last_url_state: str | None = None # "full" | "domain" | "none"
+        self.plist_path = BOOKMARKS_PLIST
+
+        # (re)builds the lookup index when Bookmarks.plist changed
+        self.index_loader = BackgroundLoader(self.load_index, self)
+        self.index_loader.loaded.connect(self.on_index_loaded)
+        self.pending_lookup_url: str | None = None
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.check_frontmost_url_changed)
-        self.poll_interval_ms = 2000  # 2 s
+        self.poll_interval_ms = self.DEFAULT_POLL_INTERVAL_MS  # 2 s
 
     def start(self):
         """Begin periodic checks."""
@@ -83,37 +178,47 @@ class BookmarkStatus(QObject):
         """Stop periodic checks."""
         if self.timer.isActive():
             self.timer.stop()
+        # no polling -> no need to keep the helper process around
+        self.session.shutdown()
+
+    def set_poll_interval(self, interval_ms: int) -> None:
+        interval_ms = min(max(interval_ms, self.MIN_POLL_INTERVAL_MS), self.MAX_POLL_INTERVAL_MS)
+        if interval_ms == self.poll_interval_ms:
+            return
+        self.poll_interval_ms = interval_ms
+        if self.timer.isActive():
+            self.timer.setInterval(interval_ms)
+
+    def back_off(self) -> None:
+        self.set_poll_interval(int(self.poll_interval_ms * self.BACKOFF_FACTOR))
 
     def check_frontmost_url_changed(self, force: bool = False):
-        script_url = textwrap.dedent("""
-        tell application "Safari" 
-            if not (exists front window) then 
-                return "NO_WINDOW"
-            end if 
-            set theURL to URL of current tab of front window
-            return theURL
-        end tell
-        """)
-
-        result = subprocess.run(
-            ["/usr/bin/osascript", "-e", script_url],
-            capture_output=True,
-            text=True,
-        )
+        """Start an asynchronous probe; skipped while the previous one is running."""
+        if self.session.request():
+            self.probe_forced = force
+        elif force:
+            # let the running probe re-check the bookmark state
+            self.probe_forced = True
+
+    def on_frontmost_url(self, current_url: str | None) -> None:
+        """Handle the helper's answer."""
+        force, self.probe_forced = self.probe_forced, False
 
         # if AppleScript failed, mark as error instead of "no bookmark"
-        if result.returncode != 0:
+        if current_url is None:
             self.last_url_checked = None
             self.last_url_state = "error"
+            self.set_poll_interval(self.MAX_POLL_INTERVAL_MS)
             self.bookmark_checked.emit("error")
             return
 
-        current_url = result.stdout.strip()
+        current_url = current_url.strip()
 
         if current_url == "NO_WINDOW" or current_url == "":
             # no window > no repeated bookmark check necessary 
             self.last_url_checked = None 
             self.last_url_state = None
+            self.set_poll_interval(self.MAX_POLL_INTERVAL_MS)
             self.bookmark_checked.emit(None)
             return
 
@@ -123,97 +228,43 @@ class BookmarkStatus(QObject):
             and self.last_url_state is not None
             and not force
         ):
+            self.back_off()
             return 
 
         # if URL HAS CHANGED -> call check_bookmark_existence
+        if self.last_url_checked != current_url:
+            # the user is browsing -> look again soon
+            self.set_poll_interval(self.MIN_POLL_INTERVAL_MS)
         self.last_url_checked = current_url
         self.check_bookmark_existence(current_url)
 
+    def load_index(self) -> BookmarkIndex:
+        """Runs on the loader's worker thread."""
+        # the index is built once per plist version and shared via the snapshot
+        snapshot = helper_functions.get_bookmark_snapshot(self.plist_path)
+        return snapshot.derive(STATUS_INDEX, BookmarkIndex.from_snapshot)
+
     def check_bookmark_existence(self, url: str) -> None:
         """Check if given URL is stored in Safari bookmarks plist."""
-        plist_path = Path.home() / "Library" / "Safari" / "Bookmarks.plist"
-
-        def host_only(u: str) -> str:
-            parsed = urlparse(u if "://" in u else "https://" + u)
-            host = parsed.netloc.lower()
-            if "@" in host:
-                host = host.split("@", 1)[-1]
-            if ":" in host:
-                host = host.split(":", 1)[0]
-            if host.startswith("www."):
-                host = host[4:]
-            return host
-
-        def base_domain(host: str) -> str:
-            parts = host.split(".")
-            if len(parts) >= 2:
-                return ".".join(parts[-2:])
-            return host
-
-        def normalize_parts(u: str) -> tuple[str, str, str, str]:
-            """Return (host, base, path, query) with decoding and NFC."""
-            parsed = urlparse(u if "://" in u else "https://" + u)
-            host = host_only(u)
-            base = base_domain(host)
-            path = uni_normalize("NFC", unquote(parsed.path)).rstrip("/")
-            query = uni_normalize("NFC", unquote(parsed.query))
-            return host, base, path, query
-
-        target_host = host_only(url)
-        target_base = base_domain(target_host)
-        _, _, target_path, target_query = normalize_parts(url)
-
-        # collect all bookmark URL variants and base domains
-        bookmark_bases: set[str] = set()
-        bookmark_hosts: set[str] = set()
-        full_match = False
-        try:
-            with plist_path.open("rb") as fp:
-                data = plistlib.load(fp)
-
-            stack = [data]
-            while stack:
-                node = stack.pop()
-                if isinstance(node, dict):
-                    stack.extend(node.values())
-                elif isinstance(node, list):
-                    stack.extend(node)
-                else:
-                    continue
-
-                if isinstance(node, dict) and "URLString" in node:
-                    candidate_url = node.get("URLString", "")
-                    cand_host, cand_base, cand_path, cand_query = normalize_parts(candidate_url)
-                    if cand_host:
-                        bookmark_hosts.add(cand_host)
-                    if cand_base:
-                        bookmark_bases.add(cand_base)
-                    # full-match detection: same host and same path+query
-                    if (
-                        cand_host
-                        and cand_host == target_host
-                        and cand_path == target_path
-                        and cand_query == target_query
-                    ):
-                        full_match = True
-                        break
-        except Exception:
-            bookmark_bases = set()
-            bookmark_hosts = set()
-            full_match = False
-
-        domain_match = bool(
-            (target_host and target_host in bookmark_hosts)
-            or (target_base and target_base in bookmark_bases)
-        )
+        # fast path: plist unchanged since the index was built
+        snapshot = helper_functions.peek_bookmark_snapshot(self.plist_path)
+        index = snapshot.peek_derived(STATUS_INDEX) if snapshot is not None else None
+        if index is not None:
+            self.report_lookup(index, url)
+            return
+
+        # plist changed -> parse and index it off the GUI thread
+        self.pending_lookup_url = url
+        self.index_loader.request()
+
+    def on_index_loaded(self, index: BookmarkIndex) -> None:
+        url, self.pending_lookup_url = self.pending_lookup_url, None
+        if url is not None:
+            self.report_lookup(index, url)
 
+    def report_lookup(self, index: BookmarkIndex, url: str) -> None:
         # cache state: prefer full over domain
-        if full_match:
-            self.last_url_state = "full"
-        elif domain_match:
-            self.last_url_state = "domain"
-        else:
-            self.last_url_state = "none"
+        self.last_url_state = index.lookup(url)
 
         # NOTIFY MainWindow so it can update the icon 
         self.bookmark_checked.emit(self.last_url_state)
@@ -0,0 +1,116 @@
+import sys
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Mapping, Sequence
+
+from services.tag_dictionary import TAGS, TagDictionary
+
+
+def unique_name(name: str, taken: dict[str, int]) -> str:
+    """
+    Return name, or "name (2)", "name (3)", ... if it is already taken, and
+    mark the result as taken. `taken` maps every name in use to the next
+    number to try for it.
+    """
+    if name not in taken:
+        taken[name] = 2
+        return name
+    number = taken[name]
+    while f"{name} ({number})" in taken:
+        number += 1
+    taken[name] = number + 1
+    unique = f"{name} ({number})"
+    taken[unique] = 2
+    return unique
+
+
+@dataclass(slots=True)
+class BookmarkRecord:
+    """One bookmark as shown in the table; tags are TagDictionary IDs."""
+    name: str
+    url: str
+    tags: tuple[int, ...] = ()
+    uuid: str = ""
+    folder: str = ""
+
+
+class BookmarkStore:
+    """
+    All bookmarks of the plist merged with their tags, built once per load.
+
+    Records are slotted (no per-instance __dict__), folder strings are
+    interned and tags are integer IDs of the shared TagDictionary. Table,
+    filter and tag window share the record list; tag strings are only
+    looked up for display.
+
+    Bookmarks sharing a name are told apart as "Name", "Name (2)", ... in
+    plist order; pass `taken` to continue the numbering of existing rows.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[BookmarkRecord] = (),
+        tag_dictionary: TagDictionary = TAGS,
+    ) -> None:
+        self.records: list[BookmarkRecord] = list(records)
+        self.tag_dictionary = tag_dictionary
+
+    @classmethod
+    def from_bookmarks(
+        cls,
+        bookmarks: Iterable,
+        tag_map: Mapping[str, Sequence[str]],
+        tag_dictionary: TagDictionary = TAGS,
+        taken: dict[str, int] | None = None,
+    ) -> "BookmarkStore":
+        """Merge parsed SafariBookmarks with the url -> tags map of tags.json."""
+        taken = {} if taken is None else taken
+        return cls(
+            (
+                cls.record_of(bm, tag_dictionary.ids_of(tag_map.get(bm.url, ())), taken)
+                for bm in bookmarks
+            ),
+            tag_dictionary,
+        )
+
+    @classmethod
+    def from_tag_ids(
+        cls,
+        bookmarks: Iterable,
+        tag_ids: Iterable[tuple[int, ...]],
+        tag_dictionary: TagDictionary = TAGS,
+    ) -> "BookmarkStore":
+        """Pair SafariBookmarks with already known tag IDs (one tuple per bookmark)."""
+        taken: dict[str, int] = {}
+        return cls(
+            (cls.record_of(bm, tags, taken) for bm, tags in zip(bookmarks, tag_ids)),
+            tag_dictionary,
+        )
+
+    @staticmethod
+    def record_of(bm, tags: tuple[int, ...], taken: dict[str, int]) -> BookmarkRecord:
+        """Record of a SafariBookmark; see unique_name() for `taken`."""
+        return BookmarkRecord(
+            name=unique_name(bm.name or bm.url, taken),
+            url=bm.url,
+            tags=tags,
+            uuid=bm.uuid,
+            folder=sys.intern(bm.folder),
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[BookmarkRecord]:
+        return iter(self.records)
+
+    def __getitem__(self, row: int) -> BookmarkRecord:
+        return self.records[row]
+
+    def tags_text(self, record: BookmarkRecord) -> str:
+        """Tags of record for display, e.g. "python,docs"."""
+        return self.tag_dictionary.text_of(record.tags)
+
+    def all_tags(self) -> set[str]:
+        """Every tag used by at least one bookmark."""
+        ids = {tag_id for record in self.records for tag_id in record.tags}
+        return set(self.tag_dictionary.names_of(ids))
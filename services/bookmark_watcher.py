@@ -1,57 +1,174 @@
 import os
 import pathlib
+from typing import Any, Sequence
 
 from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
 
-from services.settings import BOOKMARKS_PLIST
+from services.background_loader import BackgroundLoader
+from services.bookmark_diff import diff_bookmarks
+from services.bookmark_snapshot import ContentFingerprint, content_fingerprint
 import helper_functions
 
 class BookmarkWatcher(QObject):
-    bookmark_added = Signal(dict)
-
-    def __init__(self, plist_path: str, parent=None):
+    """
+    Watch Safari's Bookmarks.plist and report what changed.
+
+    Safari replaces the file atomically (rename-over), which fires bursts of
+    fileChanged signals and drops the watch on the old inode. Events are
+    therefore coalesced until the file stayed quiet for `quiet_ms`, the path
+    is re-added once the new file exists, and a plist whose content did not
+    change (same mtime/size, or same hash) is not parsed at all. The parent
+    directory, which Safari writes to all the time, is only watched while
+    the plist is missing.
+
+    Parsing happens on worker threads, the initial state (baseline) as
+    well; a change noticed before the baseline arrived is loaded and
+    diffed once it is there.
+
+    `events_received`, `parses` and `skipped` count what happened.
+    """
+    # BookmarkChangeSet with every change since the previous plist version
+    bookmarks_changed = Signal(object)
+    # content fingerprint of the plist the baseline was taken from, None
+    # if there is no plist
+    baseline_loaded = Signal(object)
+
+    def __init__(self, plist_path: str, parent=None, quiet_ms: int | None = None):
         super().__init__(parent)
 
-        self.plist_path = BOOKMARKS_PLIST
-        self.watcher = QFileSystemWatcher([plist_path])
-
-        # load initializing state of safari bookmarks
-        self.old_data = helper_functions.load_safari_bookmarks(plist_path)
+        self.plist_path = plist_path
+        self.directory = str(pathlib.Path(plist_path).parent)
+        self.watcher = QFileSystemWatcher()
+
+        # counted on the GUI thread
+        self.events_received = 0
+        self.parses = 0
+        self.skipped = 0
+        # (mtime_ns, size, digest) of the last parsed plist; only changed by
+        # the loaders' worker threads, which never run at the same time
+        self.fingerprint: ContentFingerprint | None = None
+
+        if quiet_ms is None:
+            quiet_ms = helper_functions.load_config().get("watcher", {}).get("quiet_ms", 300)
+        self.quiet_timer = QTimer(self)
+        self.quiet_timer.setSingleShot(True)
+        self.quiet_timer.setInterval(quiet_ms)
+        self.quiet_timer.timeout.connect(self.on_quiet)
+
+        # changes are parsed on a worker thread
+        self.loader = BackgroundLoader(self.load_bookmarks, self)
+        self.loader.loaded.connect(self.on_loaded)
+        # initial state of safari bookmarks; None while the plist does not
+        # exist (its first loaded version becomes the baseline then)
+        self.old_data: Sequence[Any] | None = None
+        self.baseline_ready = False
+        # a change was noticed while the baseline was still loading
+        self.change_waiting = False
+        self.baseline_loader = BackgroundLoader(self.take_baseline, self)
+        self.baseline_loader.loaded.connect(self.on_baseline_loaded)
+        self.load_baseline()
+        self.rearm()
         
         # react to changes in plist 
         self.watcher.fileChanged.connect(self.on_changed)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+
+    def load_baseline(self) -> None:
+        """
+        (Re)take the state later changes are diffed against, e.g. after a
+        cached snapshot turned out to be stale; arrives in on_baseline_loaded.
+        """
+        self.baseline_ready = False
+        self.baseline_loader.request()
+
+    def take_baseline(self):
+        """Runs on the baseline loader's worker thread; (fingerprint, bookmarks)."""
+        # fingerprint first: a plist replaced in between is parsed again later
+        fingerprint = content_fingerprint(self.plist_path)
+        bookmarks = None
+        if fingerprint is not None:
+            # the shared snapshot: the table loader reuses this parse
+            bookmarks = helper_functions.get_bookmark_snapshot(self.plist_path).bookmarks
+        self.fingerprint = fingerprint
+        return fingerprint, bookmarks
+
+    def on_baseline_loaded(self, baseline) -> None:
+        fingerprint, bookmarks = baseline
+        if bookmarks is not None:
+            self.parses += 1
+        self.old_data = bookmarks
+        self.baseline_ready = True
+        if self.change_waiting:
+            self.change_waiting = False
+            self.loader.request()
+        self.baseline_loaded.emit(fingerprint)
+
+    def load_bookmarks(self):
+        """Runs on the loader's worker thread; None if there is nothing new."""
+        previous = self.fingerprint
+        fingerprint = content_fingerprint(self.plist_path, previous)
+        # missing (being replaced right now) or same content as last time
+        if fingerprint is None or (previous is not None and fingerprint[2] == previous[2]):
+            self.fingerprint = fingerprint or previous
+            return None
+        self.fingerprint = fingerprint
+        return helper_functions.get_bookmark_snapshot(self.plist_path).bookmarks
+
+    def rearm(self) -> None:
+        """
+        Watch the plist again after it was replaced by a new file; while it
+        is missing, watch its directory to notice it coming back.
+        """
+        if self.plist_path in self.watcher.files():
+            return
+        if os.path.exists(self.plist_path) and self.watcher.addPath(self.plist_path):
+            if self.directory in self.watcher.directories():
+                self.watcher.removePath(self.directory)
+        elif self.directory not in self.watcher.directories():
+            self.watcher.addPath(self.directory)
 
     def on_changed(self, plist_path):
         """Function called when Safari's bookmarks.plist has changed"""
-
-        new_data = helper_functions.load_safari_bookmarks(plist_path)
-
-        # search for the new bookmark 
-        added_bookmark = self.detect_new_bookmark(self.old_data, new_data)
+        self.events_received += 1
+        self.rearm()
+        # wait until the burst of change events is over
+        self.quiet_timer.start()
+
+    def on_directory_changed(self, directory):
+        # only of interest while the plist itself is not watched
+        if self.plist_path not in self.watcher.files() and os.path.exists(self.plist_path):
+            self.on_changed(self.plist_path)
+
+    def on_quiet(self):
+        self.rearm()
+        if not self.baseline_ready:
+            # loaded once there is something to diff against
+            self.change_waiting = True
+            return
+        # a change during a running parse is coalesced by the loader
+        self.loader.request()
+
+    def on_loaded(self, new_data):
+        """Compare freshly parsed bookmarks against the previous state."""
+        if not self.baseline_ready:
+            # the baseline is being retaken -> load again after it
+            self.change_waiting = True
+            return
+        if new_data is None:
+            # plist content did not change
+            self.skipped += 1
+            return
+        self.parses += 1
+        if self.old_data is None:
+            # the plist did not exist when the watcher was created
+            self.old_data = new_data
+            return
+
+        # added/removed/renamed/moved bookmarks, keyed by WebBookmarkUUID
+        changes = diff_bookmarks(self.old_data, new_data)
 
         # update old data 
         self.old_data = new_data
 
-        if added_bookmark:
-            self.bookmark_added.emit(added_bookmark)
-
-    def detect_new_bookmark(self, old, new):
-        """Compares old and new bookmarks plist and examines newly added bookmark"""
-
-        # helper_functions returns SafariBookmarks objects; compare by url
-        old_urls = {item.url for item in old}
-        new_urls = {item.url for item in new}
-
-        added = new_urls - old_urls
-
-        if not added:
-            return None 
-
-        # return the complete dict instead of just the URL 
-        new_url = next(iter(added))
-        for item in new:
-            if item.url == new_url:
-                # Emit a dict to match expected dialog structure
-                return {"URLString": item.url, "URIDictionary": {"title": item.name}}
-
-        return None
+        if changes:
+            self.bookmarks_changed.emit(changes)
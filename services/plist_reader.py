@@ -0,0 +1,277 @@
+import mmap
+import struct
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple
+
+
+class PlistBookmark(NamedTuple):
+    url: str
+    title: str
+    # Safari's WebBookmarkUUID, "" if missing
+    uuid: str
+    # titles of the enclosing folders joined by "/", e.g. "BookmarksBar/News"
+    folder: str
+
+
+# the only keys of Bookmarks.plist the bookmark walk looks at
+BOOKMARK_KEYS = frozenset({
+    "Children", "Title", "URIDictionary", "title",
+    "URLString", "WebBookmarkType", "WebBookmarkUUID",
+})
+
+# deeper folder nesting means a corrupt (cyclic) binary plist
+MAX_FOLDER_DEPTH = 1000
+
+
+def iter_plist_bookmarks(plist_path: str | Path) -> Iterator[PlistBookmark]:
+    """
+    Yield the bookmark leaves of a Safari Bookmarks.plist, in file order.
+
+    Unlike plistlib.load, the whole object tree (Reading List previews,
+    sync metadata, icons) is never built: binary plists are read in place
+    through their offset table and XML plists are streamed, keeping only
+    the keys in BOOKMARK_KEYS.
+
+    Raises ValueError (or OSError) for unreadable files.
+    """
+    with Path(plist_path).open("rb") as file:
+        if file.read(8) == b"bplist00":
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                plist = BinaryPlist(data)
+                try:
+                    yield from walk_bookmarks(plist.top, plist)
+                except (IndexError, UnicodeDecodeError) as exc:
+                    raise ValueError(f"corrupt binary plist: {exc}") from exc
+        else:
+            file.seek(0)
+            yield from walk_bookmarks(read_xml_plist(file), PlainPlist())
+
+
+def walk_bookmarks(root: Any, plist: "PlainPlist | BinaryPlist") -> Iterator[PlistBookmark]:
+    """
+    Traverse Safari bookmark containers (depth-first, with an explicit stack)
+    and yield all leaf bookmark entries.
+
+    Each bookmark item may appear either as:
+        - modern structure:
+            {"WebBookmarkType": "WebBookmarkTypeLeaf",
+            "URLString": "...",
+            "URIDictionary": {"title": "..."} }
+        - older structure:
+            {"WebBookmarkType": "WebBookmarkTypeLeaf",
+            "URLString": "...",
+            "Title": "..." }
+
+    Folder/Container entries have:
+        {"WebBookmarkType": "WebBookmarkTypeList",
+        "Title":"MySubfolderName",
+        "Children": [
+            {"WebBookmarkType":  "...", "URLString": "...", "URIDictionary": {"title":"..."},
+            {...}]
+        }
+
+    plist resolves the values of root: plain Python objects (PlainPlist)
+    or object references of a binary plist (BinaryPlist).
+    """
+    top = plist.dict_at(root)
+    if top is None:
+        return
+    # (remaining children, folder path) of every open container
+    stack = [(iter(plist.array_at(top.get("Children")) or ()), "")]
+    while stack:
+        children, folder = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            continue
+        node = plist.dict_at(child)
+        if node is None:
+            continue
+
+        if plist.string_at(node.get("WebBookmarkType")) == "WebBookmarkTypeLeaf":
+            url = plist.string_at(node.get("URLString"))
+            if url is not None:
+                uri = plist.dict_at(node.get("URIDictionary")) or {}
+                title = (
+                    # modern SafariBookmarks structure
+                    plist.string_at(uri.get("title"))
+                    # older plist structure
+                    or plist.string_at(node.get("Title")) or ""
+                )
+                uuid = plist.string_at(node.get("WebBookmarkUUID")) or ""
+                yield PlistBookmark(url, title, uuid, folder)
+
+        # descend into subfolders before the next sibling
+        if "Children" in node:
+            if len(stack) >= MAX_FOLDER_DEPTH:
+                raise ValueError("bookmark folders nested too deeply")
+            name = plist.string_at(node.get("Title"))
+            subfolder = "/".join(part for part in (folder, name) if part)
+            stack.append((iter(plist.array_at(node["Children"]) or ()), subfolder))
+
+
+class PlainPlist:
+    """Value access for plists already decoded into dicts, lists and strings."""
+
+    @staticmethod
+    def dict_at(value: Any) -> dict | None:
+        return value if isinstance(value, dict) else None
+
+    @staticmethod
+    def array_at(value: Any) -> list | None:
+        return value if isinstance(value, list) else None
+
+    @staticmethod
+    def string_at(value: Any) -> str | None:
+        return value if isinstance(value, str) else None
+
+
+def read_xml_plist(file) -> Any:
+    """
+    Stream an XML plist and return its root, keeping only the dict entries
+    named in BOOKMARK_KEYS (and only string values besides containers).
+
+    Parsed elements are dropped as soon as they are closed, so memory grows
+    with the number of bookmarks, not with the size of the file.
+    """
+    root: Any = None
+    # open dicts/arrays as [container, pending dict key]
+    frames: list[list] = []
+    # open XML elements, to detach the closed ones
+    elements: list[ET.Element] = []
+    try:
+        for event, elem in ET.iterparse(file, events=("start", "end")):
+            if event == "start":
+                elements.append(elem)
+                if elem.tag == "dict":
+                    frames.append([{}, None])
+                elif elem.tag == "array":
+                    frames.append([[], None])
+                continue
+
+            elements.pop()
+            if elements:
+                elements[-1].remove(elem)
+            tag = elem.tag
+            text = elem.text
+            elem.clear()
+            if tag == "key":
+                if frames:
+                    frames[-1][1] = text or ""
+                continue
+            if tag == "plist":
+                continue
+            if tag in ("dict", "array"):
+                value = frames.pop()[0]
+            elif tag == "string":
+                value = text or ""
+            else:
+                # numbers, dates, booleans and data are never needed
+                value = None
+
+            if not frames:
+                root = value
+                continue
+            container, key = frames[-1]
+            if isinstance(container, list):
+                container.append(value)
+            else:
+                if key in BOOKMARK_KEYS:
+                    container[key] = value
+                frames[-1][1] = None
+    except ET.ParseError as exc:
+        raise ValueError(f"corrupt XML plist: {exc}") from exc
+    return root
+
+
+class BinaryPlist:
+    """
+    Lazy reader of a binary plist ("bplist00").
+
+    Values are object references (indices into the offset table); objects
+    are only decoded when dict_at / array_at / string_at asks for them.
+    """
+    TRAILER = struct.Struct(">6xBBQQQ")
+
+    def __init__(self, data) -> None:
+        if len(data) < 8 + self.TRAILER.size or data[:8] != b"bplist00":
+            raise ValueError("not a binary plist")
+        (
+            self.offset_size,
+            self.ref_size,
+            self.count,
+            self.top,
+            self.table,
+        ) = self.TRAILER.unpack_from(data, len(data) - self.TRAILER.size)
+        if self.table + self.count * self.offset_size > len(data):
+            raise ValueError("offset table out of range")
+        self.data = data
+        # decoded dict keys by reference; binary plists share equal strings
+        self.keys: dict[int, str | None] = {}
+
+    def offset(self, ref: int) -> int:
+        if not 0 <= ref < self.count:
+            raise ValueError(f"object reference {ref} out of range")
+        start = self.table + ref * self.offset_size
+        return int.from_bytes(self.data[start:start + self.offset_size], "big")
+
+    def header(self, ref: int) -> tuple[int, int, int]:
+        """(object type, length, offset of the payload) of an object."""
+        pos = self.offset(ref)
+        marker = self.data[pos]
+        kind, length = marker >> 4, marker & 0x0F
+        pos += 1
+        if length == 0x0F and kind in (0x4, 0x5, 0x6, 0xA, 0xC, 0xD):
+            # the length follows as an int object
+            int_marker = self.data[pos]
+            if int_marker >> 4 != 0x1:
+                raise ValueError(f"invalid length of object {ref}")
+            size = 1 << (int_marker & 0x0F)
+            length = int.from_bytes(self.data[pos + 1:pos + 1 + size], "big")
+            pos += 1 + size
+        return kind, length, pos
+
+    def refs(self, pos: int, count: int) -> list[int]:
+        size = self.ref_size
+        return [
+            int.from_bytes(self.data[start:start + size], "big")
+            for start in range(pos, pos + count * size, size)
+        ]
+
+    def string_at(self, ref: int | None) -> str | None:
+        if ref is None:
+            return None
+        kind, length, pos = self.header(ref)
+        if kind == 0x5:
+            return self.data[pos:pos + length].decode("ascii")
+        if kind == 0x6:
+            return self.data[pos:pos + 2 * length].decode("utf-16-be")
+        return None
+
+    def array_at(self, ref: int | None) -> list[int] | None:
+        if ref is None:
+            return None
+        kind, count, pos = self.header(ref)
+        return self.refs(pos, count) if kind == 0xA else None
+
+    def dict_at(self, ref: int | None) -> dict[str, int] | None:
+        """key -> value reference of a dict object."""
+        if ref is None:
+            return None
+        kind, count, pos = self.header(ref)
+        if kind != 0xD:
+            return None
+        keys = self.refs(pos, count)
+        values = self.refs(pos + count * self.ref_size, count)
+        return {
+            name: value
+            for key, value in zip(keys, values)
+            # plist keys are strings; skip anything else of a malformed file
+            if (name := self.key_at(key)) is not None
+        }
+
+    def key_at(self, ref: int) -> str | None:
+        if ref not in self.keys:
+            self.keys[ref] = self.string_at(ref)
+        return self.keys[ref]
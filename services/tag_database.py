@@ -0,0 +1,187 @@
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Mapping, Sequence
+
+from services.tag_dictionary import TagDictionary
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookmarks (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    -- TagDictionary.fold(name): tags are compared case-insensitively
+    folded TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tags_folded ON tags (folded);
+CREATE TABLE IF NOT EXISTS bookmark_tags (
+    bookmark_id INTEGER NOT NULL REFERENCES bookmarks (id) ON DELETE CASCADE,
+    tag_id INTEGER NOT NULL REFERENCES tags (id),
+    -- order of the tags of one bookmark
+    position INTEGER NOT NULL,
+    PRIMARY KEY (bookmark_id, tag_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bookmark_tags_tag ON bookmark_tags (tag_id, bookmark_id);
+"""
+
+
+def tag_database_path(tags_path: str | Path) -> Path:
+    """The database belonging to a tags file, e.g. tags.json -> tags.sqlite."""
+    return Path(tags_path).with_suffix(".sqlite")
+
+
+class TagDatabase:
+    """
+    url -> tags map stored in SQLite (bookmarks, tags, bookmark_tags).
+
+    Unlike tags.json, a changed URL costs one small transaction
+    (set_tags) instead of rewriting the whole map, and tag statistics and
+    multi-tag queries run inside the database on its indexes.
+
+    One connection per instance; use it on the thread that created it.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.connection = sqlite3.connect(self.path, timeout=5)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "TagDatabase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    # ----------
+    # Reading
+    # ----------
+    def load(self) -> dict[str, list[str]]:
+        """The whole url -> tags map, tags in their stored order."""
+        tag_map: dict[str, list[str]] = {}
+        rows = self.connection.execute(
+            """
+            SELECT b.url, t.name FROM bookmark_tags bt
+            JOIN bookmarks b ON b.id = bt.bookmark_id
+            JOIN tags t ON t.id = bt.tag_id
+            ORDER BY b.id, bt.position
+            """
+        )
+        for url, name in rows:
+            tag_map.setdefault(url, []).append(name)
+        return tag_map
+
+    def tags_of(self, url: str) -> list[str]:
+        rows = self.connection.execute(
+            """
+            SELECT t.name FROM bookmark_tags bt
+            JOIN bookmarks b ON b.id = bt.bookmark_id
+            JOIN tags t ON t.id = bt.tag_id
+            WHERE b.url = ? ORDER BY bt.position
+            """,
+            (url,),
+        )
+        return [name for (name,) in rows]
+
+    def tag_counts(self) -> dict[str, int]:
+        """
+        Number of bookmarks per tag (case-insensitive); the oldest spelling
+        still in use names the tag.
+        """
+        # with a single MIN() SQLite takes the bare column t.name from the
+        # row with the lowest id
+        rows = self.connection.execute(
+            """
+            SELECT t.name, MIN(t.id), COUNT(DISTINCT bt.bookmark_id) FROM tags t
+            JOIN bookmark_tags bt ON bt.tag_id = t.id
+            GROUP BY t.folded
+            """
+        )
+        return {name: count for name, _, count in rows}
+
+    def urls_with_tags(self, tags: Iterable[str]) -> set[str]:
+        """URLs carrying every one of the tags (AND, case-insensitive)."""
+        folded = sorted({TagDictionary.fold(tag) for tag in tags if tag.strip()})
+        if not folded:
+            return {url for (url,) in self.connection.execute("SELECT url FROM bookmarks")}
+        placeholders = ",".join("?" * len(folded))
+        rows = self.connection.execute(
+            f"""
+            SELECT b.url FROM bookmarks b
+            JOIN bookmark_tags bt ON bt.bookmark_id = b.id
+            JOIN tags t ON t.id = bt.tag_id
+            WHERE t.folded IN ({placeholders})
+            GROUP BY b.id
+            HAVING COUNT(DISTINCT t.folded) = ?
+            """,
+            (*folded, len(folded)),
+        )
+        return {url for (url,) in rows}
+
+    # ----------
+    # Writing
+    # ----------
+    def set_tags(self, url: str, tags: Sequence[str]) -> None:
+        """Upsert the tags of one URL; no tags deletes the URL."""
+        with self.connection:
+            self._set_tags(url, tags)
+
+    def set_many(self, tag_map: Mapping[str, Sequence[str]]) -> None:
+        """set_tags() for several URLs in one transaction."""
+        with self.connection:
+            for url, tags in tag_map.items():
+                self._set_tags(url, tags)
+
+    def save(self, tag_map: Mapping[str, Sequence[str]]) -> None:
+        """
+        Make the database hold exactly tag_map, writing only the URLs whose
+        tags differ.
+        """
+        current = self.load()
+        changed = {
+            url: tag_map.get(url, ())
+            for url in current.keys() | tag_map.keys()
+            if list(current.get(url, ())) != list(tag_map.get(url, ()))
+        }
+        self.set_many(changed)
+
+    def _set_tags(self, url: str, tags: Sequence[str]) -> None:
+        execute = self.connection.execute
+        if not tags:
+            execute("DELETE FROM bookmarks WHERE url = ?", (url,))
+            return
+        execute("INSERT OR IGNORE INTO bookmarks (url) VALUES (?)", (url,))
+        (bookmark_id,) = execute("SELECT id FROM bookmarks WHERE url = ?", (url,)).fetchone()
+        execute("DELETE FROM bookmark_tags WHERE bookmark_id = ?", (bookmark_id,))
+        for position, name in enumerate(dict.fromkeys(tags)):
+            execute(
+                "INSERT OR IGNORE INTO tags (name, folded) VALUES (?, ?)",
+                (name, TagDictionary.fold(name)),
+            )
+            (tag_id,) = execute("SELECT id FROM tags WHERE name = ?", (name,)).fetchone()
+            execute(
+                "INSERT INTO bookmark_tags (bookmark_id, tag_id, position) VALUES (?, ?, ?)",
+                (bookmark_id, tag_id, position),
+            )
+
+
+def migrate_json_to_sqlite(tag_map: Mapping[str, Sequence[str]], db_path: str | Path) -> None:
+    """
+    One-shot import of a tags.json map into a new database; the database
+    is built next to db_path and only renamed into place when complete.
+    """
+    db_path = Path(db_path)
+    tmp_path = db_path.with_name(f".{db_path.name}.migrating")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        with TagDatabase(tmp_path) as database:
+            database.set_many(tag_map)
+        tmp_path.replace(db_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
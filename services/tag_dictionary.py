@@ -0,0 +1,76 @@
+import threading
+from typing import Iterable
+
+
+class TagDictionary:
+    """
+    Assign every tag a small integer ID, case-insensitively.
+
+    Bookmarks carry tuples of IDs instead of tag strings, so filtering and
+    set operations compare ints; the display spelling is only looked up for
+    painting and for the tag dropdown. It is the spelling last passed to
+    id_of(), i.e. last read from the stored tags, so a tag respelled on disk
+    ("python" -> "Python") is shown the new way. IDs are never reused or
+    removed.
+    """
+
+    def __init__(self) -> None:
+        # case-folded tag -> ID
+        self.ids: dict[str, int] = {}
+        # ID -> display spelling
+        self.names: list[str] = []
+        # stores are built on worker threads
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def fold(tag: str) -> str:
+        return tag.strip().casefold()
+
+    def id_of(self, tag: str) -> int:
+        """
+        Return the ID of tag, assigning a new one for unknown tags; tag's
+        spelling becomes the displayed one.
+        """
+        name = tag.strip()
+        key = self.fold(name)
+        tag_id = self.ids.get(key)
+        if tag_id is not None and self.names[tag_id] == name:
+            return tag_id
+        with self.lock:
+            tag_id = self.ids.get(key)
+            if tag_id is None:
+                tag_id = len(self.names)
+                self.names.append(name)
+                self.ids[key] = tag_id
+            else:
+                self.names[tag_id] = name
+            return tag_id
+
+    def lookup(self, tag: str) -> int | None:
+        """Return the ID of tag without assigning one; None if unknown."""
+        return self.ids.get(self.fold(tag))
+
+    def ids_of(self, tags: Iterable[str]) -> tuple[int, ...]:
+        """IDs of the (non-empty) tags in their order, without duplicates."""
+        ids: dict[int, None] = {}
+        for tag in tags:
+            if tag.strip():
+                ids[self.id_of(tag)] = None
+        return tuple(ids)
+
+    def name_of(self, tag_id: int) -> str:
+        return self.names[tag_id]
+
+    def names_of(self, tag_ids: Iterable[int]) -> list[str]:
+        return [self.names[tag_id] for tag_id in tag_ids]
+
+    def text_of(self, tag_ids: Iterable[int]) -> str:
+        """Comma-separated display text, e.g. "Python,docs"."""
+        return ",".join(self.names_of(tag_ids))
+
+
+# shared by all stores so IDs stay comparable across (re)loads
+TAGS = TagDictionary()
@@ -0,0 +1,122 @@
+import contextlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from services.tag_dictionary import TagDictionary
+
+
+# ops appended to the journal before it is compacted into tags.json
+COMPACT_AFTER_OPS = 500
+
+logger = logging.getLogger(__name__)
+
+
+def journal_path(tags_path: str | Path) -> Path:
+    """The journal belonging to a tags file, e.g. tags.json -> tags.journal.jsonl."""
+    tags_path = Path(tags_path)
+    return tags_path.with_name(f"{tags_path.stem}.journal.jsonl")
+
+
+def read_ops(path: str | Path) -> Iterator[dict]:
+    """
+    Yield the ops of a journal in the order they were appended, e.g.
+        {"op": "add", "url": "https://a", "tags": ["python"]}
+
+    A line that cannot be decoded (the last one, torn by a crash) is
+    skipped; a missing journal has no ops.
+    """
+    try:
+        file = Path(path).open("r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                op = json.loads(line)
+            except ValueError:
+                logger.warning("Skipping unreadable line %d of %s", number, path)
+                continue
+            if isinstance(op, dict):
+                yield op
+
+
+def apply_ops(tag_map: dict[str, list[str]], ops: Iterable[dict]) -> None:
+    """
+    Replay ops onto tag_map in place.
+
+    Ops name the exact tags that were added or removed, so replaying an op
+    that is already part of the snapshot (a crash between compaction and
+    clearing the journal) changes nothing. Tags are compared
+    case-insensitively, like TagRepository does when editing.
+    """
+    for op in ops:
+        url = op.get("url")
+        tags = [tag for tag in op.get("tags", ()) if isinstance(tag, str)]
+        if not isinstance(url, str):
+            continue
+        if op.get("op") == "add":
+            existing = tag_map.setdefault(url, [])
+            folded = {TagDictionary.fold(tag) for tag in existing}
+            for tag in tags:
+                if TagDictionary.fold(tag) not in folded:
+                    existing.append(tag)
+                    folded.add(TagDictionary.fold(tag))
+            if not existing:
+                del tag_map[url]
+        elif op.get("op") == "remove":
+            to_remove = {TagDictionary.fold(tag) for tag in tags}
+            remaining = [
+                tag for tag in tag_map.get(url, ()) if TagDictionary.fold(tag) not in to_remove
+            ]
+            if remaining:
+                tag_map[url] = remaining
+            else:
+                tag_map.pop(url, None)
+
+
+def clear_journal(path: str | Path) -> None:
+    """Drop a journal whose ops are part of the snapshot now."""
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+class TagJournal:
+    """
+    Append-only log of tag edits next to tags.json.
+
+    Each edit costs one appended JSON line instead of rewriting the whole
+    map; load_tags() replays the journal onto the snapshot, and the owner
+    compacts it (writes the snapshot, which clears the journal) once
+    `due` is set.
+    """
+
+    def __init__(self, path: str | Path, compact_after: int = COMPACT_AFTER_OPS) -> None:
+        self.path = Path(path)
+        self.compact_after = compact_after
+        # ops in the journal since the last compaction
+        self.ops = sum(1 for _ in read_ops(self.path))
+
+    @property
+    def due(self) -> bool:
+        return self.ops >= self.compact_after
+
+    def append(self, ops: Iterable[dict]) -> None:
+        """Append ops durably (flushed and fsynced) to the journal."""
+        lines = [json.dumps(op, ensure_ascii=False, separators=(",", ":")) + "\n" for op in ops]
+        if not lines:
+            return
+        with self.path.open("a", encoding="utf-8") as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+        self.ops += len(lines)
+
+    def reset(self) -> None:
+        """The journal was compacted into the snapshot."""
+        clear_journal(self.path)
+        self.ops = 0
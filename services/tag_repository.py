@@ -0,0 +1,266 @@
+import sqlite3
+from pathlib import Path
+from typing import Iterable
+
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+
+import helper_functions
+from services.bookmark_snapshot import ContentFingerprint, content_fingerprint, file_signature
+from services.tag_database import TagDatabase, tag_database_path
+from services.tag_dictionary import TagDictionary
+from services.tag_journal import TagJournal, journal_path
+from services.tag_writer import WRITE_DELAY_MS, TagWriter
+
+
+# quiet time after an external change of tags.json before it is re-read
+RELOAD_DELAY_MS = 200
+
+
+class TagRepository(QObject):
+    """
+    The app's authoritative url -> tags map.
+
+    tags.json is read once; afterwards every reader (tag window, table,
+    store builder) uses the in-memory map and every edit goes through
+    this class, which emits `tags_changed` with the affected URLs and
+    persists the map write-behind via TagWriter.
+
+    With the "journal" backend (config "tags.backend") an edit is instead
+    appended to the tag journal as add/remove ops, and the journal is
+    compacted into tags.json after `compact_after` ops. A journal left
+    over from the last session is compacted on startup.
+
+    With the "sqlite" backend the map lives in tags.sqlite (migrated from
+    tags.json on first use) and every edit upserts just the changed URLs.
+
+    The file is only re-read when it is changed by someone else: writes of
+    our own are recognised by their content fingerprint, or for tags.sqlite,
+    which every edit changes in place, by its mtime and size.
+    """
+    # set of URLs whose tags changed
+    tags_changed = Signal(object)
+
+    def __init__(
+        self,
+        delay_ms: int = WRITE_DELAY_MS,
+        parent=None,
+        backend: str | None = None,
+        compact_after: int | None = None,
+    ) -> None:
+        super().__init__(parent)
+        settings = helper_functions.load_config()["tags"]
+        self.backend: str = backend or settings["backend"]
+        self.path = Path(helper_functions.TAGS_JSON)
+        if self.backend == "sqlite":
+            self.path = tag_database_path(self.path)
+        try:
+            helper_functions.switch_tags_backend(self.backend)
+        except (OSError, sqlite3.Error) as exc:
+            # nothing is recorded -> tried again on the next start
+            helper_functions.logger.warning(
+                "Carrying the tags over to the %s backend failed: %s", self.backend, exc
+            )
+        self.tag_map: dict[str, list[str]] = helper_functions.load_tags(backend=self.backend)
+        self.reloads = 0
+        self.database = TagDatabase(self.path) if self.backend == "sqlite" else None
+
+        self.writer = TagWriter(delay_ms, self, backend=self.backend)
+        self.writer.written.connect(self.remember_own_write)
+        # fingerprint of the file as last read or written by us
+        self.fingerprint = self.take_fingerprint()
+
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DELAY_MS)
+        self.reload_timer.timeout.connect(self.reload_if_changed)
+        # the directory notices tags.json being created or replaced
+        self.watcher = QFileSystemWatcher([str(self.path.parent)], self)
+        self.rearm()
+        self.watcher.fileChanged.connect(self.on_file_event)
+        self.watcher.directoryChanged.connect(self.on_file_event)
+
+        self.journal: TagJournal | None = None
+        if self.backend == "journal":
+            self.journal = TagJournal(
+                journal_path(self.path),
+                compact_after or settings["journal_compact_ops"],
+            )
+        if journal_path(self.path).exists():
+            self.compact()
+
+    # ----------
+    # Reading
+    # ----------
+    def tags_of(self, url: str) -> list[str]:
+        return list(self.tag_map.get(url, ()))
+
+    def get(self, url: str, default=()):
+        """dict-like access for code taking a url -> tags mapping."""
+        return self.tag_map.get(url, default)
+
+    def snapshot(self) -> dict[str, list[str]]:
+        """Independent copy, e.g. for building a store on a worker thread."""
+        return {url: list(tags) for url, tags in self.tag_map.items()}
+
+    # ----------
+    # Editing
+    # ----------
+    def add_tags(self, urls: Iterable[str], new_tags: Iterable[str]) -> None:
+        """Add tags to every URL, skipping tags it has already (case-insensitive)."""
+        new_tags = [tag.strip() for tag in new_tags if tag.strip()]
+        ops = []
+        for url in urls:
+            existing = self.tag_map.get(url, [])
+            folded = {TagDictionary.fold(tag) for tag in existing}
+            added = []
+            for tag in new_tags:
+                if TagDictionary.fold(tag) not in folded:
+                    added.append(tag)
+                    folded.add(TagDictionary.fold(tag))
+            if added:
+                self.tag_map[url] = existing + added
+                ops.append({"op": "add", "url": url, "tags": added})
+        self._changed(ops)
+
+    def remove_tags(self, urls: Iterable[str], tags: Iterable[str]) -> None:
+        """Remove tags (case-insensitive) from every URL."""
+        to_remove = {TagDictionary.fold(tag) for tag in tags}
+        ops = []
+        for url in urls:
+            existing = self.tag_map.get(url, [])
+            removed = [tag for tag in existing if TagDictionary.fold(tag) in to_remove]
+            if not removed:
+                continue
+            remaining = [tag for tag in existing if TagDictionary.fold(tag) not in to_remove]
+            if remaining:
+                self.tag_map[url] = remaining
+            else:
+                del self.tag_map[url]
+            ops.append({"op": "remove", "url": url, "tags": removed})
+        self._changed(ops)
+
+    def prune(self, urls: Iterable[str]) -> None:
+        """Forget the tags of URLs that are no longer bookmarked."""
+        keep = set(urls)
+        stale = {url for url in self.tag_map if url not in keep}
+        for url in stale:
+            del self.tag_map[url]
+        # the table has no rows for stale URLs -> nothing to announce
+        if not stale:
+            return
+        if self.database is not None:
+            self.persist([{"url": url} for url in stale])
+        elif self.journal is not None:
+            self.compact()
+        else:
+            self.writer.schedule(self.snapshot())
+
+    def _changed(self, ops: list[dict]) -> None:
+        if not ops:
+            return
+        self.persist(ops)
+        self.tags_changed.emit({op["url"] for op in ops})
+
+    def persist(self, ops: list[dict]) -> None:
+        if self.database is not None:
+            try:
+                self.database.set_many({op["url"]: self.tag_map.get(op["url"], ()) for op in ops})
+            except sqlite3.Error as exc:
+                helper_functions.logger.warning("Writing tags to the database failed: %s", exc)
+                self.writer.schedule(self.snapshot())
+                return
+            self.remember_own_write()
+            return
+        if self.journal is None:
+            self.writer.schedule(self.snapshot())
+            return
+        try:
+            self.journal.append(ops)
+        except OSError as exc:
+            # a full write of the map covers the ops just as well
+            helper_functions.logger.warning("Appending to the tag journal failed: %s", exc)
+            self.writer.schedule(self.snapshot())
+            return
+        if self.journal.due:
+            self.compact()
+
+    def compact(self) -> None:
+        """Write the whole map to tags.json, which makes the journal obsolete."""
+        try:
+            helper_functions.save_tags(self.snapshot(), self.backend)
+        except (OSError, sqlite3.Error) as exc:
+            # the journal is still complete; compaction is retried later
+            helper_functions.logger.warning("Compacting the tag journal failed: %s", exc)
+            return
+        # a full map the writer still holds is written already
+        self.writer.cancel()
+        if self.journal is not None:
+            self.journal.reset()
+        self.remember_own_write()
+
+    def flush(self) -> None:
+        """Write unsaved edits now (e.g. on quit)."""
+        self.writer.flush()
+
+    def saved_digest(self) -> bytes | None:
+        """Digest of tags.json if it holds exactly the in-memory map, else None."""
+        if self.fingerprint is None or self.writer.pending is not None:
+            return None
+        if self.journal is not None and self.journal.ops:
+            return None
+        return self.fingerprint[2]
+
+    # ----------
+    # External changes
+    # ----------
+    def take_fingerprint(
+        self, previous: ContentFingerprint | None = None
+    ) -> ContentFingerprint | None:
+        """
+        content_fingerprint() of tags.json; tags.sqlite is not read after
+        every edit, its digest is made of mtime, size and inode instead.
+        """
+        if self.database is None:
+            return content_fingerprint(self.path, previous)
+        signature = file_signature(self.path)
+        if signature is None:
+            return None
+        _, mtime_ns, size, inode = signature
+        return (mtime_ns, size, f"{mtime_ns}:{size}:{inode}".encode())
+
+    def remember_own_write(self) -> None:
+        self.fingerprint = self.take_fingerprint()
+        self.rearm()
+
+    def rearm(self) -> None:
+        """Watch tags.json again after it was replaced by a new file."""
+        if str(self.path) not in self.watcher.files() and self.path.exists():
+            self.watcher.addPath(str(self.path))
+
+    def on_file_event(self, _path: str) -> None:
+        self.rearm()
+        self.reload_timer.start()
+
+    def reload_if_changed(self) -> None:
+        fingerprint = self.take_fingerprint(self.fingerprint)
+        if fingerprint is None or (
+            self.fingerprint is not None and fingerprint[2] == self.fingerprint[2]
+        ):
+            # our own write, or tags.json missing while being replaced
+            return
+        if self.writer.pending is not None:
+            # unsaved edits of ours win; they overwrite the file shortly
+            return
+        self.fingerprint = fingerprint
+        self.reload()
+
+    def reload(self) -> None:
+        """Re-read tags.json and announce every URL whose tags differ."""
+        old, self.tag_map = self.tag_map, helper_functions.load_tags(backend=self.backend)
+        self.reloads += 1
+        changed = {
+            url for url in old.keys() | self.tag_map.keys()
+            if old.get(url) != self.tag_map.get(url)
+        }
+        if changed:
+            self.tags_changed.emit(changed)
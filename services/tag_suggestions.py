@@ -0,0 +1,70 @@
+from bisect import bisect_left
+from typing import Collection
+
+from rapidfuzz import fuzz, process
+
+
+# tags scoring below this (0-100) are not suggested
+SCORE_CUTOFF = 30
+# upper bound of suggestions computed per keystroke
+MAX_SUGGESTIONS = 100
+
+
+class TagSuggester:
+    """
+    Suggest tags for the stub typed into the search bar.
+
+    The choice list is prepared once per tag set: set_choices() is a no-op
+    while it gets the very same collection object, so callers hand in a new
+    object only when the available tags change. Tags starting with the stub
+    (case-insensitive) are ranked first, followed by fuzzy matches computed
+    by rapidfuzz in one batched call.
+    """
+
+    def __init__(self, limit: int = MAX_SUGGESTIONS, score_cutoff: int = SCORE_CUTOFF) -> None:
+        self.limit = limit
+        self.score_cutoff = score_cutoff
+        # collection the choices were prepared from (compared by identity)
+        self.source: Collection[str] | None = None
+        self.choices: list[str] = []
+        # (lowercased tag, tag) sorted for prefix lookups via bisect
+        self.by_lower: list[tuple[str, str]] = []
+
+    def set_choices(self, tags: Collection[str]) -> None:
+        if tags is self.source:
+            return
+        self.source = tags
+        self.choices = sorted(tags)
+        self.by_lower = sorted((tag.lower(), tag) for tag in tags)
+
+    def prefix_matches(self, stub: str) -> list[str]:
+        """Tags starting with stub (case-insensitive), alphabetically."""
+        stub = stub.lower()
+        matches: list[str] = []
+        for low, tag in self.by_lower[bisect_left(self.by_lower, (stub, "")):]:
+            if not low.startswith(stub) or len(matches) >= self.limit:
+                break
+            matches.append(tag)
+        return matches
+
+    def suggest(self, stub: str) -> list[str]:
+        """Return suggestions for stub, best first; all tags if stub is empty."""
+        if not stub:
+            return list(self.choices)
+
+        suggestions = self.prefix_matches(stub)
+        seen = set(suggestions)
+        fuzzy = process.extract(
+            stub,
+            self.choices,
+            scorer=fuzz.ratio,
+            score_cutoff=self.score_cutoff,
+            limit=self.limit,
+        )
+        for tag, _score, _index in fuzzy:
+            if len(suggestions) >= self.limit:
+                break
+            if tag not in seen:
+                suggestions.append(tag)
+                seen.add(tag)
+        return suggestions
@@ -0,0 +1,58 @@
+import sqlite3
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+import helper_functions
+
+
+# quiet time after the last tag edit before tags.json is written
+WRITE_DELAY_MS = 500
+
+
+class TagWriter(QObject):
+    """
+    Write-behind persistence of the url -> tags map.
+
+    schedule() only remembers the newest map; it is written once the edits
+    stopped for `delay_ms` (or on flush(), e.g. on quit), so a burst of
+    edits costs a single atomic write of tags.json. The map itself is kept
+    by TagRepository, which is what readers use.
+    """
+    written = Signal()
+
+    def __init__(self, delay_ms: int = WRITE_DELAY_MS, parent=None, backend: str | None = None) -> None:
+        super().__init__(parent)
+        # tag storage passed to save_tags(); None -> configured one
+        self.backend = backend
+        self.pending: dict[str, list[str]] | None = None
+        self.writes = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def schedule(self, tag_map: dict[str, list[str]]) -> None:
+        """Persist tag_map after the quiet time; replaces an unwritten map."""
+        self.pending = tag_map
+        self.timer.start()
+
+    def cancel(self) -> None:
+        """Drop a pending map, e.g. because it was written by someone else."""
+        self.timer.stop()
+        self.pending = None
+
+    def flush(self) -> None:
+        """Write a pending map right away."""
+        self.timer.stop()
+        if self.pending is None:
+            return
+        try:
+            helper_functions.save_tags(self.pending, self.backend)
+        except (OSError, sqlite3.Error) as exc:
+            # keep the edits; the next edit or flush() tries again
+            helper_functions.logger.warning("Writing tags failed: %s", exc)
+            return
+        self.pending = None
+        self.writes += 1
+        self.written.emit()
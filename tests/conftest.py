@@ -1,9 +1,63 @@
+import ctypes
+import os
+import plistlib
 import sys
+import time
 from pathlib import Path
 
+import pytest
+from PySide6.QtWidgets import QApplication
+
 # Ensure python project root is on sys.path so tests can import local modules.
 # Correlates to "cd ../../"
 ROOT = Path(__file__).resolve().parent.parent
 # sys.path is the current module search path (incl. PYTHONPATH/CWD)
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+# Signal.emit() of PySide6 6.12 returns True without taking a reference, so
+# every emit from Python code drops one reference to True; once there are
+# none left the interpreter aborts (bool_dealloc), at the latest while
+# shutting down. Give True references that are never released.
+for _ in range(100_000):
+    ctypes.pythonapi.Py_IncRef(ctypes.py_object(True))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def qt_app():
+    """Instantiate a QApplication (widgets without a display) each time test is run."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+    return app
+
+
+@pytest.fixture
+def wait_until(qt_app):
+    """Return a helper that runs the Qt event loop until predicate() is true."""
+    def wait(predicate, timeout_s: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout_s
+        while not predicate():
+            if time.monotonic() > deadline:
+                return False
+            qt_app.processEvents()
+            time.sleep(0.001)
+        return True
+
+    return wait
+
+
+def write_plist(path, urls, folder="Bar"):
+    """Write a Bookmarks.plist with one bookmark per URL (titled like it) in `folder`."""
+    children = [
+        {
+            "WebBookmarkType": "WebBookmarkTypeLeaf",
+            "WebBookmarkUUID": url,
+            "URLString": url,
+            "URIDictionary": {"title": url},
+        }
+        for url in urls
+    ]
+    with path.open("wb") as f:
+        plistlib.dump({"Children": [{"Title": folder, "Children": children}]}, f)
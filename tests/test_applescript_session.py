@@ -0,0 +1,78 @@
+import sys
+
+from services.applescript_session import AppleScriptSession
+
+
+def helper(script: str) -> list[str]:
+    return [sys.executable, "-u", "-c", script]
+
+
+ECHO_COUNTER = """
+import sys
+for count, _ in enumerate(sys.stdin, 1):
+    print(f"https://example.com/{count}", flush=True)
+"""
+
+
+def ask(session, wait_until):
+    answers = []
+    session.answered.connect(answers.append)
+    try:
+        assert session.request()
+        assert wait_until(lambda: answers)
+    finally:
+        session.answered.disconnect(answers.append)
+    return answers[0]
+
+
+def test_session_reuses_one_process(wait_until):
+    session = AppleScriptSession(helper(ECHO_COUNTER))
+    try:
+        assert ask(session, wait_until) == "https://example.com/1"
+        assert ask(session, wait_until) == "https://example.com/2"
+        assert session.starts == 1
+    finally:
+        session.shutdown()
+
+
+def test_session_skips_request_while_busy(wait_until):
+    session = AppleScriptSession(helper(ECHO_COUNTER))
+    try:
+        assert session.request()
+        assert not session.request()
+        assert wait_until(lambda: not session.busy)
+    finally:
+        session.shutdown()
+
+
+def test_session_restarts_after_helper_exit(wait_until):
+    # exits without answering: restarted once, then reported as failure
+    session = AppleScriptSession(helper("import sys\nsys.stdin.readline()"))
+    try:
+        assert ask(session, wait_until) is None
+        assert session.starts == 2
+    finally:
+        session.shutdown()
+
+
+def test_helper_error_answer_is_failure(wait_until):
+    session = AppleScriptSession(helper("import sys\nfor _ in sys.stdin: print('ERROR', flush=True)"))
+    try:
+        assert ask(session, wait_until) is None
+        assert session.starts == 1
+    finally:
+        session.shutdown()
+
+
+def test_session_times_out_on_hanging_helper(wait_until):
+    session = AppleScriptSession(helper("import time\ntime.sleep(30)"), timeout_ms=100)
+    try:
+        assert ask(session, wait_until) is None
+        assert not session.is_running()
+    finally:
+        session.shutdown()
+
+
+def test_missing_command_is_reported_as_failure(wait_until):
+    session = AppleScriptSession(["/nonexistent/osascript"])
+    assert ask(session, wait_until) is None
@@ -0,0 +1,63 @@
+import threading
+
+from PySide6.QtCore import QCoreApplication, QThreadPool
+
+from services.background_loader import BackgroundLoader
+
+
+def wait_until_idle(loader):
+    """Drive the event loop until the loader has delivered its result."""
+    while loader.running:
+        loader.pool.waitForDone()
+        QCoreApplication.processEvents()
+
+
+def test_loader_emits_result_on_owner_thread():
+    loader = BackgroundLoader(lambda: threading.current_thread().name, pool=QThreadPool())
+    results = []
+    loader.loaded.connect(results.append)
+
+    loader.request()
+    wait_until_idle(loader)
+
+    assert len(results) == 1
+    assert results[0] != threading.current_thread().name
+
+
+def test_loader_coalesces_requests_while_running():
+    release = threading.Event()
+    calls = []
+
+    def job():
+        calls.append(1)
+        release.wait(5)
+        return len(calls)
+
+    loader = BackgroundLoader(job, pool=QThreadPool())
+    results = []
+    loader.loaded.connect(results.append)
+
+    loader.request()
+    # these arrive while the first parse is still running
+    loader.request()
+    loader.request()
+    release.set()
+    wait_until_idle(loader)
+
+    # stale first result dropped, the two follow-ups merged into one re-run
+    assert calls == [1, 1]
+    assert results == [2]
+
+
+def test_loader_reports_failures():
+    def job():
+        raise ValueError("broken plist")
+
+    loader = BackgroundLoader(job, pool=QThreadPool())
+    errors = []
+    loader.failed.connect(errors.append)
+
+    loader.request()
+    wait_until_idle(loader)
+
+    assert isinstance(errors[0], ValueError)
@@ -0,0 +1,81 @@
+import os
+
+import helper_functions as hf
+from conftest import write_plist
+from services.bookmark_cache import BookmarkCache
+from services.bookmark_snapshot import content_fingerprint
+from services.bookmark_status import STATUS_INDEX
+from services.tag_dictionary import TagDictionary
+
+
+def make_cache(tmp_path):
+    plist_path = tmp_path / "Bookmarks.plist"
+    write_plist(plist_path, ["https://a", "https://b"])
+    hf.forget_bookmark_snapshots()
+    hf.get_bookmark_snapshot(plist_path)
+    cache = BookmarkCache(tmp_path / "bookmarks.cache", plist_path)
+    tag_map = {"https://a": ["CachedA", "cachedB"], "https://b": ["cachedB"]}
+    assert cache.save(tag_map, b"tags-digest")
+    hf.forget_bookmark_snapshots()
+    return plist_path, cache, tag_map
+
+
+def test_warm_start_needs_no_parse(tmp_path):
+    plist_path, cache, tag_map = make_cache(tmp_path)
+    parses = hf._bookmark_snapshots.parse_count
+    dictionary = TagDictionary()
+
+    store = BookmarkCache(cache.path, plist_path).load({}, b"tags-digest", dictionary)
+
+    assert [(r.name, r.url, r.folder) for r in store] == [
+        ("https://a", "https://a", "Bar"), ("https://b", "https://b", "Bar"),
+    ]
+    assert [store.tags_text(r) for r in store] == ["CachedA,cachedB", "cachedB"]
+    snapshot = hf.get_bookmark_snapshot(plist_path)
+    assert hf._bookmark_snapshots.parse_count == parses
+    assert snapshot.peek_derived(STATUS_INDEX).lookup("https://a") == "full"
+
+
+def test_changed_tags_json_takes_tags_from_the_map(tmp_path):
+    plist_path, cache, _ = make_cache(tmp_path)
+    store = BookmarkCache(cache.path, plist_path).load({"https://b": ["new"]}, b"other")
+    assert [store.tags_text(r) for r in store] == ["", "new"]
+
+
+def test_changed_plist_is_not_loaded(tmp_path):
+    plist_path, cache, _ = make_cache(tmp_path)
+    write_plist(plist_path, ["https://a", "https://b", "https://c"])
+    assert BookmarkCache(cache.path, plist_path).load({}, None) is None
+
+
+def test_same_size_and_mtime_but_new_content_fails_validation(tmp_path):
+    plist_path, cache, _ = make_cache(tmp_path)
+    st = plist_path.stat()
+    write_plist(plist_path, ["https://x", "https://y"])
+    os.utime(plist_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    warm = BookmarkCache(cache.path, plist_path)
+    assert warm.load({}, None) is not None
+    assert not warm.is_current(content_fingerprint(plist_path))
+    assert not warm.is_current(None)
+
+
+def test_save_reuses_a_given_plist_fingerprint(tmp_path):
+    plist_path, cache, tag_map = make_cache(tmp_path)
+    hf.get_bookmark_snapshot(plist_path)
+    st = plist_path.stat()
+    # a fingerprint of the same mtime/size is trusted, the plist is not read
+    fingerprint = (st.st_mtime_ns, st.st_size, b"watcher-digest")
+    assert cache.save(tag_map, b"new-tags-digest", plist_fingerprint=fingerprint)
+    assert cache.entry.plist == fingerprint
+    assert cache.is_current(fingerprint)
+
+    # the plist was replaced after it was parsed -> nothing to write yet
+    write_plist(plist_path, ["https://a", "https://b", "https://c"])
+    assert not cache.save(tag_map, b"newer-tags-digest")
+
+
+def test_unreadable_cache_is_ignored(tmp_path):
+    plist_path, cache, _ = make_cache(tmp_path)
+    cache.path.write_bytes(b"garbage")
+    assert BookmarkCache(cache.path, plist_path).load({}, None) is None
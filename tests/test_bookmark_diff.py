@@ -0,0 +1,45 @@
+from helper_functions import SafariBookmarks
+from services.bookmark_diff import diff_bookmarks
+
+
+def bm(uuid, name, url, folder="BookmarksBar"):
+    return SafariBookmarks(name=name, url=url, uuid=uuid, folder=folder)
+
+
+def test_unchanged_bookmarks_give_empty_change_set():
+    old = [bm("1", "A", "https://a.example"), bm("2", "B", "https://b.example")]
+    assert not diff_bookmarks(old, list(old))
+
+
+def test_diff_reports_every_kind_of_change_at_once():
+    old = [
+        bm("1", "A", "https://a.example"),
+        bm("2", "B", "https://b.example"),
+        bm("3", "C", "https://c.example"),
+        bm("4", "D", "https://d.example"),
+    ]
+    new = [
+        bm("1", "A renamed", "https://a.example"),
+        bm("2", "B", "https://b.example/new"),
+        bm("4", "D", "https://d.example", folder="BookmarksBar/Archive"),
+    ] + [bm(f"n{i}", f"New {i}", f"https://new{i}.example") for i in range(300)]
+
+    changes = diff_bookmarks(old, new)
+
+    # bulk imports are reported completely, not just the first bookmark
+    assert len(changes.added) == 300
+    assert [b.uuid for b in changes.removed] == ["3"]
+    assert [(o.name, n.name) for o, n in changes.retitled] == [("A", "A renamed")]
+    assert [(o.url, n.url) for o, n in changes.url_changed] == [
+        ("https://b.example", "https://b.example/new")
+    ]
+    assert [n.folder for _, n in changes.moved] == ["BookmarksBar/Archive"]
+
+
+def test_bookmarks_without_uuid_are_matched_by_url():
+    old = [SafariBookmarks("A", "https://a.example"), SafariBookmarks("A", "https://a.example")]
+    new = [SafariBookmarks("A", "https://a.example")]
+
+    changes = diff_bookmarks(old, new)
+    assert len(changes.removed) == 1
+    assert not changes.added
@@ -0,0 +1,160 @@
+import pytest
+
+from services.bookmark_filter import BookmarkFilter, split_tags
+from services.bookmark_store import BookmarkRecord
+from services.tag_dictionary import TagDictionary
+
+
+def Row(tags: TagDictionary, name: str, url: str, tag_text: str) -> BookmarkRecord:
+    return BookmarkRecord(name, url, tags.ids_of(tag_text.split(",")))
+
+
+def names(tags: TagDictionary, tag_ids) -> set[str]:
+    return {tags.name_of(tag_id).lower() for tag_id in tag_ids}
+
+
+@pytest.fixture
+def tags() -> TagDictionary:
+    # fresh IDs and spellings per test
+    return TagDictionary()
+
+
+@pytest.fixture
+def rows(tags) -> list[BookmarkRecord]:
+    return [
+        Row(tags, "Python Docs", "https://docs.python.org/3/", "Python, Docs"),
+        Row(tags, "Qt for Python", "https://doc.qt.io/qtforpython/", "python,qt"),
+        Row(tags, "Köln", "https://de.wikipedia.org/wiki/K%C3%B6ln", "wiki"),
+    ]
+
+
+def test_split_tags_lowercases_and_strips():
+    assert split_tags(" A, b ,,c") == frozenset({"a", "b", "c"})
+
+
+def test_match_tags_is_and_query(tags, rows):
+    engine = BookmarkFilter(rows, tags)
+    assert engine.match(["python"]) == {0, 1}
+    assert engine.match(["python", "qt"]) == {1}
+    assert engine.match(["python", "unknown"]) == set()
+    # tags are matched case-insensitively
+    assert engine.match(["PYTHON", "Docs"]) == {0}
+    assert engine.match() == {0, 1, 2}
+
+
+def test_match_url_variants_and_name(tags, rows):
+    engine = BookmarkFilter(rows, tags)
+    assert engine.match(url_substring="köln") == {2}
+    assert engine.match(url_substring="k%c3%b6ln") == {2}
+    assert engine.match(name_substring="python") == {0, 1}
+    assert engine.match(["python"], name_substring="qt") == {1}
+
+
+def test_update_row_keeps_tag_index_in_sync(tags, rows):
+    engine = BookmarkFilter(rows, tags)
+    engine.update_row(2, Row(tags, "Köln", rows[2].url, "python,city"))
+    assert engine.match(["python"]) == {0, 1, 2}
+    assert tags.lookup("wiki") not in engine.tag_index
+    assert names(tags, engine.tags_of({2})) == {"python", "city"}
+    assert names(tags, engine.tags_of({0, 1, 2})) == {"python", "docs", "qt", "city"}
+
+
+def test_narrowing_query_reuses_previous_result(tags, rows):
+    engine = BookmarkFilter(rows, tags)
+    engine.match(["python"])
+    # poison the remembered result: a narrowing query must only look at it
+    engine.last_result = {1}
+    assert engine.match(["python", "qt"]) == {1}
+    assert engine.match(["python", "qt"], name_substring="q") == {1}
+
+
+def test_loosened_query_falls_back_to_full_scan(tags, rows):
+    engine = BookmarkFilter(rows, tags)
+    assert engine.match(["python", "qt"]) == {1}
+    assert engine.match(["python"]) == {0, 1}
+    assert engine.match(url_substring="wiki/k") == {2}
+    assert engine.match(url_substring="wiki/kö") == {2}
+    assert engine.match(url_substring="wiki") == {2}
+    assert engine.match() == {0, 1, 2}
+
+
+def test_tag_edit_invalidates_previous_result(tags, rows):
+    engine = BookmarkFilter(rows, tags)
+    assert engine.match(["wiki"]) == {2}
+    engine.update_row(0, Row(tags, "Python Docs", rows[0].url, "wiki"))
+    assert engine.match(["wiki"], name_substring="n") == {0, 2}
+
+
+def test_remove_rows_shifts_following_rows(tags):
+    f = BookmarkFilter([
+        Row(tags, "A", "https://a.example", "x"),
+        Row(tags, "B", "https://b.example", "y"),
+        Row(tags, "C", "https://c.example", "x,y"),
+    ], tags)
+    f.remove_rows({0})
+    assert len(f) == 2
+    assert f.match(["x"]) == {1}
+    assert f.match(["y"]) == {0, 1}
+
+    f.append_row(Row(tags, "D", "https://d.example", "x"))
+    assert f.match(["x"]) == {1, 2}
+
+
+def test_match_folder_substring_narrows_and_loosens():
+    f = BookmarkFilter([
+        BookmarkRecord("A", "https://a.example", folder="BookmarksBar/News"),
+        BookmarkRecord("B", "https://b.example", folder="BookmarksBar/News/Local"),
+        BookmarkRecord("C", "https://c.example", folder="Menu"),
+    ])
+    assert f.match(folder_substring="bookmarksbar/news") == {0, 1}
+    assert f.match(folder_substring="bookmarksbar/news/l") == {1}
+    assert f.match(folder_substring="menu") == {2}
+    f.remove_rows({0})
+    assert f.match(folder_substring="news") == {0}
+
+
+def test_trigram_prefilter_matches_full_scan(monkeypatch):
+    import services.bookmark_filter as bookmark_filter
+    monkeypatch.setattr(bookmark_filter, "INDEX_MIN_ROWS", 0)
+    rows = [
+        BookmarkRecord(f"Page {i} about {topic}", f"https://{topic}.example/{i}/k%C3%B6ln")
+        for i, topic in enumerate(["python", "qt", "rust", "python qt"] * 10)
+    ]
+    f = BookmarkFilter(rows)
+    assert f.install_search_index(f.search_index_job()())
+
+    def scan(url="", name=""):
+        expected = BookmarkFilter(rows)
+        monkeypatch.setattr(bookmark_filter, "INDEX_MIN_ROWS", 10**9)
+        result = expected.match(url_substring=url, name_substring=name)
+        monkeypatch.setattr(bookmark_filter, "INDEX_MIN_ROWS", 0)
+        return result
+
+    for url, name in [("python", ""), ("köln", ""), ("k%c3%b6", ""), ("", "about python"),
+                      ("", "py"), ("qt.ex", "page 1"), ("", "nothing")]:
+        assert f.match(url_substring=url, name_substring=name) == scan(url, name), (url, name)
+
+    # an index built before an edit is stale and not installed
+    stale = f.search_index_job()
+    f.update_row(1, rows[1])
+    assert not f.install_search_index(stale())
+
+    # the installed index follows edits and removals
+    rows[3] = BookmarkRecord("Renamed", "https://renamed.example")
+    f.update_row(3, rows[3])
+    del rows[0]
+    f.remove_rows({0})
+    rows.append(BookmarkRecord("Appended python", "https://new.example"))
+    f.append_row(rows[-1])
+    for url, name in [("renamed", ""), ("", "renamed"), ("", "python"), ("rust.ex", "")]:
+        assert f.match(url_substring=url, name_substring=name) == scan(url, name), (url, name)
+
+
+def test_modifying_a_result_does_not_leak_into_narrowing(tags):
+    rows = [Row(tags, "alpha", "https://a", "x"), Row(tags, "beta", "https://b", "x")]
+    f = BookmarkFilter(rows, tags)
+    visible = f.match(name_substring="alpha")
+    assert visible == {0}
+    # Table.show_row unhides a row outside the filter result
+    visible.add(1)
+    assert f.match(["x"], name_substring="alpha") == {0}
@@ -0,0 +1,51 @@
+from services.bookmark_store import BookmarkRecord, BookmarkStore
+from services.tag_dictionary import TagDictionary
+from ui.bookmark_model import COL_TAGS, BookmarkTableModel, diff_rows
+
+
+def row(tags, name, url, *tag_names):
+    return BookmarkRecord(name=name, url=url, tags=tags.ids_of(tag_names))
+
+
+def test_diff_rows_matches_by_url():
+    tags = TagDictionary()
+    old = [row(tags, "A", "https://a"), row(tags, "B", "https://b"), row(tags, "C", "https://c", "x")]
+    new = [row(tags, "A", "https://a"), row(tags, "C", "https://c", "x", "y"), row(tags, "D", "https://d")]
+
+    diff = diff_rows(old, new)
+    assert diff.added == [row(tags, "D", "https://d")]
+    assert diff.removed == {1}
+    assert diff.changed == [(2, row(tags, "C", "https://c", "x", "y"))]
+    assert len(diff) == 3
+
+
+def test_diff_rows_handles_duplicate_urls():
+    tags = TagDictionary()
+    old = [row(tags, "A", "https://a"), row(tags, "A copy", "https://a")]
+    new = [row(tags, "A", "https://a")]
+
+    diff = diff_rows(old, new)
+    assert diff.removed == {1}
+    assert not diff.added and not diff.changed
+
+
+def test_model_removes_blocks_of_rows():
+    tags = TagDictionary()
+    model = BookmarkTableModel([row(tags, str(i), f"https://{i}") for i in range(6)], tags)
+    model.remove_rows({0, 1, 3, 5})
+    assert [r.name for r in model.rows] == ["2", "4"]
+
+    model.append_rows([row(tags, "6", "https://6")])
+    assert model.rowCount() == 3
+
+
+def test_model_shares_the_store_records():
+    tags = TagDictionary()
+    store = BookmarkStore([row(tags, "A", "https://a", "x")], tags)
+    model = BookmarkTableModel(store.records, tags)
+    model.append_rows([row(tags, "B", "https://b")])
+    model.set_tags(0, tags.ids_of(["x", "y"]))
+
+    assert [r.name for r in store] == ["A", "B"]
+    assert store.tags_text(store[0]) == "x,y"
+    assert model.data(model.index(0, COL_TAGS)) == "x,y"
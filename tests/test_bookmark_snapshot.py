@@ -0,0 +1,51 @@
+import os
+import plistlib
+
+from services.bookmark_snapshot import SnapshotCache, file_signature
+
+
+def touch_later(path):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_snapshot_is_shared_until_file_changes(tmp_path):
+    plist_path = tmp_path / "Bookmarks.plist"
+    plist_path.write_bytes(plistlib.dumps({"urls": ["a"]}))
+    cache = SnapshotCache(lambda p: plistlib.loads(p.read_bytes())["urls"])
+
+    first = cache.get(plist_path)
+    assert cache.get(plist_path) is first
+    assert first.bookmarks == ("a",)
+    assert cache.parse_count == 1
+
+    plist_path.write_bytes(plistlib.dumps({"urls": ["a", "b"]}))
+    touch_later(plist_path)
+    second = cache.get(plist_path)
+    assert second is not first
+    assert second.bookmarks == ("a", "b")
+    assert cache.parse_count == 2
+
+
+def test_snapshot_missing_file_is_empty(tmp_path):
+    cache = SnapshotCache(lambda p: ["never"])
+    snapshot = cache.get(tmp_path / "missing.plist")
+    assert snapshot.bookmarks == ()
+    assert snapshot.signature is None
+    assert file_signature(tmp_path / "missing.plist") is None
+
+
+def test_derive_computes_once_per_snapshot(tmp_path):
+    plist_path = tmp_path / "Bookmarks.plist"
+    plist_path.write_bytes(b"x")
+    cache = SnapshotCache(lambda p: [1, 2, 3])
+    calls = []
+
+    def total(snapshot):
+        calls.append(1)
+        return sum(snapshot.bookmarks)
+
+    snapshot = cache.get(plist_path)
+    assert snapshot.derive("total", total) == 6
+    assert cache.get(plist_path).derive("total", total) == 6
+    assert len(calls) == 1
@@ -1,61 +1,51 @@
-from dataclasses import dataclass
+import os
+import sys
 
-import pytest
-from PySide6.QtCore import QCoreApplication
+from conftest import write_plist
+from services.bookmark_status import BookmarkIndex, BookmarkStatus, base_domain
 
-from services.bookmark_status import BookmarkStatus, base_domain
 
+def standin(answer: str) -> list[str]:
+    """Command of a local helper answering every request line with `answer`."""
+    script = f"import sys\nfor _ in sys.stdin:\n    print({answer!r}, flush=True)\n"
+    return [sys.executable, "-u", "-c", script]
 
-@pytest.fixture(scope="session", autouse=True)
-def qt_app():
-    """Instantiate a QCoreApplication each time test is run."""
-    app = QCoreApplication.instance()
-    if app is None:
-        app = QCoreApplication([])
-    return app
 
+def probe(bs, wait_until, force=False):
+    """Run one asynchronous status probe to completion."""
+    bs.check_frontmost_url_changed(force=force)
+    assert wait_until(lambda: not bs.session.busy and not bs.index_loader.running)
 
-@dataclass
-class FakeResult:
-    returncode: int
-    stdout: str = ""
 
-
-def test_applescript_error_emits_error(monkeypatch):
+def test_applescript_error_emits_error(wait_until):
     """
     Assert that apple script error is correctly caught.
     """
-    bs = BookmarkStatus()
+    # a helper that exits immediately (also after the automatic restart)
+    bs = BookmarkStatus(command=[sys.executable, "-c", "pass"])
     emitted = []
     bs.bookmark_checked.connect(emitted.append)
 
-    # monkeypatch guarantees that subprocess.run() in services.bookmark_status
-    # will always return a returncode=1 (error)
-    monkeypatch.setattr(
-        "services.bookmark_status.subprocess.run",
-        lambda *args, **kwargs: FakeResult(returncode=1, stdout=""),
-    )
-
     # calling check_frontmost_url_changed(), it is expected that last emittet Signal 
     # is "error", i.e. error is caught and asserted
-    bs.check_frontmost_url_changed()
+    probe(bs, wait_until)
     assert emitted[-1] == "error"
+    assert bs.session.starts == 2
+    bs.stop()
 
 
-def test_no_window_emits_none(monkeypatch):
+def test_no_window_emits_none(wait_until):
     """Make sure check_frontmost_url_changed correctly catches the case 
     where no Safari window is open."""
-    bs = BookmarkStatus()
+    bs = BookmarkStatus(command=standin("NO_WINDOW"))
     emitted = []
     bs.bookmark_checked.connect(emitted.append)
 
-    monkeypatch.setattr(
-        "services.bookmark_status.subprocess.run",
-        lambda *args, **kwargs: FakeResult(returncode=0, stdout="NO_WINDOW\n"),
-    )
-
-    bs.check_frontmost_url_changed()
+    probe(bs, wait_until)
     assert emitted[-1] is None
+    # nothing to watch -> poll less often
+    assert bs.poll_interval_ms == BookmarkStatus.MAX_POLL_INTERVAL_MS
+    bs.stop()
 
 
 def test_base_domain_ignores_common_inserts():
@@ -68,15 +58,11 @@ def test_base_domain_ignores_common_inserts():
     assert base_domain("192.168.0.1") == "192.168.0.1"
 
 
-def test_force_recheck_runs_even_if_url_same(monkeypatch):
-    bs = BookmarkStatus()
+def test_force_recheck_runs_even_if_url_same(monkeypatch, wait_until):
+    bs = BookmarkStatus(command=standin("https://example.com"))
     emitted = []
     bs.bookmark_checked.connect(emitted.append)
 
-    # first run sets last_url_checked/state
-    def fake_run(*_args, **_kwargs):
-        return FakeResult(returncode=0, stdout="https://example.com\n")
-
     called = {"checks": 0}
 
     def fake_check(url):
@@ -84,12 +70,70 @@ def test_force_recheck_runs_even_if_url_same(monkeypatch):
         bs.last_url_state = "none"
         bs.bookmark_checked.emit("none")
 
-    monkeypatch.setattr("services.bookmark_status.subprocess.run", fake_run)
     monkeypatch.setattr(bs, "check_bookmark_existence", fake_check)
 
-    bs.check_frontmost_url_changed()
+    # first run sets last_url_checked/state
+    probe(bs, wait_until)
     assert called["checks"] == 1
 
     # Without force, same URL would short-circuit; force=True must re-run
-    bs.check_frontmost_url_changed(force=True)
+    probe(bs, wait_until, force=True)
     assert called["checks"] == 2
+    # both polls were answered by the same helper process
+    assert bs.session.starts == 1
+    bs.stop()
+
+
+def test_poll_interval_adapts_to_url_changes(monkeypatch, wait_until):
+    bs = BookmarkStatus(command=standin("https://example.com"))
+    monkeypatch.setattr(bs, "check_bookmark_existence", lambda url: setattr(bs, "last_url_state", "none"))
+
+    probe(bs, wait_until)
+    # URL just changed -> tighten
+    assert bs.poll_interval_ms == BookmarkStatus.MIN_POLL_INTERVAL_MS
+
+    probe(bs, wait_until)
+    probe(bs, wait_until)
+    # URL stable -> back off
+    assert bs.poll_interval_ms > BookmarkStatus.MIN_POLL_INTERVAL_MS
+    bs.stop()
+
+
+def test_probe_is_skipped_while_previous_one_runs():
+    bs = BookmarkStatus(command=standin("https://example.com"))
+    bs.check_frontmost_url_changed()
+    assert bs.session.busy
+    assert bs.session.request() is False
+    bs.stop()
+
+
+def test_bookmark_index_full_and_domain_matches():
+    index = BookmarkIndex(["https://www.example.com/caf%C3%A9/?q=1"])
+    assert index.lookup("https://example.com/café?q=1") == "full"
+    assert index.lookup("https://example.com/other") == "domain"
+    assert index.lookup("https://other.org/") == "none"
+
+
+def test_check_bookmark_existence_follows_plist_changes(tmp_path, wait_until):
+    plist_path = tmp_path / "Bookmarks.plist"
+    write_plist(plist_path, ["https://example.com/a"])
+    bs = BookmarkStatus()
+    bs.plist_path = plist_path
+    emitted = []
+    bs.bookmark_checked.connect(emitted.append)
+
+    # first lookup indexes the plist in the background
+    bs.check_bookmark_existence("https://example.org/")
+    assert wait_until(lambda: emitted)
+    assert emitted[-1] == "none"
+
+    # unchanged plist -> answered synchronously from the index
+    bs.check_bookmark_existence("https://example.com/a")
+    assert emitted[-1] == "full"
+
+    write_plist(plist_path, ["https://example.com/a", "https://example.org/"])
+    st = plist_path.stat()
+    os.utime(plist_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    bs.check_bookmark_existence("https://example.org/")
+    assert wait_until(lambda: len(emitted) == 3)
+    assert emitted[-1] == "full"
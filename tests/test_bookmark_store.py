@@ -0,0 +1,53 @@
+from helper_functions import SafariBookmarks
+from services.bookmark_store import BookmarkStore
+from services.tag_dictionary import TagDictionary
+
+
+def test_store_merges_bookmarks_with_tags():
+    bookmarks = [
+        SafariBookmarks("Docs", "https://docs.example", uuid="1", folder="BookmarksBar"),
+        SafariBookmarks("", "https://untitled.example", uuid="2", folder="BookmarksBar"),
+    ]
+    tags = TagDictionary()
+    store = BookmarkStore.from_bookmarks(bookmarks, {"https://docs.example": ["python", "docs"]}, tags)
+
+    assert len(store) == 2
+    assert tags.names_of(store[0].tags) == ["python", "docs"]
+    assert store.tags_text(store[0]) == "python,docs"
+    # untitled bookmarks are shown with their URL
+    assert store[1].name == "https://untitled.example"
+    assert store[1].tags == ()
+    assert store.all_tags() == {"python", "docs"}
+    assert not hasattr(store[0], "__dict__")
+
+
+def test_tag_dictionary_assigns_case_insensitive_ids():
+    tags = TagDictionary()
+    assert tags.ids_of(["Python", " docs", "python", ""]) == (0, 1)
+    assert tags.id_of("PYTHON") == 0
+    assert tags.lookup("DOCS") == 1
+    assert tags.lookup("unknown") is None
+    # the spelling seen last is the one displayed
+    assert tags.text_of((1, 0)) == "docs,PYTHON"
+    assert len(tags) == 2
+    # e.g. tags.json now stores "Python" only
+    tags.ids_of(["Python"])
+    assert tags.name_of(0) == "Python"
+
+
+def test_duplicate_names_are_numbered():
+    bookmarks = [
+        SafariBookmarks("Docs", "https://a.example"),
+        SafariBookmarks("Docs", "https://b.example"),
+        SafariBookmarks("Docs (2)", "https://c.example"),
+        SafariBookmarks("Docs", "https://d.example"),
+    ]
+    store = BookmarkStore.from_bookmarks(bookmarks, {}, TagDictionary())
+    assert [record.name for record in store] == ["Docs", "Docs (2)", "Docs (2) (2)", "Docs (3)"]
+
+    # rows added later continue the numbering of the existing ones
+    taken = {record.name: 2 for record in store}
+    added = BookmarkStore.from_bookmarks(
+        [SafariBookmarks("Docs", "https://e.example")], {}, TagDictionary(), taken
+    )
+    assert added[0].name == "Docs (4)"
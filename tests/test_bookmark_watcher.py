@@ -0,0 +1,133 @@
+import gc
+import os
+import time
+
+import pytest
+from PySide6.QtCore import QThreadPool
+
+from conftest import write_plist
+from services.bookmark_snapshot import content_fingerprint
+from services.bookmark_watcher import BookmarkWatcher
+
+
+@pytest.fixture(autouse=True)
+def collect_watchers(qt_app):
+    yield
+    # let running loads finish and deliver their results, then free the
+    # watchers (reference cycles) here on the GUI thread rather than on a
+    # worker thread that happens to trigger the next collection
+    QThreadPool.globalInstance().waitForDone()
+    qt_app.processEvents()
+    gc.collect()
+
+
+def replace_plist(path, urls):
+    """Rewrite the plist the way Safari does: write a new file, rename it over."""
+    tmp = path.with_suffix(".tmp")
+    write_plist(tmp, urls)
+    st = path.stat()
+    os.replace(tmp, path)
+    # make sure the change is visible even on coarse mtime resolution
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def make_watcher(tmp_path, wait_until):
+    plist_path = tmp_path / "Bookmarks.plist"
+    write_plist(plist_path, ["https://a.example"])
+    watcher = BookmarkWatcher(str(plist_path), quiet_ms=20)
+    assert wait_until(lambda: watcher.old_data is not None)
+    return plist_path, watcher
+
+
+def idle(watcher):
+    return not watcher.quiet_timer.isActive() and not watcher.loader.running
+
+
+def test_burst_of_change_events_is_parsed_once(tmp_path, wait_until):
+    plist_path, watcher = make_watcher(tmp_path, wait_until)
+    changes = []
+    watcher.bookmarks_changed.connect(changes.append)
+
+    replace_plist(plist_path, ["https://a.example", "https://b.example"])
+    for _ in range(5):
+        watcher.on_changed(str(plist_path))
+
+    assert wait_until(lambda: changes)
+    assert wait_until(lambda: idle(watcher))
+    assert watcher.events_received >= 5
+    assert watcher.parses == 2  # initial load + one for the burst
+    assert [bm.url for bm in changes[0].added] == ["https://b.example"]
+
+
+def test_identical_content_is_not_parsed_and_watch_is_rearmed(tmp_path, wait_until):
+    plist_path, watcher = make_watcher(tmp_path, wait_until)
+    changes = []
+    watcher.bookmarks_changed.connect(changes.append)
+
+    replace_plist(plist_path, ["https://a.example"])
+    watcher.on_changed(str(plist_path))
+
+    assert wait_until(lambda: watcher.skipped == 1)
+    assert wait_until(lambda: idle(watcher))
+    assert watcher.parses == 1
+    assert changes == []
+    assert str(plist_path) in watcher.watcher.files()
+
+
+def test_change_before_first_reload_is_reported(tmp_path, wait_until):
+    plist_path = tmp_path / "Bookmarks.plist"
+    write_plist(plist_path, ["https://a.example"])
+    watcher = BookmarkWatcher(str(plist_path), quiet_ms=20)
+    changes = []
+    watcher.bookmarks_changed.connect(changes.append)
+
+    # the baseline was read on the worker, but has not reached the watcher
+    # yet: no event loop ran since the watcher was created
+    deadline = time.monotonic() + 5
+    while watcher.fingerprint is None and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert not watcher.baseline_ready
+    replace_plist(plist_path, ["https://a.example", "https://b.example"])
+    # quiet time over: the load waits for the baseline
+    watcher.on_quiet()
+    assert watcher.change_waiting
+
+    assert wait_until(lambda: changes)
+    assert [bm.url for bm in changes[0].added] == ["https://b.example"]
+
+
+def test_directory_is_only_watched_while_the_plist_is_missing(tmp_path, wait_until):
+    plist_path, watcher = make_watcher(tmp_path, wait_until)
+    changes = []
+    watcher.bookmarks_changed.connect(changes.append)
+    assert watcher.watcher.files() == [str(plist_path)]
+    assert watcher.watcher.directories() == []
+
+    plist_path.unlink()
+    assert wait_until(lambda: watcher.watcher.directories() == [str(tmp_path)])
+
+    write_plist(plist_path, ["https://a.example", "https://b.example"])
+    assert wait_until(lambda: changes)
+    assert watcher.watcher.files() == [str(plist_path)]
+    assert watcher.watcher.directories() == []
+    assert [bm.url for bm in changes[0].added] == ["https://b.example"]
+
+
+def test_baseline_can_be_retaken(tmp_path, wait_until):
+    plist_path, watcher = make_watcher(tmp_path, wait_until)
+    changes = []
+    watcher.bookmarks_changed.connect(changes.append)
+    fingerprints = []
+    watcher.baseline_loaded.connect(fingerprints.append)
+
+    # e.g. the baseline came from a cache that turned out to be stale
+    write_plist(plist_path, ["https://a.example", "https://b.example"])
+    watcher.load_baseline()
+    assert wait_until(lambda: watcher.baseline_ready)
+    assert fingerprints == [content_fingerprint(plist_path)]
+    assert [bm.url for bm in watcher.old_data] == ["https://a.example", "https://b.example"]
+
+    replace_plist(plist_path, ["https://a.example", "https://b.example", "https://c.example"])
+    watcher.on_changed(str(plist_path))
+    assert wait_until(lambda: changes)
+    assert [bm.url for bm in changes[0].added] == ["https://c.example"]
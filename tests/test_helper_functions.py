@@ -1,4 +1,5 @@
 import json
+import os
 import plistlib
 from pathlib import Path
 
@@ -38,7 +39,41 @@ def test_load_safari_bookmarks_corrupt(tmp_path):
     assert bookmarks == []
 
 
-def test_build_table_dict_disambiguates_names(tmp_path, monkeypatch):
+def test_parse_safari_bookmarks_reads_uuid_and_folder(tmp_path):
+    plist_root = {
+        "Children": [
+            {
+                "WebBookmarkType": "WebBookmarkTypeList",
+                "Title": "BookmarksBar",
+                "Children": [
+                    {
+                        "WebBookmarkType": "WebBookmarkTypeList",
+                        "Title": "News",
+                        "Children": [
+                            {
+                                "WebBookmarkType": "WebBookmarkTypeLeaf",
+                                "WebBookmarkUUID": "ABC-1",
+                                "URLString": "https://example.com",
+                                "URIDictionary": {"title": "Example"},
+                            }
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+    plist_path = tmp_path / "Bookmarks.plist"
+    with plist_path.open("wb") as f:
+        plistlib.dump(plist_root, f)
+
+    assert hf.parse_safari_bookmarks(plist_path) == [
+        hf.SafariBookmarks(
+            name="Example", url="https://example.com", uuid="ABC-1", folder="BookmarksBar/News"
+        )
+    ]
+
+
+def test_build_bookmark_store_disambiguates_names(tmp_path, monkeypatch):
     plist_path = make_plist(
         tmp_path,
         [
@@ -53,11 +88,11 @@ def test_build_table_dict_disambiguates_names(tmp_path, monkeypatch):
     monkeypatch.setattr(hf, "BOOKMARKS_PLIST", plist_path)
     monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
 
-    table = hf.build_table_dict()
-    assert "Example" in table
-    assert "Example (2)" in table
-    assert table["Example"]["url"] == "https://example.com"
-    assert table["Example (2)"]["url"] == "https://example.org"
+    store = hf.build_bookmark_store()
+    assert [(record.name, record.url) for record in store] == [
+        ("Example", "https://example.com"),
+        ("Example (2)", "https://example.org"),
+    ]
 
 
 def test_load_tags_filters_unknown_urls(tmp_path, monkeypatch):
@@ -124,3 +159,108 @@ def test_load_tags_prunes_deleted_bookmarks(tmp_path, monkeypatch):
     assert json.loads(tags_json.read_text(encoding="utf-8")) == {
         "https://example.com": ["tag1"]
     }
+
+
+def test_save_tags_writes_compact_json_atomically(tmp_path, monkeypatch):
+    tags_json = tmp_path / "tags.json"
+    tags_json.write_text('{"https://old.example": ["x"]}', encoding="utf-8")
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+
+    hf.save_tags({"https://example.com": ["tag1", "Köln"]})
+
+    assert tags_json.read_text(encoding="utf-8") == '{"https://example.com":["tag1","Köln"]}'
+    # no temp files are left behind
+    assert [p.name for p in tmp_path.iterdir()] == ["tags.json"]
+
+
+def test_load_tags_replays_journal_and_save_tags_clears_it(tmp_path, monkeypatch):
+    tags_json = tmp_path / "tags.json"
+    tags_json.write_text('{"https://a": ["x", "y"]}', encoding="utf-8")
+    journal = tmp_path / "tags.journal.jsonl"
+    journal.write_text(
+        '{"op":"add","url":"https://b","tags":["z"]}\n'
+        '{"op":"remove","url":"https://a","tags":["x"]}\n',
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+
+    tags = hf.load_tags()
+    assert tags == {"https://a": ["y"], "https://b": ["z"]}
+
+    hf.save_tags(tags)
+    assert not journal.exists()
+    assert hf.load_tags() == tags
+
+
+def test_switching_tag_backends_carries_the_tags_over(tmp_path, monkeypatch):
+    tags_json = tmp_path / "tags.json"
+    tags_json.write_text('{"https://a": ["x"]}', encoding="utf-8")
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+
+    # first use of sqlite migrates tags.json
+    hf.switch_tags_backend("sqlite")
+    assert hf.load_tags(backend="sqlite") == {"https://a": ["x"]}
+    hf.save_tags({"https://a": ["x", "y"]}, backend="sqlite")
+
+    # back to json: the database's edits are exported to tags.json
+    hf.switch_tags_backend("json")
+    assert json.loads(tags_json.read_text(encoding="utf-8")) == {"https://a": ["x", "y"]}
+    hf.save_tags({"https://b": ["z"]}, backend="json")
+
+    # and to sqlite again: the tags.json edits are imported
+    hf.switch_tags_backend("sqlite")
+    assert hf.load_tags(backend="sqlite") == {"https://b": ["z"]}
+    assert (tmp_path / "tags.backend").read_text(encoding="utf-8") == "sqlite"
+
+
+def test_tags_are_only_carried_over_on_a_backend_switch(tmp_path, monkeypatch):
+    tags_json = tmp_path / "tags.json"
+    tags_json.write_text('{"https://a": ["x"]}', encoding="utf-8")
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+    hf.switch_tags_backend("sqlite")
+    hf.load_tags(backend="sqlite")
+    hf.save_tags({"https://a": ["x", "y"]}, backend="sqlite")
+    hf.switch_tags_backend("json")
+
+    # a tags.json restored from a backup stays, however old it is
+    tags_json.write_text('{"https://restored": ["r"]}', encoding="utf-8")
+    os.utime(tags_json, ns=(0, 0))
+    hf.switch_tags_backend("json")
+    assert hf.load_tags(backend="json") == {"https://restored": ["r"]}
+
+    # without a record of the last backend nothing is overwritten
+    (tmp_path / "tags.backend").unlink()
+    hf.switch_tags_backend("sqlite")
+    assert hf.load_tags(backend="sqlite") == {"https://a": ["x", "y"]}
+
+
+def test_load_config_merges_sections_with_defaults(tmp_path, monkeypatch):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps({"colors": {"col_name": "#000000"}, "search": {"debounce_ms": 5}}),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(hf, "CONFIG_PATH", config_path)
+
+    cfg = hf.load_config()
+
+    assert cfg["colors"]["col_name"] == "#000000"
+    assert cfg["colors"]["col_url"] == hf.DEFAULT_CONFIG["colors"]["col_url"]
+    assert cfg["search"]["debounce_ms"] == 5
+    # defaults must not be modified by loading a config
+    assert hf.DEFAULT_CONFIG["colors"]["col_name"] == "#cfffed"
+
+
+def test_load_config_ignores_sections_of_the_wrong_type(tmp_path, monkeypatch):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps({"colors": "dark", "search": None, "watcher": {"quiet_ms": 50}}),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(hf, "CONFIG_PATH", config_path)
+
+    cfg = hf.load_config()
+
+    assert cfg["colors"] == hf.DEFAULT_CONFIG["colors"]
+    assert cfg["search"] == hf.DEFAULT_CONFIG["search"]
+    assert cfg["watcher"]["quiet_ms"] == 50
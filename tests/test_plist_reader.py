@@ -0,0 +1,107 @@
+import plistlib
+
+import pytest
+
+from services.plist_reader import PlistBookmark, iter_plist_bookmarks
+
+
+def leaf(url, title, uuid=""):
+    node = {"WebBookmarkType": "WebBookmarkTypeLeaf", "URLString": url, "URIDictionary": {"title": title}}
+    if uuid:
+        node["WebBookmarkUUID"] = uuid
+    return node
+
+
+def folder(title, children):
+    return {"WebBookmarkType": "WebBookmarkTypeList", "Title": title, "Children": children}
+
+
+ROOT = {
+    "WebBookmarkFileVersion": 1,
+    "Sync": {"Data": b"\x00" * 4096, "ServerVersion": "abc"},
+    "Children": [
+        folder("BookmarksBar", [
+            leaf("https://a.example", "A", "U-A"),
+            folder("News", [leaf("https://news.example", "Nachrichten – Köln")]),
+            # older structure: title on the leaf itself
+            {"WebBookmarkType": "WebBookmarkTypeLeaf", "URLString": "https://old.example", "Title": "Old"},
+        ]),
+        folder("com.apple.ReadingList", [
+            dict(leaf("https://read.example", "Read"), ReadingList={"PreviewText": "x" * 500}),
+        ]),
+        leaf("https://top.example", "", "U-TOP"),
+    ],
+}
+
+EXPECTED = [
+    PlistBookmark("https://a.example", "A", "U-A", "BookmarksBar"),
+    PlistBookmark("https://news.example", "Nachrichten – Köln", "", "BookmarksBar/News"),
+    PlistBookmark("https://old.example", "Old", "", "BookmarksBar"),
+    PlistBookmark("https://read.example", "Read", "", "com.apple.ReadingList"),
+    PlistBookmark("https://top.example", "", "U-TOP", ""),
+]
+
+
+@pytest.mark.parametrize("fmt", [plistlib.FMT_BINARY, plistlib.FMT_XML])
+def test_reads_leaves_with_folders_in_file_order(tmp_path, fmt):
+    plist_path = tmp_path / "Bookmarks.plist"
+    plist_path.write_bytes(plistlib.dumps(ROOT, fmt=fmt))
+    assert list(iter_plist_bookmarks(plist_path)) == EXPECTED
+
+
+@pytest.mark.parametrize("fmt", [plistlib.FMT_BINARY, plistlib.FMT_XML])
+def test_large_plists_with_wide_references(tmp_path, fmt):
+    # > 255 objects and long strings need multi-byte refs and lengths
+    children = [leaf(f"https://example.com/{i}/" + "p" * 40, f"Title {i}", f"U{i}") for i in range(700)]
+    plist_path = tmp_path / "Bookmarks.plist"
+    plist_path.write_bytes(plistlib.dumps({"Children": [folder("Many", children)]}, fmt=fmt))
+
+    bookmarks = list(iter_plist_bookmarks(plist_path))
+
+    assert len(bookmarks) == 700
+    assert bookmarks[699] == PlistBookmark(
+        "https://example.com/699/" + "p" * 40, "Title 699", "U699", "Many"
+    )
+
+
+def test_binary_dict_keys_that_are_not_strings_are_skipped(tmp_path):
+    node = dict(leaf("https://a.example", "A", "U-A"), Z="value")
+    data = plistlib.dumps({"Children": [node]}, fmt=plistlib.FMT_BINARY)
+    # turn the one-letter ASCII key "Z" into the 1-byte integer 5
+    assert data.count(b"\x51Z") == 1
+    plist_path = tmp_path / "Bookmarks.plist"
+    plist_path.write_bytes(data.replace(b"\x51Z", b"\x10\x05"))
+
+    assert list(iter_plist_bookmarks(plist_path)) == [
+        PlistBookmark("https://a.example", "A", "U-A", "")
+    ]
+
+
+def test_deep_folders_do_not_hit_the_recursion_limit(tmp_path):
+    # plistlib cannot write this deep a plist either -> write the XML by hand
+    depth = 900
+    opening = "<dict><key>Title</key><string>f</string><key>Children</key><array>"
+    closing = "</array></dict>"
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8"?><plist version="1.0">'
+        "<dict><key>Children</key><array>"
+        + opening * depth
+        + "<dict><key>WebBookmarkType</key><string>WebBookmarkTypeLeaf</string>"
+        "<key>URLString</key><string>https://deep.example</string></dict>"
+        + closing * depth
+        + "</array></dict></plist>"
+    )
+    plist_path = tmp_path / "Bookmarks.plist"
+    plist_path.write_text(xml, encoding="utf-8")
+
+    [bookmark] = iter_plist_bookmarks(plist_path)
+    assert bookmark.url == "https://deep.example"
+    assert bookmark.folder == "/".join(["f"] * depth)
+
+
+@pytest.mark.parametrize("content", [b"", b"not a plist", b"bplist00" + b"\x00" * 10])
+def test_corrupt_files_raise_value_error(tmp_path, content):
+    plist_path = tmp_path / "Bookmarks.plist"
+    plist_path.write_bytes(content)
+    with pytest.raises(ValueError):
+        list(iter_plist_bookmarks(plist_path))
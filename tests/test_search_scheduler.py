@@ -0,0 +1,40 @@
+import time
+
+from PySide6.QtCore import QCoreApplication
+
+from ui.search_scheduler import SearchScheduler
+
+
+def wait_for_timer(scheduler, timeout_s=2.0):
+    deadline = time.monotonic() + timeout_s
+    while scheduler.pending and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.001)
+
+
+def test_burst_of_edits_runs_once():
+    seen = []
+    text = {"value": ""}
+    scheduler = SearchScheduler(lambda: seen.append(text["value"]), debounce_ms=5)
+
+    for value in ("h", "ht", "htt", "http"):
+        text["value"] = value
+        scheduler.schedule()
+    wait_for_timer(scheduler)
+
+    # only the latest query is evaluated
+    assert seen == ["http"]
+    assert scheduler.evaluations == 1
+
+
+def test_flush_runs_pending_evaluation_immediately():
+    seen = []
+    scheduler = SearchScheduler(lambda: seen.append(1), debounce_ms=10_000)
+
+    scheduler.flush()
+    assert seen == []
+
+    scheduler.schedule()
+    scheduler.flush()
+    assert seen == [1]
+    assert not scheduler.pending
@@ -0,0 +1,189 @@
+from PySide6.QtWidgets import QLineEdit
+
+from helper_functions import SafariBookmarks
+from services.bookmark_diff import BookmarkChangeSet
+from services.bookmark_store import BookmarkRecord, BookmarkStore
+from services.tag_dictionary import TagDictionary
+from ui.table import Table
+
+
+def row(tags, name, url, *tag_names, folder="BookmarksBar"):
+    return BookmarkRecord(name=name, url=url, tags=tags.ids_of(tag_names), folder=folder)
+
+
+def bm(name, url, folder="BookmarksBar"):
+    return SafariBookmarks(name=name, url=url, uuid=url, folder=folder)
+
+
+def make_table(*records, tags=None):
+    tags = tags or TagDictionary()
+    store = BookmarkStore([row(tags, *record) for record in records], tags)
+    return Table(store, QLineEdit(), QLineEdit(), QLineEdit())
+
+
+def shown(table):
+    """Names of the rows the filter lets through, in table order."""
+    return [table.row_data(r).name for r in sorted(table.visible_rows)]
+
+
+def check_consistent(table):
+    """url_index, visible_rows and the view agree with the model rows."""
+    rows = table.model.rows
+    expected: dict[str, list[int]] = {}
+    for r, record in enumerate(rows):
+        expected.setdefault(record.url, []).append(r)
+    assert table.url_index == expected
+    assert len(table.filter) == len(rows)
+    for r in range(len(rows)):
+        assert table.table.isRowHidden(r) == (r not in table.visible_rows)
+
+
+def test_insert_row_is_indexed_and_filtered():
+    table = make_table(("A", "https://a", "python"), ("B", "https://b", "docs"))
+    table.filter_table("python")
+    assert shown(table) == ["A"]
+
+    new_row = table.insert_row(row(table.store.tag_dictionary, "C", "https://c", "python"))
+    assert new_row == 2
+    assert table.row_of_url("https://c") == 2
+    assert shown(table) == ["A", "C"]
+    check_consistent(table)
+
+    table.insert_row(row(table.store.tag_dictionary, "D", "https://d", "docs"))
+    assert shown(table) == ["A", "C"]
+    check_consistent(table)
+
+
+def test_remove_row_moves_following_rows_up():
+    table = make_table(
+        ("A", "https://a", "python"), ("B", "https://b", "docs"), ("C", "https://c", "python"),
+    )
+    table.filter_table("python")
+
+    assert table.remove_row("https://a")
+    assert not table.remove_row("https://a")
+    assert [r.name for r in table.model.rows] == ["B", "C"]
+    assert table.rows_of_url("https://c") == [1]
+    assert shown(table) == ["C"]
+    check_consistent(table)
+
+
+def test_update_row_changes_url_and_tags():
+    table = make_table(("A", "https://a", "python"), ("B", "https://b", "docs"))
+    table.filter_table("python")
+
+    tags = table.store.tag_dictionary
+    assert table.update_row("https://b", url="https://b2", tags=tags.ids_of(["python"]))
+    assert not table.update_row("https://missing", name="X")
+    assert table.row_of_url("https://b") is None
+    assert table.row_of_url("https://b2") == 1
+    assert shown(table) == ["A", "B"]
+    check_consistent(table)
+
+    table.update_row("https://a", tags=())
+    assert shown(table) == ["B"]
+    check_consistent(table)
+
+
+def test_apply_store_patches_only_differing_rows():
+    table = make_table(*((str(i), f"https://{i}", "even" if i % 2 == 0 else "odd") for i in range(6)))
+    table.filter_table("even")
+    assert shown(table) == ["0", "2", "4"]
+
+    tags = table.store.tag_dictionary
+    records = list(table.model.rows)
+    records[1] = row(tags, "1", "https://1", "even")
+    del records[4]
+    records.append(row(tags, "6", "https://6", "even"))
+    table.apply_store(BookmarkStore(records, tags))
+
+    assert [r.name for r in table.model.rows] == ["0", "1", "2", "3", "5", "6"]
+    assert shown(table) == ["0", "1", "2", "6"]
+    check_consistent(table)
+
+
+def test_apply_store_reloads_when_most_rows_changed():
+    table = make_table(("A", "https://a", "python"), ("B", "https://b", "docs"))
+    table.filter_table("python")
+
+    tags = table.store.tag_dictionary
+    store = BookmarkStore(
+        [row(tags, "C", "https://c", "python"), row(tags, "D", "https://d", "docs")], tags,
+    )
+    table.apply_store(store)
+
+    assert table.store is store
+    assert shown(table) == ["C"]
+    check_consistent(table)
+
+
+def test_apply_bookmark_changes_patches_rows_by_url():
+    table = make_table(("A", "https://a", "python"), ("B", "https://b"), ("C", "https://c"))
+    table.filter_table("python")
+
+    changes = BookmarkChangeSet(
+        added=(bm("A", "https://d"),),
+        removed=(bm("B", "https://b"),),
+        retitled=((bm("C", "https://c"), bm("C new", "https://c")),),
+    )
+    added = table.apply_bookmark_changes(changes, {"https://a": ["python"], "https://d": ["python"]})
+
+    assert [r.name for r in table.model.rows] == ["A", "C new", "A (2)"]
+    assert [r.url for r in table.model.rows] == ["https://a", "https://c", "https://d"]
+    assert added == [2]
+    assert shown(table) == ["A", "A (2)"]
+    check_consistent(table)
+
+
+def test_apply_bookmark_changes_keeps_names_of_changed_urls():
+    table = make_table(("A", "https://a", "python"), ("A (2)", "https://b"))
+    table.filter_table("python")
+
+    changes = BookmarkChangeSet(url_changed=((bm("A", "https://a"), bm("A", "https://a2")),))
+    table.apply_bookmark_changes(changes, {"https://a2": ["python"]})
+
+    assert [r.name for r in table.model.rows] == ["A", "A (2)"]
+    assert table.row_of_url("https://a2") == 0
+    assert shown(table) == ["A"]
+    check_consistent(table)
+
+
+def test_untitled_bookmark_can_be_removed():
+    # an untitled bookmark shows its URL as name
+    table = make_table(("https://a", "https://a"), ("B", "https://b"))
+
+    table.apply_bookmark_changes(BookmarkChangeSet(removed=(bm("", "https://a"),)), {})
+
+    assert [r.name for r in table.model.rows] == ["B"]
+    assert shown(table) == ["B"]
+    check_consistent(table)
+
+
+def test_untitled_bookmark_can_be_renamed():
+    table = make_table(("https://a", "https://a"), ("B", "https://b"))
+
+    changes = BookmarkChangeSet(retitled=((bm("", "https://a"), bm("B", "https://a")),))
+    table.apply_bookmark_changes(changes, {})
+
+    assert [r.name for r in table.model.rows] == ["B (2)", "B"]
+    assert table.row_of_url("https://a") == 0
+    check_consistent(table)
+
+
+def test_moved_bookmark_gets_its_new_folder():
+    tags = TagDictionary()
+    store = BookmarkStore(
+        [row(tags, "A", "https://a", folder="Bar"), row(tags, "B", "https://b", folder="Bar")], tags,
+    )
+    table = Table(store, QLineEdit(), QLineEdit(), QLineEdit())
+    table.extended_search_line_folder.setText("other")
+    table.refresh_filter()
+    assert shown(table) == []
+
+    changes = BookmarkChangeSet(moved=((bm("B", "https://b", "Bar"), bm("B", "https://b", "Other")),))
+    table.apply_bookmark_changes(changes, {})
+
+    assert [r.folder for r in table.model.rows] == ["Bar", "Other"]
+    assert [r.name for r in table.model.rows] == ["A", "B"]
+    assert shown(table) == ["B"]
+    check_consistent(table)
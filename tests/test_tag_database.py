@@ -0,0 +1,49 @@
+from services.tag_database import TagDatabase, migrate_json_to_sqlite, tag_database_path
+
+
+def test_tag_database_path_sits_next_to_tags_json(tmp_path):
+    assert tag_database_path(tmp_path / "tags.json") == tmp_path / "tags.sqlite"
+
+
+def test_set_tags_upserts_and_deletes_single_rows(tmp_path):
+    with TagDatabase(tmp_path / "tags.sqlite") as db:
+        db.set_tags("https://a", ["Python", "docs"])
+        db.set_tags("https://b", ["python"])
+        db.set_tags("https://a", ["docs", "qt"])
+        assert db.load() == {"https://a": ["docs", "qt"], "https://b": ["python"]}
+
+        db.set_tags("https://b", [])
+        assert db.tags_of("https://b") == []
+        assert db.load() == {"https://a": ["docs", "qt"]}
+
+
+def test_tag_counts_and_and_queries_are_case_insensitive(tmp_path):
+    with TagDatabase(tmp_path / "tags.sqlite") as db:
+        db.set_many({
+            "https://a": ["Python", "docs"],
+            "https://b": ["python", "qt"],
+            "https://c": ["docs"],
+        })
+        assert db.tag_counts() == {"Python": 2, "docs": 2, "qt": 1}
+        assert db.urls_with_tags(["PYTHON"]) == {"https://a", "https://b"}
+        assert db.urls_with_tags(["python", "Docs"]) == {"https://a"}
+        assert db.urls_with_tags(["python", "unknown"]) == set()
+        assert db.urls_with_tags([]) == {"https://a", "https://b", "https://c"}
+        # the older spelling is no longer used -> the next one names the tag
+        db.set_tags("https://a", ["docs"])
+        assert db.tag_counts() == {"python": 1, "docs": 2, "qt": 1}
+
+
+def test_save_writes_the_difference_only(tmp_path):
+    with TagDatabase(tmp_path / "tags.sqlite") as db:
+        db.set_many({"https://a": ["x"], "https://b": ["y"]})
+        db.save({"https://a": ["x"], "https://c": ["z"]})
+        assert db.load() == {"https://a": ["x"], "https://c": ["z"]}
+
+
+def test_migrate_json_to_sqlite(tmp_path):
+    db_path = tmp_path / "tags.sqlite"
+    migrate_json_to_sqlite({"https://a": ["x", "y"], "https://b": []}, db_path)
+    assert [p.name for p in tmp_path.iterdir()] == ["tags.sqlite"]
+    with TagDatabase(db_path) as db:
+        assert db.load() == {"https://a": ["x", "y"]}
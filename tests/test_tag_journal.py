@@ -0,0 +1,48 @@
+from services.tag_journal import TagJournal, apply_ops, journal_path, read_ops
+
+
+def test_journal_path_sits_next_to_tags_json(tmp_path):
+    assert journal_path(tmp_path / "tags.json") == tmp_path / "tags.journal.jsonl"
+
+
+def test_apply_ops_is_idempotent():
+    ops = [
+        {"op": "add", "url": "https://a", "tags": ["x", "y"]},
+        {"op": "remove", "url": "https://a", "tags": ["x"]},
+        {"op": "add", "url": "https://b", "tags": ["z"]},
+        {"op": "remove", "url": "https://b", "tags": ["z"]},
+    ]
+    tag_map = {"https://a": ["w"]}
+    apply_ops(tag_map, ops)
+    assert tag_map == {"https://a": ["w", "y"]}
+    # replaying ops already contained in the snapshot changes nothing
+    apply_ops(tag_map, ops)
+    assert tag_map == {"https://a": ["w", "y"]}
+
+
+def test_apply_ops_compares_tags_case_insensitively():
+    tag_map = {"https://a": ["python", "Docs"]}
+    apply_ops(tag_map, [
+        {"op": "add", "url": "https://a", "tags": ["Python", "qt"]},
+        {"op": "remove", "url": "https://a", "tags": ["docs"]},
+    ])
+    assert tag_map == {"https://a": ["python", "qt"]}
+
+
+def test_append_counts_ops_and_skips_torn_lines(tmp_path):
+    journal = TagJournal(tmp_path / "tags.journal.jsonl", compact_after=3)
+    journal.append([{"op": "add", "url": "https://a", "tags": ["x"]}])
+    journal.append([
+        {"op": "add", "url": "https://b", "tags": ["y"]},
+        {"op": "remove", "url": "https://a", "tags": ["x"]},
+    ])
+    assert journal.ops == 3 and journal.due
+
+    # a crash while appending leaves half a line behind
+    with journal.path.open("a", encoding="utf-8") as file:
+        file.write('{"op":"add","url":"htt')
+    assert len(list(read_ops(journal.path))) == 3
+    assert TagJournal(journal.path).ops == 3
+
+    journal.reset()
+    assert journal.ops == 0 and not journal.path.exists()
@@ -0,0 +1,135 @@
+import json
+
+import helper_functions as hf
+from services.tag_database import TagDatabase
+from services.tag_repository import TagRepository
+
+
+def make_repository(tmp_path, monkeypatch, tags):
+    tags_json = tmp_path / "tags.json"
+    tags_json.write_text(json.dumps(tags), encoding="utf-8")
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+    return tags_json, TagRepository(delay_ms=10)
+
+
+def test_edits_are_announced_and_written_behind(tmp_path, monkeypatch, wait_until):
+    tags_json, repo = make_repository(tmp_path, monkeypatch, {"https://a": ["Python"]})
+    changed = []
+    repo.tags_changed.connect(changed.append)
+
+    repo.add_tags(["https://a", "https://b"], ["python", "docs"])
+    repo.remove_tags(["https://a"], ["DOCS"])
+
+    assert changed == [{"https://a", "https://b"}, {"https://a"}]
+    assert repo.tags_of("https://a") == ["Python"]
+    assert repo.tags_of("https://b") == ["python", "docs"]
+
+    assert wait_until(lambda: repo.writer.writes)
+    assert repo.writer.writes == 1
+    assert json.loads(tags_json.read_text(encoding="utf-8")) == repo.tag_map
+
+
+def test_own_writes_are_not_reloaded(tmp_path, monkeypatch):
+    tags_json, repo = make_repository(tmp_path, monkeypatch, {})
+    repo.add_tags(["https://a"], ["x"])
+    repo.flush()
+
+    repo.reload_if_changed()
+    assert repo.reloads == 0
+
+
+def test_external_change_is_reloaded(tmp_path, monkeypatch):
+    tags_json, repo = make_repository(tmp_path, monkeypatch, {"https://a": ["x"]})
+    changed = []
+    repo.tags_changed.connect(changed.append)
+
+    tags_json.write_text(json.dumps({"https://a": ["x"], "https://b": ["y"]}), encoding="utf-8")
+    repo.reload_if_changed()
+
+    assert repo.reloads == 1
+    assert changed == [{"https://b"}]
+    assert repo.tags_of("https://b") == ["y"]
+
+
+def test_prune_drops_tags_of_deleted_bookmarks(tmp_path, monkeypatch):
+    tags_json, repo = make_repository(tmp_path, monkeypatch, {"https://a": ["x"], "https://old": ["y"]})
+    repo.prune(["https://a"])
+    repo.flush()
+    assert json.loads(tags_json.read_text(encoding="utf-8")) == {"https://a": ["x"]}
+
+
+def test_journal_backend_appends_edits_and_compacts(tmp_path, monkeypatch):
+    tags_json = tmp_path / "tags.json"
+    tags_json.write_text(json.dumps({"https://a": ["x"]}), encoding="utf-8")
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+    repo = TagRepository(delay_ms=10, backend="journal", compact_after=4)
+    journal = repo.journal.path
+
+    repo.add_tags(["https://a", "https://b"], ["y"])
+    repo.remove_tags(["https://a"], ["X"])
+
+    # tags.json is untouched; the edits are in the journal
+    assert json.loads(tags_json.read_text(encoding="utf-8")) == {"https://a": ["x"]}
+    assert journal.read_text(encoding="utf-8").splitlines() == [
+        '{"op":"add","url":"https://a","tags":["y"]}',
+        '{"op":"add","url":"https://b","tags":["y"]}',
+        '{"op":"remove","url":"https://a","tags":["x"]}',
+    ]
+    assert repo.writer.pending is None
+
+    # the fourth op makes the journal due -> compacted into tags.json
+    repo.add_tags(["https://c"], ["z"])
+    assert not journal.exists()
+    assert json.loads(tags_json.read_text(encoding="utf-8")) == repo.tag_map
+    repo.reload_if_changed()
+    assert repo.reloads == 0
+
+
+def test_leftover_journal_is_compacted_on_startup(tmp_path, monkeypatch):
+    tags_json = tmp_path / "tags.json"
+    tags_json.write_text(json.dumps({"https://a": ["x"]}), encoding="utf-8")
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+    journal = tmp_path / "tags.journal.jsonl"
+    journal.write_text('{"op":"add","url":"https://a","tags":["y"]}\n', encoding="utf-8")
+
+    repo = TagRepository(delay_ms=10, backend="journal")
+
+    assert repo.tags_of("https://a") == ["x", "y"]
+    assert not journal.exists()
+    assert json.loads(tags_json.read_text(encoding="utf-8")) == {"https://a": ["x", "y"]}
+
+
+def test_sqlite_backend_migrates_and_upserts_edited_urls(tmp_path, monkeypatch):
+    tags_json = tmp_path / "tags.json"
+    tags_json.write_text(json.dumps({"https://a": ["x"], "https://old": ["y"]}), encoding="utf-8")
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+    repo = TagRepository(delay_ms=10, backend="sqlite")
+    assert repo.tag_map == {"https://a": ["x"], "https://old": ["y"]}
+
+    repo.add_tags(["https://b"], ["z"])
+    repo.remove_tags(["https://a"], ["X"])
+    repo.prune(["https://a", "https://b"])
+
+    # written right away, tags.json is left as it was
+    assert repo.writer.pending is None
+    assert json.loads(tags_json.read_text(encoding="utf-8")) == {"https://a": ["x"], "https://old": ["y"]}
+    assert hf.load_tags(backend="sqlite") == {"https://b": ["z"]}
+    repo.reload_if_changed()
+    assert repo.reloads == 0
+
+
+def test_sqlite_backend_notices_writes_of_others(tmp_path, monkeypatch):
+    tags_json = tmp_path / "tags.json"
+    tags_json.write_text(json.dumps({"https://a": ["x"]}), encoding="utf-8")
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+    repo = TagRepository(delay_ms=10, backend="sqlite")
+    repo.add_tags(["https://a"], ["y"])
+    # own writes are recognised by mtime and size, the file is not read
+    st = repo.path.stat()
+    assert repo.saved_digest() == f"{st.st_mtime_ns}:{st.st_size}:{st.st_ino}".encode()
+
+    with TagDatabase(repo.path) as database:
+        database.set_tags("https://b", ["other", "process", "tags"])
+    repo.reload_if_changed()
+    assert repo.reloads == 1
+    assert repo.tag_map == {"https://a": ["x", "y"], "https://b": ["other", "process", "tags"]}
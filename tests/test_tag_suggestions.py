@@ -0,0 +1,39 @@
+from services.tag_suggestions import TagSuggester
+
+
+def test_prefix_matches_rank_before_fuzzy_matches():
+    suggester = TagSuggester()
+    suggester.set_choices({"python", "pyside", "typing", "rust", "Pytest"})
+
+    suggestions = suggester.suggest("py")
+
+    assert suggestions[:3] == ["pyside", "Pytest", "python"]
+    assert "rust" not in suggestions
+
+
+def test_empty_stub_returns_all_tags_sorted():
+    suggester = TagSuggester()
+    suggester.set_choices({"b", "a", "c"})
+    assert suggester.suggest("") == ["a", "b", "c"]
+
+
+def test_fuzzy_results_respect_cutoff_and_limit():
+    suggester = TagSuggester(limit=2, score_cutoff=60)
+    suggester.set_choices({"databse", "database", "data", "zzz"})
+
+    suggestions = suggester.suggest("dtabase")
+
+    assert len(suggestions) == 2
+    assert set(suggestions) == {"database", "databse"}
+
+
+def test_choices_are_only_rebuilt_for_a_new_tag_collection():
+    suggester = TagSuggester()
+    tags = {"a", "b"}
+    suggester.set_choices(tags)
+    prepared = suggester.by_lower
+    suggester.set_choices(tags)
+    assert suggester.by_lower is prepared
+    suggester.set_choices({"a", "b", "c"})
+    assert suggester.by_lower is not prepared
+    assert suggester.suggest("") == ["a", "b", "c"]
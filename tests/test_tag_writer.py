@@ -0,0 +1,51 @@
+import json
+
+import helper_functions as hf
+from services.tag_writer import TagWriter
+
+
+def test_burst_of_edits_is_written_once(tmp_path, monkeypatch, wait_until):
+    tags_json = tmp_path / "tags.json"
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+    writer = TagWriter(delay_ms=20)
+
+    for count in range(1, 6):
+        writer.schedule({"https://example.com": [f"tag{i}" for i in range(count)]})
+
+    # not on disk yet
+    assert not tags_json.exists()
+
+    assert wait_until(lambda: writer.writes)
+    assert writer.writes == 1
+    assert json.loads(tags_json.read_text(encoding="utf-8")) == {
+        "https://example.com": ["tag0", "tag1", "tag2", "tag3", "tag4"]
+    }
+
+
+def test_flush_writes_immediately_and_only_when_pending(tmp_path, monkeypatch):
+    tags_json = tmp_path / "tags.json"
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+    writer = TagWriter(delay_ms=10_000)
+
+    writer.flush()
+    assert writer.writes == 0
+
+    writer.schedule({"https://example.com": ["a"]})
+    writer.flush()
+    assert writer.writes == 1
+    assert not writer.timer.isActive()
+    assert hf.load_tags() == {"https://example.com": ["a"]}
+
+
+def test_cancel_drops_the_pending_map(tmp_path, monkeypatch):
+    tags_json = tmp_path / "tags.json"
+    monkeypatch.setattr(hf, "TAGS_JSON", tags_json)
+    writer = TagWriter(delay_ms=10_000)
+
+    writer.schedule({"https://example.com": ["a"]})
+    writer.cancel()
+    assert writer.pending is None
+    assert not writer.timer.isActive()
+    writer.flush()
+    assert writer.writes == 0
+    assert not tags_json.exists()
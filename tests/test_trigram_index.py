@@ -0,0 +1,21 @@
+from services.trigram_index import TrigramIndex, grams
+
+
+def test_grams():
+    assert grams("abcd") == {"abc", "bcd"}
+    assert grams("ab") == set()
+
+
+def test_candidates_are_a_superset_of_matches():
+    index = TrigramIndex()
+    texts = ["python docs", "qt for python", "köln"]
+    for row, text in enumerate(texts):
+        index.add(row, (text,))
+    assert index.candidates("pyth") >= {0, 1}
+    assert index.candidates("xyz") == set()
+    assert index.candidates("py") is None
+
+    index.discard(1, (texts[1],))
+    index.remap({0: 0, 2: 1})
+    assert index.candidates("pyth") == {0}
+    assert index.candidates("öln") == {1}
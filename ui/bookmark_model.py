@@ -0,0 +1,192 @@
+from dataclasses import dataclass, field
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QRect, QSize
+from PySide6.QtGui import QColor, QFont, QFontMetrics
+from PySide6.QtWidgets import (
+    QApplication, QStyle, QStyledItemDelegate, QStyleOptionViewItem
+)
+
+from services.bookmark_store import BookmarkRecord
+from services.tag_dictionary import TAGS, TagDictionary
+
+
+# columns of the bookmark table; only COL_BOOKMARK is visible,
+# the others expose the raw values for lookups
+COL_BOOKMARK, COL_URL, COL_TAGS, COL_NAME = range(4)
+HEADER_LABELS = ["Bookmarks", "URL", "Tags", "Name"]
+
+# same height the former per-row QLabel widgets had as minimum
+ROW_HEIGHT = 100
+CELL_PADDING = 6
+
+
+@dataclass
+class RowDiff:
+    """Row changes turning one list of rows into another."""
+    added: list[BookmarkRecord] = field(default_factory=list)
+    # ids of rows in the old list
+    removed: set[int] = field(default_factory=set)
+    # (id in the old list, new content)
+    changed: list[tuple[int, BookmarkRecord]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+
+def diff_rows(old: list[BookmarkRecord], new: list[BookmarkRecord]) -> RowDiff:
+    """
+    Match rows by URL (the n-th row with a URL matches the n-th row with
+    the same URL) and report what was added, removed or changed.
+    """
+    def keyed(rows):
+        seen: dict[str, int] = {}
+        for row in rows:
+            seen[row.url] = seen.get(row.url, 0) + 1
+            yield (row.url, seen[row.url]), row
+
+    old_ids = {key: row_id for row_id, (key, _) in enumerate(keyed(old))}
+    diff = RowDiff()
+    for key, row in keyed(new):
+        row_id = old_ids.pop(key, None)
+        if row_id is None:
+            diff.added.append(row)
+        elif old[row_id] != row:
+            diff.changed.append((row_id, row))
+    diff.removed = set(old_ids.values())
+    return diff
+
+
+class BookmarkTableModel(QAbstractTableModel):
+    """Table model backed by the record list of a BookmarkStore."""
+
+    def __init__(
+        self,
+        rows: list[BookmarkRecord] | None = None,
+        tag_dictionary: TagDictionary = TAGS,
+        parent=None,
+    ) -> None:
+        super().__init__(parent)
+        # shared with the BookmarkStore, not copied
+        self.rows: list[BookmarkRecord] = rows if rows is not None else []
+        # tag IDs of the rows -> display text
+        self.tag_dictionary = tag_dictionary
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HEADER_LABELS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (
+            Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole
+        ):
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+        if column == COL_URL:
+            return row.url
+        if column == COL_TAGS:
+            return self.tag_dictionary.text_of(row.tags)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            # the folder path is what the folder filter matches against
+            return f"{row.url}\n{row.folder}" if row.folder else row.url
+        return row.name
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HEADER_LABELS[section]
+        return None
+
+    def set_rows(self, rows: list[BookmarkRecord]) -> None:
+        """Replace all rows at once."""
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def append_rows(self, rows: list[BookmarkRecord]) -> None:
+        """Add rows at the end of the table."""
+        if not rows:
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def remove_rows(self, rows: set[int]) -> None:
+        """Remove the given rows, one notification per contiguous block."""
+        for row in sorted(rows, reverse=True):
+            # extend the block downwards while the rows are adjacent
+            if row + 1 in rows:
+                continue
+            first = row
+            while first - 1 in rows:
+                first -= 1
+            self.beginRemoveRows(QModelIndex(), first, row)
+            del self.rows[first:row + 1]
+            self.endRemoveRows()
+
+    def set_row(self, row: int, bookmark: BookmarkRecord) -> None:
+        """Replace a single row and repaint it."""
+        self.rows[row] = bookmark
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(HEADER_LABELS) - 1))
+
+    def set_tags(self, row: int, tags: tuple[int, ...]) -> None:
+        """Update the tags of a single row and repaint it."""
+        self.rows[row].tags = tags
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(HEADER_LABELS) - 1))
+
+
+class BookmarkDelegate(QStyledItemDelegate):
+    """Paint name (bold), URL and tags of a bookmark in the configured colors."""
+
+    def __init__(self, colors: dict[str, str], parent=None) -> None:
+        super().__init__(parent)
+        self.set_colors(colors)
+
+    def set_colors(self, colors: dict[str, str]) -> None:
+        self.col_name = QColor(colors.get("col_name") or "#cfffed")
+        self.col_url = QColor(colors.get("col_url") or "#00ccff")
+        self.col_tags = QColor(colors.get("col_tags") or "#008000")
+
+    def paint(self, painter, option, index) -> None:
+        model = index.model()
+        row: BookmarkRecord = model.rows[index.row()]
+
+        # background / selection highlight as drawn by the current style
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        opt.text = ""
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, opt, painter, opt.widget)
+
+        rect = option.rect.adjusted(CELL_PADDING, CELL_PADDING, -CELL_PADDING, -CELL_PADDING)
+        bold = QFont(option.font)
+        bold.setBold(True)
+
+        lines = (
+            (row.name, bold, self.col_name),
+            (row.url, option.font, self.col_url),
+            # tag IDs -> names only here, for the rows actually painted
+            (model.tag_dictionary.text_of(row.tags), option.font, self.col_tags),
+        )
+        # center the three lines vertically like the former QLabel did
+        block_height = sum(QFontMetrics(font).lineSpacing() for _, font, _ in lines)
+        y = rect.top() + max(0, (rect.height() - block_height) // 2)
+
+        painter.save()
+        for text, font, color in lines:
+            metrics = QFontMetrics(font)
+            painter.setFont(font)
+            painter.setPen(color)
+            line = QRect(rect.left(), y, rect.width(), metrics.height())
+            painter.drawText(
+                line,
+                Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                metrics.elidedText(text, Qt.TextElideMode.ElideRight, rect.width()),
+            )
+            y += metrics.lineSpacing()
+        painter.restore()
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(option.rect.width(), ROW_HEIGHT)
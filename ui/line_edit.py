@@ -2,12 +2,16 @@
 import re
 
 # Third-party 
-from rapidfuzz import fuzz
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
      QLineEdit
 )
 
+# Local application modules
+from helper_functions import load_config
+from services.tag_suggestions import TagSuggester
+from ui.search_scheduler import SearchScheduler
+
 
 class LineEdit(QLineEdit):
     def __init__(self, table_obj, dropdown, *args, **kwargs):
@@ -15,25 +19,30 @@ class LineEdit(QLineEdit):
         self.table_obj = table_obj
         self.dropdown = dropdown
 
+        # filtering + dropdown rebuild run once per burst of keystrokes
+        debounce_ms = load_config().get("search", {}).get("debounce_ms", 30)
+        self.search_scheduler = SearchScheduler(self.apply_search, debounce_ms, self)
+        # prepared choice list, only rebuilt when the available tags change
+        self.suggester = TagSuggester()
+
         # KEY PRESSING ELEMENTS 
         self.textChanged.connect(self.on_text_changed)
         # if pressed Enter in SearchBar
         self.returnPressed.connect(self.on_return_pressed)
         # Enter in dropdown causes the same logic
-        self.dropdown.itemActivated.connect(self.on_dropdown_item_activated)
+        self.dropdown.activated.connect(self.on_dropdown_item_activated)
 
-    def on_dropdown_item_activated(self, item):
+    def on_dropdown_item_activated(self, index):
         """Called when pressed 'return' in the dropdown menu"""
         self.on_return_pressed()
 
     def focusInEvent(self, event):
         """Unfold dropdown menu if focused and fill it with all tags"""
         super().focusInEvent(event)
-        all_tags = self.table_obj.get_all_tags()
-        self.dropdown.clear()
+        self.suggester.set_choices(self.table_obj.set_of_tags)
+        # one model swap instead of one QListWidgetItem per tag
+        self.dropdown.set_tags(self.suggester.suggest(""))
         self.dropdown.show()
-        for tag in all_tags:
-            self.dropdown.addItem(tag)
 
     def focusOutEvent(self, event):
         """Hide dropdown menu if not focused"""
@@ -41,7 +50,20 @@ class LineEdit(QLineEdit):
         self.dropdown.hide()
 
     def on_text_changed(self, text: str):
-        text = text or ""
+        """Schedule a search; rapid edits are coalesced into one evaluation."""
+        self.search_scheduler.schedule()
+
+    def schedule_search(self) -> None:
+        """Also used by the URL/name detail filters."""
+        self.search_scheduler.schedule()
+
+    def flush_search(self) -> None:
+        """Evaluate a pending search immediately."""
+        self.search_scheduler.flush()
+
+    def apply_search(self):
+        """Filter the table by the current text and rebuild the dropdown."""
+        text = self.text() or ""
         # split string in SearchBar and create list of comma-sep strings
         parts = [p.strip() for p in text.split(",") if p.strip()]
 
@@ -63,41 +85,26 @@ class LineEdit(QLineEdit):
 
         self.table_obj.filter_table(filter_text, used_tags)
 
-        # dropdown with all available tags 
-        all_tags = list(self.table_obj.get_all_tags())
-        self.dropdown.clear()
-
-        if not user_input:
-            # no stub > show all tags available
-            for tag in all_tags:
-                self.dropdown.addItem(tag)
-            return
-
-        # fuzzy filter available tags based on the stub
-        scored = []
-        for tag in all_tags:
-            score = fuzz.ratio(str(tag), user_input)
-            scored.append((score, tag))
-        scored.sort(reverse=True)
-
-        # tags with threshold score += 30 become visible in dropdown menu
-        for score, tag in scored:
-            if score >= 30:
-                self.dropdown.addItem(tag)
+        # dropdown with the available tags; no stub -> all of them
+        self.suggester.set_choices(self.table_obj.set_of_tags)
+        # prefix matches first, then fuzzy matches scoring >= 30
+        self.dropdown.set_tags(self.suggester.suggest(user_input))
 
     def on_return_pressed(self):
         """Take tag from dropdown and put it into SearchBar as a string"""
+        # make sure the dropdown reflects what has been typed so far
+        self.flush_search()
         # currently preselected dropdown tag
-        item = self.dropdown.currentItem()
+        item = self.dropdown.current_text()
         # if no focus on a tag in the dropdown
         # -> select the topmost tag on Return
         if item is None and self.dropdown.count() > 0:
-            item = self.dropdown.item(0)
+            item = self.dropdown.item_text(0)
 
         if item is None:
             return
 
-        tag = item.text().strip()
+        tag = item.strip()
         text = self.text()
 
         # split text into "part before last comma" and "stub after comma"
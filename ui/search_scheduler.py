@@ -0,0 +1,42 @@
+from typing import Callable
+
+from PySide6.QtCore import QObject, QTimer
+
+
+class SearchScheduler(QObject):
+    """
+    Coalesce rapid edits of the search fields into a single evaluation.
+
+    Every edit calls schedule(), which (re)starts a single-shot timer. The
+    callback only runs once the fields have been quiet for `debounce_ms`
+    and then reads the *current* texts, so intermediate (stale) queries are
+    never evaluated. A window of 0 still merges all edits that arrive
+    within one event-loop iteration, e.g. a paste.
+    """
+
+    def __init__(self, callback: Callable[[], None], debounce_ms: int = 30, parent=None) -> None:
+        super().__init__(parent)
+        self.callback = callback
+        self.evaluations = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(max(0, int(debounce_ms)))
+        self.timer.timeout.connect(self.run)
+
+    @property
+    def pending(self) -> bool:
+        return self.timer.isActive()
+
+    def schedule(self) -> None:
+        """Request an evaluation; restarts the quiet window."""
+        self.timer.start()
+
+    def flush(self) -> None:
+        """Run a pending evaluation right now (e.g. before Return is handled)."""
+        if self.timer.isActive():
+            self.timer.stop()
+            self.run()
+
+    def run(self) -> None:
+        self.evaluations += 1
+        self.callback()
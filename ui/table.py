@@ -1,23 +1,38 @@
 import subprocess
-from urllib.parse import unquote, quote
-from unicodedata import normalize as uni_normalize
+import sys
+from bisect import bisect_left, insort
+from dataclasses import replace
+from itertools import chain
 
-from PySide6.QtWidgets import (QTableWidget, QTableWidgetItem, QAbstractItemView,
-        QHeaderView, QLabel)
-from PySide6.QtCore import Qt, QItemSelectionModel
+from PySide6.QtWidgets import QTableView, QAbstractItemView, QHeaderView
+from PySide6.QtCore import QItemSelectionModel
 
 from helper_functions import load_config
+from services.background_loader import BackgroundLoader
+from services.bookmark_filter import INDEX_MIN_ROWS, BookmarkFilter, split_tags
+from services.bookmark_store import BookmarkRecord, BookmarkStore, unique_name
+from ui.bookmark_model import (
+    COL_BOOKMARK, COL_URL, COL_TAGS, COL_NAME, ROW_HEIGHT,
+    BookmarkDelegate, BookmarkTableModel, RowDiff, diff_rows,
+)
 
 
 class Table():
-    def __init__(self, mydict, extended_search_line_url, extended_search_line_name) -> None:
+    def __init__(
+        self,
+        store: BookmarkStore,
+        extended_search_line_url,
+        extended_search_line_name,
+        extended_search_line_folder=None,
+    ) -> None:
         super().__init__()
-        self.table = QTableWidget()
-        self.mydict = mydict
+        self.table = QTableView()
+        self.store = store
         self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.extended_search_line_url = extended_search_line_url
         self.extended_search_line_name = extended_search_line_name
+        self.extended_search_line_folder = extended_search_line_folder
         self.last_filter_text = ""
         self.last_used_tags: set[str] = set()
 
@@ -29,85 +44,49 @@ class Table():
         self.col_url  = self.colors.get("col_url")
         self.col_tags = self.colors.get("col_tags")
 
-        # create set from all tags from the dict 
-        all_tags = set()
-        for value in self.mydict.values():
-            for tag in value["tags"].split(","):
-                tag = tag.strip()
-                if tag:
-                    all_tags.add(tag)
-        # set of all existing tags to all bookmarks 
-        self.all_tags_full = set(all_tags)
-        # set of all available tags (filtered)
-        self.set_of_tags = set(all_tags)
+        self.collect_tags()
 
         # CREATE TABLE with the Bookmarks
+        # only the visible rows are painted by the delegate, no widget per row
         table  = self.table 
-        table.setRowCount(len(mydict.keys()))
-        header_labels = ["Bookmarks", "URL", "Tags", "Name"]
-        table.setColumnCount(len(header_labels))
-        table.setHorizontalHeaderLabels(header_labels)
+        self.model = BookmarkTableModel(store.records, store.tag_dictionary)
+        self.delegate = BookmarkDelegate(self.colors)
+        table.setModel(self.model)
+        table.setItemDelegateForColumn(COL_BOOKMARK, self.delegate)
+
+        # precomputed search fields + inverted tag index, see filter_table
+        self.filter = BookmarkFilter(self.model.rows, store.tag_dictionary)
+        # trigram indexes of the filter are built on a worker thread
+        self.index_job = self.filter.search_index_job()
+        self.index_loader = BackgroundLoader(lambda: self.index_job())
+        self.index_loader.loaded.connect(self.on_search_index_built)
+        self.request_search_index()
+        # rows currently not hidden by the filter
+        self.visible_rows: set[int] = set(range(self.model.rowCount()))
+        # url -> ascending ids of the rows with that URL
+        self.url_index: dict[str, list[int]] = {}
+        self.rebuild_url_index()
 
         # Hide all columns except the first one
-        table.setColumnHidden(1, True)
-        table.setColumnHidden(2, True)
-        table.setColumnHidden(3, True)
+        table.setColumnHidden(COL_URL, True)
+        table.setColumnHidden(COL_TAGS, True)
+        table.setColumnHidden(COL_NAME, True)
 
         table.verticalHeader().hide() # hide row numbers
-
-        # Create a set of all available tags (no pre-filtering)
-        all_tags = set()
-        for value in self.mydict.values():
-            # split the comma-separated tags by comma
-            for tag in value["tags"].split(","):
-                tag = tag.strip()
-                if tag:
-                    # add the tags to the set 
-                    all_tags.add(tag)
-
-        self.fill_table(mydict)
-
-    def fill_table(self, mydict):
-        table = self.table
-        # name of bookmark, data containing url and tags
-        # example of how the mydict dict looks like:
-        # {name : {"url": "...", "tags": "tag1,tag2"} }
-        for row, (name, data) in enumerate(mydict.items()):
-            url = data["url"]
-            tags_str = data["tags"]
-
-            display_text = (
-                "<html><body>"
-                f'<span style="font-weight:bold; color:{self.col_name};">{name}</span><br>'
-                f'<span style="color:{self.col_url};">{url}</span><br>'
-                f'<span style="color:{self.col_tags};">{tags_str}</span>'
-                "</body></html>"
-            )
-
-            # instead of columns, use label in HTML-format to display 
-            label = QLabel()
-            label.setText(display_text)
-            label.setTextFormat(Qt.TextFormat.RichText)
-            label.setWordWrap(True)
-            label.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
-            label.setMinimumHeight(100)
-
-            # show the Name/URL/Tags Combo as one label per bookmark entry
-            table.setCellWidget(row, 0, label)
-
-            # hide the columns containing url/tags_str/name for each 
-            # bookmark entry in the table
-            # these infos are still needed for live filtering the table elements
-            table.setItem(row, 1, QTableWidgetItem(url))
-            table.setItem(row, 2, QTableWidgetItem(tags_str))
-            table.setItem(row, 3, QTableWidgetItem(name))
-
-        # adjust row's height according to the needed space for each entry (with Name,URL,Tags)
-        table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
-        # stretch row 0 as it is the only row visible
-        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-        # forces height calculation after filling the table 
-        table.resizeRowsToContents()
+        # all rows share one height -> no per-row size calculation
+        table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        table.verticalHeader().setDefaultSectionSize(ROW_HEIGHT)
+        # stretch column 0 as it is the only column visible
+        table.horizontalHeader().setSectionResizeMode(COL_BOOKMARK, QHeaderView.ResizeMode.Stretch)
+
+    def row_data(self, row: int) -> BookmarkRecord:
+        """Return name/url/tags of the given table row."""
+        return self.model.rows[row]
+
+    def collect_tags(self) -> None:
+        """Create set from all tags of the store."""
+        # set of all available tags (filtered)
+        self.set_of_tags = self.store.all_tags()
 
     def get_all_tags(self) -> list[str]:
         """desc: returns sorted list of tags"""
@@ -118,7 +97,6 @@ class Table():
         filter_text: str -> comma separated tags
         """
         table = self.table
-        table.setUpdatesEnabled(False)
         filter_text = (filter_text or "").strip().lower()
 
         # create empty set if no tags are used as filters yet
@@ -126,12 +104,8 @@ class Table():
         self.last_filter_text = filter_text
         self.last_used_tags = set(used_tags)
         
-        # create filter_tags list (deleting spaces and empty strings)
-        filter_tags = [
-            tag.strip()
-            for tag in filter_text.split(",")
-            if tag.strip()
-        ]
+        # create filter_tags set (deleting spaces and empty strings)
+        filter_tags = split_tags(filter_text)
 
         # URL SUBSTRING in extended_search_line_url
         url_substring = ""
@@ -139,11 +113,6 @@ class Table():
         if self.extended_search_line_url is not None:
             # strip the URL string and make it lowercase
             url_substring = (self.extended_search_line_url.text() or "").strip().lower()
-        # normalize the String: e.g. "%C3%B6" becomes German "ö" 
-        url_substring_dec = uni_normalize("NFC", unquote(url_substring))
-        # normalize the unicode variant into NFC-Form -> 
-        # e.g. "ö" and "o"+ Combining Umlaut are treated the same 
-        url_substring_enc = quote(url_substring_dec, safe=":/?#[]@!$&'()*+,;=%")
         
         # NAME SUBSTRING in extended_search_line_name
         name_substring = ""
@@ -151,78 +120,50 @@ class Table():
         if self.extended_search_line_name is not None:
             name_substring = (self.extended_search_line_name.text() or "").strip().lower()
 
-        visible_tags = set()
-
-        try: 
-            for row in range(table.rowCount()):
-                item = table.item(row, 2)  # column: tags
-
-                # -- TAGS --
-                # make tags lowercase
-                tags = item.text().lower() if item else ""
-                # reformat the comma-separated tags and create list with these
-                row_tags = [
-                    tag.strip()
-                    for tag in tags.split(",")
-                    if tag.strip()
-                ]
-
-                # True only if EVERY filter tag exists in the row's tags
-                tag_match:bool = all(ftag in row_tags for ftag in filter_tags)
-
-                # -- URL --
-                url_item = table.item(row, 1)
-                # lowercase and normalize url
-                url_text = url_item.text().lower() if url_item else ""
-                url_text_dec = uni_normalize("NFC", unquote(url_text))
-
-                # url_match if url_substring empty
-                if not url_substring:
-                    url_match = True
-                else:
-                    # url match if any url_text variant in any url_substring variant
-                    url_match = (
-                        # TODO: minimize variants
-                        url_substring in url_text
-                        or url_substring_dec in url_text
-                        or url_substring in url_text_dec
-                        or url_substring_dec in url_text_dec
-                        or url_substring_enc in url_text
-                    )
-
-                # -- NAME --
-                name_item = table.item(row, 3)
-                name_text = name_item.text().lower() if name_item else ""
-                # name_match if name_substring empty or substring of name_text 
-                # -> allows only one single consecutive substring of name_text
-                name_match: bool = (not name_substring) or (name_substring in name_text)
-
-                # MATCH if ALL SUBCATEGORIES (tags, url, name) are True (empty possible)
-                match: bool = tag_match and url_match and name_match
-                table.setRowHidden(row, not match)
-
-                if not match: # if a row is no match 
-                    # get the model-index of the row (for col 0)
-                    index = table.model().index(row, 0)
-                    # deselect the rows that have no match
-                    table.selectionModel().select(
-                        index, # selection
-                        # SelectionFlag: deselect
-                        QItemSelectionModel.SelectionFlag.Deselect |
-                        # the entire row for the given index
-                        QItemSelectionModel.SelectionFlag.Rows
-                    )
-
-                if match:
-                    # add the row_tags to the set of visible_tags
-                    visible_tags.update(row_tags)
-
-        finally:
-            # re-render the table
-            table.setUpdatesEnabled(True)
+        # FOLDER SUBSTRING in extended_search_line_folder, e.g. "bookmarksbar/news"
+        folder_substring = ""
+        if self.extended_search_line_folder is not None:
+            folder_substring = (self.extended_search_line_folder.text() or "").strip().lower()
+
+        # MATCH if ALL SUBCATEGORIES (tags, url, name, folder) are True (empty possible)
+        # (narrows the previous result if the query only got stricter)
+        matched = self.filter.match(filter_tags, url_substring, name_substring, folder_substring)
+
+        # only touch rows whose visibility actually changes
+        newly_hidden = self.visible_rows - matched
+        newly_shown = matched - self.visible_rows
+        if newly_hidden or newly_shown:
+            table.setUpdatesEnabled(False)
+            try:
+                for row in newly_shown:
+                    table.setRowHidden(row, False)
+                for row in newly_hidden:
+                    table.setRowHidden(row, True)
+
+                # deselect the rows that have no match
+                selection_model = table.selectionModel()
+                for index in selection_model.selectedRows():
+                    if index.row() in newly_hidden:
+                        selection_model.select(
+                            index, # selection
+                            # SelectionFlag: deselect
+                            QItemSelectionModel.SelectionFlag.Deselect |
+                            # the entire row for the given index
+                            QItemSelectionModel.SelectionFlag.Rows
+                        )
+            finally:
+                # re-render the table
+                table.setUpdatesEnabled(True)
+        self.visible_rows = matched
+
         # available tags, i.e. tags-set of visible table rows 
         # minus set of tags selected via dropdown
-        self.set_of_tags = visible_tags - used_tags
+        dictionary = self.store.tag_dictionary
+        used_ids = {dictionary.lookup(tag) for tag in used_tags}
+        available = set(dictionary.names_of(self.filter.tags_of(matched) - used_ids))
+        # a new object tells TagSuggester to prepare its choices again
+        if available != self.set_of_tags:
+            self.set_of_tags = available
 
     def refresh_filter(self) -> None:
         """Re-apply the last filter after tag changes."""
@@ -236,12 +177,8 @@ class Table():
         # iterate over the selected bookmark entries 
         for bookmark in indexes:
             # extract each selected bookmark's url 
-            row = bookmark.row()
-            bookmark_url = self.table.item(row,1)
-            if bookmark_url is None:
-                continue
-            url = bookmark_url.text()
-        
+            url = self.row_data(bookmark.row()).url
+
             # save extracted urls in a list
             list_of_urls_to_open.append(url)
 
@@ -285,14 +222,201 @@ class Table():
         self.col_name = colors.get("col_name", self.col_name)
         self.col_url = colors.get("col_url", self.col_url)
         self.col_tags = colors.get("col_tags", self.col_tags)
-        self.reload(self.mydict)
+        # colors are only used while painting -> a repaint is enough
+        self.delegate.set_colors(self.colors)
+        self.table.viewport().update()
 
-    def reload(self, mydict):
+    def reload(self, store: BookmarkStore):
         """Clears the existing table and reloads its content"""
-        self.mydict = mydict
+        self.store = store
+        # the table may have been created empty while bookmarks were loading
+        self.collect_tags()
+        self.model.tag_dictionary = self.filter.tag_dictionary = store.tag_dictionary
+        self.model.set_rows(store.records)
+        self.filter.rebuild(self.model.rows)
+        self.request_search_index()
+        self.rebuild_url_index()
+        # the view may keep rows hidden across a model reset -> ask it, then
+        # re-apply the current filter to the new rows
+        self.visible_rows = {
+            row for row in range(self.model.rowCount()) if not self.table.isRowHidden(row)
+        }
+        self.refresh_filter()
+
+    def request_search_index(self) -> None:
+        """Build the filter's trigram indexes in the background (large tables only)."""
+        if len(self.filter) < INDEX_MIN_ROWS:
+            return
+        self.index_job = self.filter.search_index_job()
+        self.index_loader.request()
+
+    def on_search_index_built(self, built) -> None:
+        # rows changed while building -> build again from the current rows
+        if not self.filter.install_search_index(built):
+            self.request_search_index()
+
+    def rebuild_url_index(self) -> None:
+        self.url_index = {}
+        for row, bookmark in enumerate(self.model.rows):
+            self.url_index.setdefault(bookmark.url, []).append(row)
+
+    def rows_of_url(self, url: str) -> list[int]:
+        """Return the ids of all rows with the given URL."""
+        return self.url_index.get(url, [])
+
+    def row_of_url(self, url: str) -> int | None:
+        """Return the id of the first row with the given URL."""
+        rows = self.url_index.get(url)
+        return rows[0] if rows else None
+
+    def selected_bookmarks(self) -> list[tuple[int, BookmarkRecord]]:
+        """Return (row id, bookmark) of every selected row not hidden by the filter."""
+        return [
+            (index.row(), self.model.rows[index.row()])
+            for index in self.table.selectionModel().selectedRows()
+            if index.row() in self.visible_rows
+        ]
 
-        table = self.table
-        table.clearContents()
-        table.setRowCount(len(mydict.keys()))
+    def insert_row(self, bookmark: BookmarkRecord) -> int:
+        """Add one bookmark at the end of the table and return its row id."""
+        return self.apply_row_diff(RowDiff(added=[bookmark]))[0]
+
+    def remove_row(self, url: str) -> bool:
+        """Remove the row with the given URL; False if there is none."""
+        row = self.row_of_url(url)
+        if row is None:
+            return False
+        self.apply_row_diff(RowDiff(removed={row}))
+        return True
+
+    def update_row(self, url: str, /, **fields) -> bool:
+        """Change name/url/tags of the (first) row with the given URL."""
+        row = self.row_of_url(url)
+        if row is None:
+            return False
+        bookmark = replace(self.model.rows[row], **fields)
+        self.apply_row_diff(RowDiff(changed=[(row, bookmark)]))
+        return True
+
+    def apply_store(self, store: BookmarkStore) -> None:
+        """
+        Bring the table in line with a freshly built store, touching only
+        the rows that differ. Falls back to reload() when most rows changed
+        anyway (a model reset is cheaper then).
+
+        The table keeps working on its current store, patched to match.
+        """
+        diff = diff_rows(self.model.rows, store.records)
+        if len(diff) > self.model.rowCount() // 2:
+            self.reload(store)
+            return
+        self.apply_row_diff(diff)
 
-        self.fill_table(mydict)
+    def apply_row_diff(self, diff: RowDiff) -> list[int]:
+        """
+        Patch the rows of a RowDiff into model, filter index and view and
+        re-apply the current filter once. Returns the ids of added rows.
+        """
+        model = self.model
+        for row, bookmark in diff.changed:
+            old_url = model.rows[row].url
+            if bookmark.url != old_url:
+                rows = self.url_index[old_url]
+                rows.remove(row)
+                if not rows:
+                    del self.url_index[old_url]
+                insort(self.url_index.setdefault(bookmark.url, []), row)
+            model.set_row(row, bookmark)
+            self.filter.update_row(row, bookmark)
+
+        if diff.removed:
+            model.remove_rows(diff.removed)
+            self.filter.remove_rows(diff.removed)
+            # hidden rows move up in the view as well
+            shift = sorted(diff.removed)
+            self.visible_rows = {
+                row - bisect_left(shift, row)
+                for row in self.visible_rows
+                if row not in diff.removed
+            }
+            self.rebuild_url_index()
+
+        first = model.rowCount()
+        model.append_rows(diff.added)
+        for row, bookmark in enumerate(diff.added, first):
+            self.filter.append_row(bookmark)
+            self.url_index.setdefault(bookmark.url, []).append(row)
+        added = list(range(first, model.rowCount()))
+        # new rows are shown until the filter is re-applied
+        self.visible_rows.update(added)
+
+        self.refresh_filter()
+        return added
+
+    def apply_bookmark_changes(self, changes, tag_map: dict[str, list[str]]) -> list[int]:
+        """
+        Patch only the rows affected by a BookmarkChangeSet instead of
+        reloading the whole table. Rows are matched by URL; `tag_map`
+        (url -> tags) provides the tags of added bookmarks and changed URLs.
+
+        Returns the row ids of the added bookmarks.
+        """
+        # how many rows of a URL were already matched to a change
+        taken: dict[str, int] = {}
+
+        def take_row(url: str) -> int | None:
+            rows = self.rows_of_url(url)
+            count = taken.get(url, 0)
+            if count >= len(rows):
+                return None
+            taken[url] = count + 1
+            return rows[count]
+
+        diff = RowDiff()
+        # names already shown; new names are numbered after them
+        names_taken = {record.name: 2 for record in self.model.rows}
+        # renamed / changed URL / moved to another folder: update in place
+        updated = {
+            old.url: (old, new)
+            for old, new in chain(changes.retitled, changes.url_changed, changes.moved)
+        }
+        for old_url, (old, new) in updated.items():
+            row = take_row(old_url)
+            if row is None:
+                continue
+            current = self.model.rows[row]
+            tags = current.tags
+            if new.url != old_url:
+                tags = self.store.tag_dictionary.ids_of(tag_map.get(new.url, ()))
+            name = new.name or new.url
+            # the shown name stays, e.g. "Name (2)", unless the title changed
+            name = current.name if name == (old.name or old.url) else unique_name(name, names_taken)
+            diff.changed.append((row, BookmarkRecord(
+                name=name, url=new.url, tags=tags, uuid=new.uuid, folder=sys.intern(new.folder),
+            )))
+
+        diff.removed = {row for row in map(take_row, (bm.url for bm in changes.removed)) if row is not None}
+        diff.added = BookmarkStore.from_bookmarks(
+            changes.added, tag_map, self.store.tag_dictionary, taken=names_taken,
+        ).records
+        return self.apply_row_diff(diff)
+
+    def show_row(self, row: int) -> None:
+        """Unhide a single row regardless of the current filter."""
+        self.table.setRowHidden(row, False)
+        self.visible_rows.add(row)
+
+    def update_tags(self, urls, tag_map) -> None:
+        """Show the tags of tag_map (url -> tags) in every row of the given URLs."""
+        dictionary = self.store.tag_dictionary
+        for url in urls:
+            tags = dictionary.ids_of(tag_map.get(url, ()))
+            # tags belong to a URL -> update duplicates of a bookmark as well
+            for row in self.rows_of_url(url):
+                self.set_row_tags(row, tags)
+        self.refresh_filter()
+
+    def set_row_tags(self, row: int, tags: tuple[int, ...]) -> None:
+        """Change the tags of one row in the model and the filter index."""
+        self.model.set_tags(row, tags)
+        self.filter.update_row(row, self.model.rows[row])
@@ -0,0 +1,49 @@
+from PySide6.QtCore import QStringListModel
+from PySide6.QtWidgets import QAbstractItemView, QListView
+
+
+# more suggestions than this are never useful in the dropdown
+MAX_DISPLAYED_TAGS = 200
+
+
+class TagDropdown(QListView):
+    """
+    Tag suggestion list below the search bar.
+
+    Backed by a QStringListModel whose contents are swapped with a single
+    setStringList() call, so rebuilding the suggestions does not create a
+    widget item per tag. Only the visible entries are ever painted.
+    """
+
+    def __init__(self, parent=None, max_items: int = MAX_DISPLAYED_TAGS) -> None:
+        super().__init__(parent)
+        self.max_items = max_items
+        self.tags_model = QStringListModel(self)
+        self.setModel(self.tags_model)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setUniformItemSizes(True)
+
+    def set_tags(self, tags: list[str]) -> None:
+        """Replace all suggestions (capped at max_items)."""
+        self.tags_model.setStringList(list(tags[:self.max_items]))
+
+    def clear(self) -> None:
+        self.tags_model.setStringList([])
+
+    def count(self) -> int:
+        return self.tags_model.rowCount()
+
+    def currentRow(self) -> int:
+        index = self.currentIndex()
+        return index.row() if index.isValid() else -1
+
+    def setCurrentRow(self, row: int) -> None:
+        self.setCurrentIndex(self.tags_model.index(row, 0))
+
+    def item_text(self, row: int) -> str | None:
+        if not 0 <= row < self.count():
+            return None
+        return self.tags_model.index(row, 0).data()
+
+    def current_text(self) -> str | None:
+        return self.item_text(self.currentRow())